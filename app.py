@@ -1,10 +1,43 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
+import calendar
 from io import BytesIO
+from datetime import datetime
+from dataclasses import replace
+from collections import deque
+from functools import partial
+
+from fi_engine import (STRATEGIES, DrawdownParams, FIParams, MonthlyParams,
+                       SimulationParams, cached_update, corpus_path_summary,
+                       depletion_distribution, drawdown_summary,
+                       historical_returns, monthly_frame,
+                       monthly_projection_frame, projection_columns,
+                       projection_frame, rounded_frame,
+                       simulate_corpus_paths, simulate_drawdown, solve_all,
+                       sweep_grid, tornado)
+from fi_engine.events import (EVENT_CATEGORIES, LOAN_CATEGORIES,
+                              events_from_records)
+from fi_engine.diskcache import DiskCache, cache_key, code_version
+from fi_engine.scenarios import ScenarioStore, compare_scenarios
+from fi_engine.sensitivity import YEAR_PARAMS, nudged_values, sobol_indices
+from fi_engine.loans import (full_schedule, loan_totals, loans_from_records,
+                             prepay_vs_invest, yearly_schedule)
+from fi_engine.columnar import (CORPUS_PATH_SCHEMA, corpus_path_batches,
+                               frame_bytes, params_from_metadata,
+                               read_results, results_metadata, write_batches)
+import views
+from perf import PhaseCounters, RerunProfile, chrome_trace, spans_frame
+from views import (CURRENCY_COLS, CURRENCY_FORMAT, age_figure,
+                   asset_growth_figure, asset_growth_table,
+                   corpus_growth_figure, csv_report, current_allocation_figure,
+                   depletion_figure, excel_report, fan_chart_figure,
+                   final_allocation_figure, loan_schedule_figure,
+                   phase_timeline_figure, prepay_invest_figure, probability_figure,
+                   scenario_comparison_figure, solvency_figure,
+                   sobol_convergence_figure, sobol_figure, style_projections,
+                   timeline_events, timeline_figure, tornado_figure)
 
 # Set page configuration
 st.set_page_config(page_title="Financial Independence Calculator",
@@ -12,6 +45,23 @@ st.set_page_config(page_title="Financial Independence Calculator",
                    layout="wide",
                    initial_sidebar_state="expanded")
 
+
+# Phase timings of every profiled rerun in this process
+@st.cache_resource
+def phase_counters():
+    return PhaseCounters()
+
+
+# Reruns kept per session for the trace export
+PERF_HISTORY = 200
+
+# Reruns are only profiled with the performance panel on (set in the
+# sidebar's diagnostics section)
+profile = RerunProfile(st.session_state.get("perf_panel", False),
+                       st.session_state.get("perf_memory", False),
+                       phase_counters())
+profile.begin("Widget read")
+
 st.title("💰 Financial Independence Calculator")
 st.markdown(
     "Plan your journey to financial independence with detailed projections and interactive visualizations."
@@ -32,7 +82,7 @@ with col1:
 with col2:
     end_year = st.number_input("End Year",
                                min_value=start_year + 1,
-                               max_value=2050,
+                               max_value=start_year + 100,
                                value=2037,
                                step=1)
 
@@ -172,6 +222,74 @@ with col2:
         "PF Return (%)", min_value=3.0, max_value=15.0, value=8.0,
         step=0.5) / 100
 
+# How the surplus is invested
+st.sidebar.subheader("⚖️ Asset Allocation")
+allocation = st.sidebar.radio(
+    "Invest Surplus In", ["Surplus to FD", "Target Allocation"],
+    horizontal=True,
+    key="allocation",
+    help="Target Allocation invests the surplus towards target weights, sells FD, MF, stocks and then PF to cover deficits, and rebalances")
+if allocation == "Target Allocation":
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        equity_start = st.slider("Equity Now (%)",
+                                 min_value=0,
+                                 max_value=100,
+                                 value=60,
+                                 step=5,
+                                 key="equity_start") / 100
+        glide_start_age = st.number_input(
+            "Glide Path From Age",
+            min_value=18,
+            max_value=100,
+            value=35,
+            step=1,
+            key="glide_start_age",
+            help="Your age when the equity share starts moving to its later target")
+        rebalancing = st.selectbox(
+            "Rebalancing", ["Calendar", "Threshold", "None"],
+            key="rebalancing",
+            help="Calendar rebalances on schedule; Threshold only when an asset drifts past the band")
+    with col2:
+        equity_end = st.slider("Equity Later (%)",
+                               min_value=0,
+                               max_value=100,
+                               value=30,
+                               step=5,
+                               key="equity_end") / 100
+        glide_end_age = st.number_input("Glide Path To Age",
+                                        min_value=18,
+                                        max_value=100,
+                                        value=60,
+                                        step=1,
+                                        key="glide_end_age")
+        rebalance_every = st.number_input("Review Every (years)",
+                                          min_value=1,
+                                          max_value=10,
+                                          value=1,
+                                          step=1,
+                                          key="rebalance_every")
+    stocks_share = st.sidebar.slider("Stocks Share of Equity (%)",
+                                     min_value=0,
+                                     max_value=100,
+                                     value=50,
+                                     step=5,
+                                     key="stocks_share",
+                                     help="The rest of equity goes to mutual funds") / 100
+    rebalance_band = st.sidebar.slider(
+        "Rebalancing Band (%)",
+        min_value=1.0,
+        max_value=25.0,
+        value=5.0,
+        step=1.0,
+        key="rebalance_band",
+        disabled=rebalancing != "Threshold",
+        help="How far an asset's weight may drift from target before rebalancing") / 100
+else:
+    equity_start, equity_end, stocks_share = 0.6, 0.3, 0.5
+    glide_start_age, glide_end_age = 35, 60
+    rebalancing, rebalance_every, rebalance_band = "Calendar", 1, 0.05
+
 # Expenses section
 st.sidebar.subheader("💸 Monthly Expenses")
 col1, col2 = st.sidebar.columns(2)
@@ -215,22 +333,44 @@ with col2:
                                value=5.0,
                                step=0.5) / 100
 
-# Loan EMIs
+# Loan EMIs. The house loan is either a flat EMI until a closure year or
+# amortized from its principal, rate and prepayments.
 st.sidebar.subheader("🏠 Loan EMIs")
+house_loan_model = st.sidebar.radio(
+    "House Loan Model", ["Flat EMI", "Amortized"],
+    horizontal=True,
+    key="house_loan_model",
+    help="Amortized tracks the outstanding balance, interest and prepayments, and subtracts the balance from net worth")
 col1, col2 = st.sidebar.columns(2)
 with col1:
-    house_loan_emi = st.number_input("House Loan EMI (₹/month)",
-                                     min_value=0,
-                                     max_value=500000,
-                                     value=44000,
-                                     step=1000,
-                                     key="house_loan_emi")
-    house_loan_closure_year = st.number_input("House Loan Closure Year",
-                                              min_value=start_year,
-                                              max_value=end_year,
-                                              value=2028,
-                                              step=1,
-                                              key="house_loan_closure_year")
+    if house_loan_model == "Flat EMI":
+        house_loan_emi = st.number_input("House Loan EMI (₹/month)",
+                                         min_value=0,
+                                         max_value=500000,
+                                         value=44000,
+                                         step=1000,
+                                         key="house_loan_emi")
+        house_loan_closure_year = st.number_input(
+            "House Loan Closure Year",
+            min_value=start_year,
+            max_value=end_year,
+            value=2028,
+            step=1,
+            key="house_loan_closure_year")
+    else:
+        house_loan_emi, house_loan_closure_year = 0, start_year
+        loan_principal = st.number_input("House Loan Amount (₹)",
+                                         min_value=0,
+                                         max_value=500000000,
+                                         value=5000000,
+                                         step=100000,
+                                         key="loan_principal")
+        loan_start_year = st.number_input("Loan Start Year",
+                                          min_value=1990,
+                                          max_value=end_year,
+                                          value=2020,
+                                          step=1,
+                                          key="loan_start_year")
 with col2:
     car_loan_emi = st.number_input("Car Loan EMI (₹/month)",
                                    min_value=0,
@@ -245,6 +385,91 @@ with col2:
                                             step=1,
                                             key="car_loan_closure_year")
 
+if house_loan_model == "Amortized":
+    loan_month_names = dict(enumerate(calendar.month_abbr[1:], start=1))
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        loan_rate = st.number_input("Interest Rate (%)",
+                                    min_value=0.0,
+                                    max_value=20.0,
+                                    value=8.5,
+                                    step=0.05,
+                                    key="loan_rate") / 100
+        loan_start_month = st.selectbox("Loan Start Month",
+                                        list(loan_month_names),
+                                        format_func=loan_month_names.get,
+                                        key="loan_start_month")
+        annual_prepayment = st.number_input("Annual Prepayment (₹)",
+                                            min_value=0,
+                                            max_value=100000000,
+                                            value=0,
+                                            step=10000,
+                                            key="annual_prepayment")
+    with col2:
+        loan_tenure = st.number_input("Tenure (years)",
+                                      min_value=1,
+                                      max_value=40,
+                                      value=20,
+                                      step=1,
+                                      key="loan_tenure")
+        loan_keep_emi = st.selectbox(
+            "On Rate Change",
+            ["Keep EMI", "Keep Tenure"],
+            key="loan_keep_emi",
+            help="Keep EMI changes how long the loan runs; Keep Tenure recomputes the EMI to close on the original date"
+        ) == "Keep EMI"
+        prepayment_month = st.selectbox("Prepayment Month",
+                                        list(loan_month_names),
+                                        format_func=loan_month_names.get,
+                                        key="prepayment_month")
+    # Floating-rate resets, one row each: the new rate applies from the
+    # given month
+    reset_rows = st.sidebar.data_editor(
+        pd.DataFrame({
+            "Year": pd.Series(dtype="Int64"),
+            "Month": pd.Series(dtype="Int64"),
+            "Rate (%)": pd.Series(dtype=float),
+        }),
+        num_rows="dynamic",
+        hide_index=True,
+        key="loan_rate_resets",
+        column_config={
+            "Year":
+            st.column_config.NumberColumn(min_value=1990, max_value=2100),
+            "Month":
+            st.column_config.NumberColumn(min_value=1, max_value=12),
+            "Rate (%)":
+            st.column_config.NumberColumn(min_value=0.0, max_value=20.0),
+        }).dropna(subset=["Year", "Rate (%)"])
+    loans = loans_from_records([{
+        "name":
+        "House Loan",
+        "category":
+        "House Loan EMI",
+        "principal":
+        float(loan_principal),
+        "rate":
+        loan_rate,
+        "tenure_months":
+        int(loan_tenure) * 12,
+        "start_year":
+        int(loan_start_year),
+        "start_month":
+        loan_start_month,
+        "rate_resets": [(int(row["Year"]),
+                         1 if pd.isna(row["Month"]) else int(row["Month"]),
+                         float(row["Rate (%)"]) / 100)
+                        for row in reset_rows.to_dict("records")],
+        "annual_prepayment":
+        float(annual_prepayment),
+        "prepayment_month":
+        prepayment_month,
+        "keep_emi":
+        loan_keep_emi,
+    }]) if loan_principal > 0 else ()
+else:
+    loans = ()
+
 # Annual expenses
 st.sidebar.subheader("🏖️ Annual Expenses")
 
@@ -324,121 +549,577 @@ with col2:
                                          step=1,
                                          key="bike_purchase_year")
 
+# Any number of further planned expenses and income, one row each. A blank
+# end year makes an event one-off; amounts are in today's money.
+st.sidebar.subheader("🗂️ Other Planned Events")
+event_rows = st.sidebar.data_editor(
+    pd.DataFrame({
+        "Event": pd.Series(dtype=str),
+        "Category": pd.Series(dtype=str),
+        "Amount (₹)": pd.Series(dtype=float),
+        "Start Year": pd.Series(dtype="Int64"),
+        "End Year": pd.Series(dtype="Int64"),
+        "Inflation (%)": pd.Series(dtype=float),
+        "Month": pd.Series(dtype="Int64"),
+        "Monthly": pd.Series(dtype=bool),
+    }),
+    num_rows="dynamic",
+    hide_index=True,
+    key="planned_events",
+    column_config={
+        "Category":
+        st.column_config.SelectboxColumn(options=[
+            category for category in EVENT_CATEGORIES
+            if category not in LOAN_CATEGORIES
+        ]),
+        "Amount (₹)":
+        st.column_config.NumberColumn(min_value=0, format="₹%,d"),
+        "Start Year":
+        st.column_config.NumberColumn(min_value=2000, max_value=2100),
+        "End Year":
+        st.column_config.NumberColumn(
+            min_value=2000,
+            max_value=2100,
+            help="Last year it recurs; leave blank for a one-off"),
+        "Inflation (%)":
+        st.column_config.NumberColumn(min_value=0.0, max_value=30.0),
+        "Month":
+        st.column_config.NumberColumn(
+            min_value=1,
+            max_value=12,
+            help="Month it is paid, or the first month if it recurs monthly"),
+        "Monthly":
+        st.column_config.CheckboxColumn(
+            help="Amount recurs every month until the end year"),
+    })
+event_rows = event_rows.dropna(
+    subset=["Event", "Category", "Amount (₹)", "Start Year"])
+planned_events = ()
+for row in event_rows.to_dict("records"):
+    try:
+        planned_events += events_from_records([{
+            "name":
+            row["Event"],
+            "category":
+            row["Category"],
+            "amount":
+            float(row["Amount (₹)"]),
+            "start_year":
+            int(row["Start Year"]),
+            "end_year":
+            None if pd.isna(row["End Year"]) else int(row["End Year"]),
+            "inflation":
+            0.0 if pd.isna(row["Inflation (%)"]) else
+            float(row["Inflation (%)"]) / 100,
+            "month":
+            1 if pd.isna(row["Month"]) else int(row["Month"]),
+            "monthly":
+            bool(row["Monthly"]) if pd.notna(row["Monthly"]) else False,
+        }])
+    except ValueError as exc:
+        st.sidebar.error(f"Skipped event: {exc}")
+
+# Income tax
+st.sidebar.subheader("🧾 Income Tax")
+TAX_REGIMES = {
+    "new": "New Regime",
+    "old": "Old Regime",
+    "none": "Ignore Tax (pre-tax figures)",
+}
+tax_regime = st.sidebar.radio(
+    "Tax Regime",
+    list(TAX_REGIMES),
+    format_func=TAX_REGIMES.get,
+    help=
+    "FY 2025-26 slabs, applied to each earner's salary, half the rent and half of other income. Slabs are not indexed to inflation. Returns and rebalancing sales are not taxed while working, so enter returns after tax. Drawdown withdrawals pay LTCG on equity gains and slab tax on FD gains over what was invested; PF is tax free."
+)
+if tax_regime == "old":
+    old_regime_deductions = st.sidebar.number_input(
+        "Deductions per Person (80C, 80D, ...) (₹)",
+        min_value=0,
+        max_value=1000000,
+        value=150000,
+        step=10000)
+else:
+    old_regime_deductions = 150000
+
+# Monte Carlo simulation
+st.sidebar.subheader("🎲 Monte Carlo Simulation")
+monte_carlo_enabled = st.sidebar.checkbox(
+    "Simulate Stochastic Returns",
+    value=False,
+    help="Draw yearly asset returns at random instead of using the fixed rates")
+if monte_carlo_enabled:
+    mc_paths = st.sidebar.select_slider(
+        "Simulated Paths",
+        options=[10000, 50000, 100000, 500000, 1000000],
+        value=10000)
+    mc_distribution = st.sidebar.selectbox(
+        "Return Distribution", ["Log-normal", "Normal", "Historical"],
+        help=
+        "Log-normal and Normal use the expected returns above as their mean; Historical resamples actual Indian annual returns")
+    if mc_distribution == "Historical":
+        history = historical_returns()
+        mc_block_length = st.sidebar.slider(
+            "Bootstrap Block (years)",
+            min_value=1,
+            max_value=10,
+            value=5,
+            help=
+            "Consecutive historical years drawn together, keeping runs of good and bad years intact")
+        st.sidebar.caption(f"Resampling {history.index.min()}-"
+                           f"{history.index.max()} returns for equity, "
+                           "debt, FD and PF rates")
+        stocks_vol = mf_vol = fd_vol = pf_vol = 0.0
+    else:
+        mc_block_length = 5
+        col1, col2 = st.sidebar.columns(2)
+        with col1:
+            stocks_vol = st.slider("Stocks Volatility (%)",
+                                   min_value=0.0,
+                                   max_value=40.0,
+                                   value=18.0,
+                                   step=0.5) / 100
+            mf_vol = st.slider("Mutual Funds Volatility (%)",
+                               min_value=0.0,
+                               max_value=40.0,
+                               value=14.0,
+                               step=0.5) / 100
+        with col2:
+            fd_vol = st.slider("Fixed Deposits Volatility (%)",
+                               min_value=0.0,
+                               max_value=10.0,
+                               value=1.0,
+                               step=0.5) / 100
+            pf_vol = st.slider("PF Volatility (%)",
+                               min_value=0.0,
+                               max_value=10.0,
+                               value=0.5,
+                               step=0.5) / 100
+    mc_seed = st.sidebar.number_input("Random Seed",
+                                      min_value=0,
+                                      max_value=2**31 - 1,
+                                      value=42,
+                                      step=1)
+
+# Cash-flow resolution
+st.sidebar.subheader("⏱️ Cash-Flow Resolution")
+monthly_enabled = st.sidebar.radio(
+    "Model Resolution", ["Yearly", "Monthly"],
+    horizontal=True,
+    help="Monthly steps salary, EMIs and SIPs month by month and compounds returns monthly"
+) == "Monthly"
+if monthly_enabled:
+    month_names = dict(enumerate(calendar.month_abbr[1:], start=1))
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        house_construction_month = st.selectbox(
+            "House Construction Month",
+            list(month_names),
+            format_func=month_names.get)
+        house_loan_closure_month = st.selectbox(
+            "House Loan Closure Month",
+            list(month_names),
+            format_func=month_names.get,
+            help="First month without an EMI")
+        annual_expense_month = st.selectbox(
+            "Annual Expenses Paid In",
+            list(month_names),
+            format_func=month_names.get,
+            help="Month when vacation and kids education are paid")
+    with col2:
+        bike_purchase_month = st.selectbox("Bike Purchase Month",
+                                           list(month_names),
+                                           format_func=month_names.get)
+        car_loan_closure_month = st.selectbox(
+            "Car Loan Closure Month",
+            list(month_names),
+            format_func=month_names.get,
+            help="First month without an EMI")
+
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        sip_stocks_monthly = st.number_input("Stocks SIP (₹/month)",
+                                             min_value=0,
+                                             max_value=10000000,
+                                             value=0,
+                                             step=1000)
+    with col2:
+        sip_mf_monthly = st.number_input("Mutual Funds SIP (₹/month)",
+                                         min_value=0,
+                                         max_value=10000000,
+                                         value=0,
+                                         step=1000)
+    sip_step_up = st.sidebar.slider("Annual SIP Step-Up (%)",
+                                    min_value=0.0,
+                                    max_value=25.0,
+                                    value=0.0,
+                                    step=0.5) / 100
+
+# Diagnostics
+st.sidebar.subheader("🛠️ Diagnostics")
+st.sidebar.checkbox(
+    "Show Performance Panel",
+    key="perf_panel",
+    help="Time each phase of a rerun and export the timings as a trace")
+st.sidebar.checkbox(
+    "Track Memory",
+    key="perf_memory",
+    disabled=not profile.enabled,
+    help="Also record memory allocated per phase. Slows reruns down.")
+profile.end()
+
+
+# Current sidebar inputs
+def current_params():
+    return FIParams(start_year=start_year,
+                    end_year=end_year,
+                    target_corpus=target_corpus,
+                    age_me=age_me,
+                    age_wife=age_wife,
+                    salary_me_monthly=salary_me_monthly,
+                    salary_wife_monthly=salary_wife_monthly,
+                    rental_monthly_now=rental_monthly_now,
+                    rental_monthly_future=rental_monthly_future,
+                    income_growth=income_growth,
+                    stocks_val=stocks_val,
+                    mf_val=mf_val,
+                    fd_val=fd_val,
+                    pf_val=pf_val,
+                    stocks_return=stocks_return,
+                    mf_return=mf_return,
+                    fd_return=fd_return,
+                    pf_return=pf_return,
+                    household_monthly_now=household_monthly_now,
+                    household_monthly_future=household_monthly_future,
+                    personal_monthly=personal_monthly,
+                    fuel_monthly=fuel_monthly,
+                    inflation_exp=inflation_exp,
+                    inflation_fuel=inflation_fuel,
+                    house_loan_emi=house_loan_emi,
+                    house_loan_closure_year=house_loan_closure_year,
+                    car_loan_emi=car_loan_emi,
+                    car_loan_closure_year=car_loan_closure_year,
+                    vacation_annual=vacation_annual,
+                    vacation_inflation=vacation_inflation,
+                    kids_edu_annual=kids_edu_annual,
+                    kids_edu_start_year=kids_edu_start_year,
+                    kids_edu_end_year=kids_edu_end_year,
+                    kids_edu_inflation=kids_edu_inflation,
+                    house_construction_year=house_construction_year,
+                    house_cost=house_cost,
+                    bike_cost=bike_cost,
+                    bike_purchase_year=bike_purchase_year,
+                    tax_regime=tax_regime,
+                    old_regime_deductions=old_regime_deductions,
+                    allocation=allocation,
+                    equity_start=equity_start,
+                    equity_end=equity_end,
+                    glide_start_age=glide_start_age,
+                    glide_end_age=glide_end_age,
+                    stocks_share=stocks_share,
+                    rebalancing=rebalancing,
+                    rebalance_every=rebalance_every,
+                    rebalance_band=rebalance_band,
+                    events=planned_events,
+                    loans=loans)
+
+
+# Calculate projections, cached across reruns and sessions. With monthly
+# settings the monthly engine runs and is rolled up to years.
+@st.cache_data(max_entries=256, show_spinner=False)
+def calculate_projections(params, monthly_params=None):
+    if monthly_params is None:
+        return projection_frame(params)
+    return monthly_projection_frame(params, monthly_params)
+
+
+# Yearly projections for this session, from the projection cache shared by
+# every session when they're there. Otherwise the run starts from the
+# previous one and only recomputes from the first year the edit touches.
+def session_projection(params):
+    state = cached_update(st.session_state.get("projection_state"), params)
+    st.session_state["projection_state"] = state
+    return rounded_frame(state.columns)
+
+
+# Month-by-month detail table
+@st.cache_data(max_entries=32, show_spinner=False)
+def calculate_monthly_detail(params, monthly_params):
+    return monthly_frame(params, monthly_params)
+
+
+# Inputs that can be swept: label and display scale (rates show as %)
+SWEEP_PARAMS = {
+    "income_growth": ("Annual Income Growth Rate (%)", 100),
+    "stocks_return": ("Stocks Return (%)", 100),
+    "mf_return": ("Mutual Funds Return (%)", 100),
+    "fd_return": ("Fixed Deposits Return (%)", 100),
+    "pf_return": ("PF Return (%)", 100),
+    "inflation_exp": ("General Inflation (%)", 100),
+    "inflation_fuel": ("Fuel Inflation (%)", 100),
+    "salary_me_monthly": ("Your Monthly Salary (₹)", 1),
+    "salary_wife_monthly": ("Partner's Monthly Salary (₹)", 1),
+    "household_monthly_future": ("Future Household Expenses (₹/month)", 1),
+    "house_cost": ("House Construction Cost (₹)", 1),
+    "vacation_annual": ("Annual Vacation Budget (₹)", 1),
+    "kids_edu_annual": ("Annual Kids Education (₹)", 1),
+    "target_corpus": ("Target Corpus (₹)", 1),
+}
+
+# Every numeric sidebar input, for sensitivity analysis
+SENSITIVITY_LABELS = {
+    **SWEEP_PARAMS,
+    "age_me": ("Your Current Age", 1),
+    "age_wife": ("Partner's Current Age", 1),
+    "rental_monthly_now": ("Current Rental Income (₹/month)", 1),
+    "rental_monthly_future": ("Future Rental Income (₹/month)", 1),
+    "stocks_val": ("Stocks (₹)", 1),
+    "mf_val": ("Mutual Funds (₹)", 1),
+    "fd_val": ("Fixed Deposits (₹)", 1),
+    "pf_val": ("Combined Provident Fund (₹)", 1),
+    "household_monthly_now": ("Current Household Expenses (₹/month)", 1),
+    "personal_monthly": ("Personal Expenses (₹/month)", 1),
+    "fuel_monthly": ("Fuel Expenses (₹/month)", 1),
+    "house_loan_emi": ("House Loan EMI (₹/month)", 1),
+    "house_loan_closure_year": ("House Loan Closure Year", 1),
+    "car_loan_emi": ("Car Loan EMI (₹/month)", 1),
+    "car_loan_closure_year": ("Car Loan Closure Year", 1),
+    "vacation_inflation": ("Vacation Inflation (%)", 100),
+    "kids_edu_start_year": ("Kids Education Start Year", 1),
+    "kids_edu_end_year": ("Kids Education End Year", 1),
+    "kids_edu_inflation": ("Education Inflation (%)", 100),
+    "house_construction_year": ("House Construction Year", 1),
+    "bike_cost": ("Bike Purchase (₹)", 1),
+    "bike_purchase_year": ("Bike Purchase Year", 1),
+    "old_regime_deductions": ("Deductions per Person (₹)", 1),
+    "equity_start": ("Equity Now (%)", 100),
+    "equity_end": ("Equity Later (%)", 100),
+    "glide_start_age": ("Glide Path From Age", 1),
+    "glide_end_age": ("Glide Path To Age", 1),
+    "stocks_share": ("Stocks Share of Equity (%)", 100),
+    "rebalance_every": ("Review Every (years)", 1),
+    "rebalance_band": ("Rebalancing Band (%)", 100),
+}
+
+
+# Slow results are also kept on disk, so they survive restarts and are
+# shared by every process serving the app. Entries are keyed on the inputs
+# and the engine code, plus views.py for results built there.
+RESULT_CACHE_DIR = ".fi_cache"
+RESULT_CACHE_BYTES = 1 << 30
+VIEWS_VERSION = code_version(views.__file__)
+
+
+@st.cache_resource
+def result_cache():
+    return DiskCache(RESULT_CACHE_DIR, RESULT_CACHE_BYTES)
+
+
+def disk_cached(compute, *key_parts, version=None):
+    return result_cache().fetch(cache_key(*key_parts, version=version),
+                                compute)
+
+
+# Parameter sweep, cached on the parameter set and the swept values
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_sweep_grid(params, axes):
+    return disk_cached(lambda: sweep_grid(params, axes), "sweep_grid",
+                       params, axes)
+
+
+# Download payloads. They are only built when a download is requested and
+# are cached on the parameters, so repeat downloads are free.
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_excel_report(params, monthly_params=None):
+    return disk_cached(lambda: excel_report(
+        calculate_projections(params, monthly_params), params),
+                       "excel_report",
+                       params,
+                       monthly_params,
+                       version=VIEWS_VERSION)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_csv_report(params, monthly_params=None):
+    return disk_cached(lambda: csv_report(
+        calculate_projections(params, monthly_params)),
+                       "csv_report",
+                       params,
+                       monthly_params,
+                       version=VIEWS_VERSION)
+
+
+# Projections as Parquet or Arrow IPC, with the inputs that produced them
+# stored in the file so it can be loaded back without recomputing
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_columnar_report(params, monthly_params=None, fmt="parquet"):
+    return disk_cached(lambda: frame_bytes(
+        calculate_projections(params, monthly_params), fmt,
+        results_metadata("projections",
+                         params=params,
+                         monthly_params=monthly_params)),
+                       "columnar_report",
+                       params,
+                       monthly_params,
+                       fmt)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_monte_carlo_report(params, sim, fmt="parquet"):
+    return disk_cached(lambda: frame_bytes(
+        monte_carlo_summary(params, sim),
+        fmt,
+        results_metadata(
+            "monte_carlo_summary", params=params, sim_params=sim),
+        float32=True), "monte_carlo_report", params, sim, fmt)
+
+
+# Every simulated path, streamed a row group at a time. Not cached: at a
+# million paths the file alone is tens of megabytes.
+def monte_carlo_paths_report(params, sim, fmt="parquet"):
+    sink = BytesIO()
+    write_batches(
+        corpus_path_batches(simulate_corpus_paths(params, sim),
+                            projection_columns(params)["Year"]),
+        CORPUS_PATH_SCHEMA, sink, fmt,
+        results_metadata("monte_carlo_paths", params=params, sim_params=sim))
+    return sink.getvalue()
+
+
+# Rows sent to the browser at a time. Longer tables are paged so a rerun
+# only styles and serializes the visible page, not the whole frame.
+TABLE_PAGE_ROWS = 1000
+
+
+def paged_dataframe(df, key):
+    n_rows = len(df)
+    n_pages = -(-n_rows // TABLE_PAGE_ROWS)
+    if n_pages > 1:
+        page = st.number_input(f"Page (of {n_pages:,})",
+                               min_value=1,
+                               max_value=n_pages,
+                               key=key)
+        start = (page - 1) * TABLE_PAGE_ROWS
+        df = df.iloc[start:start + TABLE_PAGE_ROWS]
+        st.caption(f"Rows {start + 1:,}-{start + len(df):,} of {n_rows:,}")
+
+    # Currency columns stay numeric and are formatted by the browser
+    column_config = {
+        col: st.column_config.NumberColumn(format="₹%,d")
+        for col in CURRENCY_COLS if col in df
+    }
+    with profile.phase("Dataframe styling"):
+        if "FI Achieved?" in df:
+            df = style_projections(df)
+        st.dataframe(df,
+                     column_config=column_config,
+                     use_container_width=True)
+
+
+# Sensitivity of the plan to every numeric input
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_tornado(params, relative, rate_step, monthly_params=None):
+    return disk_cached(
+        lambda: tornado(params,
+                        monthly_params=monthly_params,
+                        relative=relative,
+                        rate_step=rate_step), "tornado", params, relative,
+        rate_step, monthly_params)
+
+
+# Saved scenarios live in a SQLite file next to the app, shared by every
+# session
+SCENARIO_DB = "scenarios.db"
+
+
+@st.cache_resource
+def scenario_store():
+    return ScenarioStore(SCENARIO_DB)
+
+
+# Sobol indices over the sampled input ranges
+@st.cache_data(max_entries=16, show_spinner="Sampling inputs...")
+def cached_sobol_indices(params, ranges, n_samples, monthly_params=None):
+    return disk_cached(
+        lambda: sobol_indices(params, ranges, n_samples, monthly_params),
+        "sobol_indices", params, ranges, n_samples, monthly_params)
+
+
+# Goal solver results for every solvable input
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_goal_solutions(params, fi_year, monthly_params=None):
+    return solve_all(params, fi_year, monthly_params=monthly_params)
+
+
+# Summaries of the simulated paths for each year. Only the summary is cached;
+# the raw paths can run to hundreds of megabytes.
+@st.cache_data(max_entries=32, show_spinner="Simulating returns...")
+def monte_carlo_summary(params, sim):
+
+    def summarize():
+        corpus = simulate_corpus_paths(params, sim)
+        return corpus_path_summary(corpus,
+                                   projection_columns(params)["Year"],
+                                   params.target_corpus)
 
-# Calculate projections
-def calculate_projections():
-    rows = []
-
-    # Initialize values for calculations
-    curr_stocks_val = stocks_val
-    curr_mf_val = mf_val
-    curr_fd_val = fd_val
-    curr_pf_val = pf_val
-
-    for year in range(start_year, end_year + 1):
-        # Age
-        curr_age_me = age_me + (year - start_year)
-        curr_age_wife = age_wife + (year - start_year)
-
-        # Income
-        salary_me = salary_me_monthly * 12 * (
-            (1 + income_growth)**(year - start_year))
-        salary_wife = salary_wife_monthly * 12 * (
-            (1 + income_growth)**(year - start_year))
-        rental_income = (rental_monthly_now if year < house_construction_year
-                         else rental_monthly_future) * 12
-        total_income = salary_me + salary_wife + rental_income
-
-        # Expenses
-        household_exp = (
-            (household_monthly_now
-             if year < house_construction_year else household_monthly_future) *
-            ((1 + inflation_exp)**(year - start_year)) * 12)
-        personal_exp = personal_monthly * (
-            (1 + inflation_exp)**(year - start_year)) * 12
-        fuel_exp = fuel_monthly * (
-            (1 + inflation_fuel)**(year - start_year)) * 12
-        house_loan = house_loan_emi * 12 if year < house_loan_closure_year else 0
-        car_loan = car_loan_emi * 12 if year < car_loan_closure_year else 0
-        vacation_exp = vacation_annual * (
-            (1 + vacation_inflation)**(year - start_year))
-        kids_edu = (kids_edu_annual *
-                    ((1 + kids_edu_inflation)**(year - start_year))
-                    if kids_edu_start_year <= year <= kids_edu_end_year else 0)
-
-        total_exp = household_exp + personal_exp + fuel_exp + house_loan + car_loan + vacation_exp + kids_edu
-
-        # Lump sums
-        lump_sum = 0
-        if year == house_construction_year:
-            lump_sum += house_cost
-        if year == bike_purchase_year:
-            lump_sum += bike_cost
-
-        # Grow investments first
-        curr_stocks_val *= (1 + stocks_return)
-        curr_mf_val *= (1 + mf_return)
-        curr_fd_val *= (1 + fd_return)
-        curr_pf_val *= (1 + pf_return)
-
-        # Annual surplus
-        surplus = total_income - total_exp - lump_sum
-
-        # Add surplus to FD
-        curr_fd_val += surplus
-
-        total_corpus = curr_stocks_val + curr_mf_val + curr_fd_val + curr_pf_val
-
-        rows.append({
-            "Year":
-            year,
-            "Age Me":
-            curr_age_me,
-            "Age Wife":
-            curr_age_wife,
-            "Total Income":
-            round(total_income, 0),
-            "Total Expenses":
-            round(total_exp + lump_sum, 0),
-            "Annual Surplus":
-            round(surplus, 0),
-            "Household Exp":
-            round(household_exp, 0),
-            "Personal Exp":
-            round(personal_exp, 0),
-            "Fuel Exp":
-            round(fuel_exp, 0),
-            "Vacation Exp":
-            round(vacation_exp, 0),
-            "Kids Education":
-            round(kids_edu, 0),
-            "House Loan EMI":
-            round(house_loan, 0),
-            "Car Loan EMI":
-            round(car_loan, 0),
-            "Lump Sum":
-            round(lump_sum, 0),
-            "Stocks Value":
-            round(curr_stocks_val, 0),
-            "MF Value":
-            round(curr_mf_val, 0),
-            "FD Value":
-            round(curr_fd_val, 0),
-            "PF Value":
-            round(curr_pf_val, 0),
-            "Total Corpus":
-            round(total_corpus, 0),
-            "FI Achieved?":
-            "Yes" if total_corpus >= target_corpus else "No"
-        })
-
-    return pd.DataFrame(rows)
+    # The seed is part of sim, so each seed's paths are cached separately
+    return disk_cached(summarize, "monte_carlo_summary", params, sim)
+
+
+WITHDRAWAL_STRATEGIES = {
+    "Fixed": "Fixed real amount",
+    "Percentage": "Percentage of portfolio",
+    "Guardrails": "Guardrails",
+}
+
+
+# Drawdown summary and depletion counts. As with the Monte Carlo summary,
+# the raw paths aren't cached.
+@st.cache_data(max_entries=32, show_spinner="Simulating drawdown...")
+def cached_drawdown(params, drawdown, sim=None):
+
+    def summarize():
+        years, result = simulate_drawdown(params, drawdown, sim)
+        return (drawdown_summary(result, years),
+                depletion_distribution(result, drawdown.years))
+
+    return disk_cached(summarize, "drawdown", params, drawdown, sim)
 
 
 # Calculate the projections
-df = calculate_projections()
+profile.begin("calculate_projections")
+params = current_params()
+if monthly_enabled:
+    monthly_params = MonthlyParams(
+        house_construction_month=house_construction_month,
+        bike_purchase_month=bike_purchase_month,
+        house_loan_closure_month=house_loan_closure_month,
+        car_loan_closure_month=car_loan_closure_month,
+        annual_expense_month=annual_expense_month,
+        sip_stocks_monthly=sip_stocks_monthly,
+        sip_mf_monthly=sip_mf_monthly,
+        sip_step_up=sip_step_up)
+else:
+    monthly_params = None
+if monthly_params is None:
+    df = session_projection(params)
+else:
+    df = calculate_projections(params, monthly_params)
+profile.end()
+
+if monte_carlo_enabled:
+    sim_params = SimulationParams(n_paths=mc_paths,
+                                  distribution=mc_distribution,
+                                  stocks_vol=stocks_vol,
+                                  mf_vol=mf_vol,
+                                  fd_vol=fd_vol,
+                                  pf_vol=pf_vol,
+                                  seed=mc_seed,
+                                  block_length=mc_block_length)
 
 # Main dashboard
+profile.begin("Dashboard metrics")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
@@ -470,8 +1151,20 @@ with col3:
 
 with col4:
     current_corpus = df.iloc[0]['Total Corpus'] - df.iloc[0]['Annual Surplus']
+    # Less what is still owed on amortized loans at the end of last year
+    if params.loans:
+        current_corpus -= loan_totals(params.loans, start_year - 1,
+                                      start_year - 1)[1][0]
     st.metric("Current Net Worth", f"₹{current_corpus:,.0f}")
 
+# Deficits the portfolio couldn't cover
+unfunded = df['Unfunded Deficit'].sum()
+if unfunded > 0:
+    first_unfunded = df.loc[df['Unfunded Deficit'] > 0, 'Year'].iloc[0]
+    st.warning(
+        f"⚠️ From {first_unfunded}, expenses exceed income and every asset has been sold: ₹{unfunded:,.0f} in total is left unfunded."
+    )
+
 # Financial Independence Achievement Section
 fi_years = df[df['FI Achieved?'] == 'Yes']
 if not fi_years.empty:
@@ -555,458 +1248,913 @@ with col4:
 progress_value = min(final_corpus / target_corpus, 1.0)
 st.progress(progress_value,
             text=f"Progress to Target: {progress_value*100:.1f}%")
-
-# Tabs for different views
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📊 Projections Table", "📈 Corpus Growth", "🥧 Asset Allocation",
-    "📅 Timeline", "📥 Export Data"
-])
-
-with tab1:
-    st.subheader("Year-by-Year Financial Projections")
-
-    # Format the dataframe for display
-    display_df = df.copy()
-
-    # Format currency columns
-    currency_cols = [
-        'Total Income', 'Total Expenses', 'Annual Surplus', 'Household Exp',
-        'Personal Exp', 'Fuel Exp', 'Vacation Exp', 'Kids Education',
-        'House Loan EMI', 'Car Loan EMI', 'Lump Sum', 'Stocks Value',
-        'MF Value', 'FD Value', 'PF Value', 'Total Corpus'
-    ]
-    for col in currency_cols:
-        display_df[col] = display_df[col].apply(lambda x: f"₹{x:,.0f}")
-
-    # Color code FI achievement
-    def highlight_fi(row):
-        if row['FI Achieved?'] == 'Yes':
-            return ['background-color: #d4edda'] * len(row)
+profile.end()
+
+# Tabs for different views. Tabs track which one is open and rerun on
+# change, so only the open tab's figures and tables are built.
+(tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11,
+ tab12) = st.tabs([
+     "📊 Projections Table", "📈 Corpus Growth", "🥧 Asset Allocation",
+     "📅 Timeline", "📥 Export Data", "🧮 Parameter Sweep", "🎯 Goal Solver",
+     "🏖️ Drawdown", "🏦 Loans", "🌪️ Sensitivity", "🎲 Global Sensitivity",
+     "💾 Scenarios"
+ ],
+    key="active_tab",
+    on_change="rerun")
+
+if tab1.open:
+    with tab1, profile.phase("Projections Table tab"):
+        st.subheader("Year-by-Year Financial Projections")
+        paged_dataframe(df, "projections_page")
+
+        if monthly_enabled:
+            with st.expander("Month-by-Month Detail"):
+                paged_dataframe(
+                    calculate_monthly_detail(params, monthly_params),
+                    "monthly_page")
+
+if tab2.open:
+    with tab2, profile.phase("Corpus Growth tab"):
+        st.subheader("Portfolio Growth Over Time")
+        # Monthly runs chart every month; long series are downsampled
+        growth_df = calculate_monthly_detail(
+            params, monthly_params) if monthly_enabled else df
+        st.plotly_chart(corpus_growth_figure(growth_df, target_corpus),
+                        use_container_width=True)
+
+        if monte_carlo_enabled:
+            st.subheader("🎲 Monte Carlo Projection")
+            mc_summary = monte_carlo_summary(params, sim_params)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Probability of FI by End Year",
+                          f"{mc_summary['P(FI by Year)'].iloc[-1] * 100:.1f}%")
+            with col2:
+                st.metric("Median Final Corpus",
+                          f"₹{mc_summary['Median'].iloc[-1]:,.0f}",
+                          delta=f"{mc_paths:,} paths, {mc_distribution}")
+
+            st.plotly_chart(fan_chart_figure(mc_summary, df, target_corpus),
+                            use_container_width=True)
+            st.plotly_chart(probability_figure(mc_summary),
+                            use_container_width=True)
+
+if tab3.open:
+    with tab3, profile.phase("Asset Allocation tab"):
+        st.subheader("Asset Allocation Analysis")
+
+        # Current vs Final allocation
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.write("**Current Allocation**")
+            st.plotly_chart(current_allocation_figure(df),
+                            use_container_width=True)
+
+        with col2:
+            st.write("**Final Allocation**")
+            st.plotly_chart(final_allocation_figure(df, end_year),
+                            use_container_width=True)
+
+        # Asset growth comparison
+        st.write("**Asset Growth Comparison**")
+        asset_growth_df = asset_growth_table(df, params)
+        st.plotly_chart(asset_growth_figure(asset_growth_df),
+                        use_container_width=True)
+
+        # Display growth table
+        st.dataframe(asset_growth_df.style.format({
+            'Initial Value': '₹{:,.0f}',
+            'Final Value': '₹{:,.0f}',
+            'Growth': '₹{:,.0f}',
+            'Growth %': '{:.1f}%'
+        }),
+                     use_container_width=True)
+
+if tab4.open:
+    with tab4, profile.phase("Timeline tab"):
+        st.subheader("📅 Financial Timeline & Milestones")
+
+        events = timeline_events(df, params)
+
+        if events:
+            timeline_df = pd.DataFrame(events)
+            st.plotly_chart(timeline_figure(timeline_df),
+                            use_container_width=True)
+
+            # Display timeline table
+            st.subheader("Timeline Details")
+            display_timeline = timeline_df.copy()
+            display_timeline['Amount'] = display_timeline['Amount'].apply(
+                lambda x: f"₹{x:,.0f}")
+            st.dataframe(display_timeline, use_container_width=True)
         else:
-            return [''] * len(row)
-
-    styled_df = display_df.style.apply(highlight_fi, axis=1)
-    st.dataframe(styled_df, use_container_width=True)
-
-with tab2:
-    st.subheader("Portfolio Growth Over Time")
-
-    # Create subplot with secondary y-axis
-    fig = make_subplots(rows=2,
-                        cols=1,
-                        subplot_titles=('Total Corpus Growth',
-                                        'Asset Breakdown Over Time'),
-                        vertical_spacing=0.1,
-                        specs=[[{
-                            "secondary_y": True
-                        }], [{
-                            "secondary_y": False
-                        }]])
-
-    # Total corpus line chart
-    fig.add_trace(go.Scatter(x=df['Year'],
-                             y=df['Total Corpus'],
-                             mode='lines+markers',
-                             name='Total Corpus',
-                             line=dict(width=3, color='#1f77b4'),
-                             marker=dict(size=8)),
-                  row=1,
-                  col=1)
-
-    # Target line
-    fig.add_hline(y=target_corpus,
-                  line_dash="dash",
-                  line_color="red",
-                  annotation_text=f"Target: ₹{target_corpus:,.0f}",
-                  row=1,
-                  col=1)
-
-    # Asset breakdown area chart
-    fig.add_trace(go.Scatter(x=df['Year'],
-                             y=df['Stocks Value'],
-                             fill='tonexty',
-                             mode='none',
-                             name='Stocks',
-                             fillcolor='rgba(255, 127, 14, 0.6)'),
-                  row=2,
-                  col=1)
-
-    fig.add_trace(go.Scatter(x=df['Year'],
-                             y=df['Stocks Value'] + df['MF Value'],
-                             fill='tonexty',
-                             mode='none',
-                             name='Mutual Funds',
-                             fillcolor='rgba(44, 160, 44, 0.6)'),
-                  row=2,
-                  col=1)
-
-    fig.add_trace(go.Scatter(x=df['Year'],
-                             y=df['Stocks Value'] + df['MF Value'] +
-                             df['FD Value'],
-                             fill='tonexty',
-                             mode='none',
-                             name='Fixed Deposits',
-                             fillcolor='rgba(214, 39, 40, 0.6)'),
-                  row=2,
-                  col=1)
-
-    fig.add_trace(go.Scatter(x=df['Year'],
-                             y=df['Total Corpus'],
-                             fill='tonexty',
-                             mode='none',
-                             name='Provident Fund',
-                             fillcolor='rgba(148, 103, 189, 0.6)'),
-                  row=2,
-                  col=1)
-
-    fig.update_layout(height=800,
-                      showlegend=True,
-                      title_text="Financial Portfolio Analysis")
-
-    fig.update_yaxes(title_text="Amount (₹)", row=1, col=1)
-    fig.update_yaxes(title_text="Amount (₹)", row=2, col=1)
-    fig.update_xaxes(title_text="Year", row=2, col=1)
-
-    st.plotly_chart(fig, use_container_width=True)
-
-with tab3:
-    st.subheader("Asset Allocation Analysis")
-
-    # Current vs Final allocation
-    col1, col2 = st.columns(2)
+            st.info(
+                "No major timeline events configured. Add house construction, bike purchase, or other expenses to see your financial timeline."
+            )
 
-    with col1:
-        st.write("**Current Allocation**")
-        current_data = df.iloc[0]
-        current_allocation = [
-            current_data['Stocks Value'] - current_data['Annual Surplus'],
-            current_data['MF Value'],
-            current_data['FD Value'] - current_data['Annual Surplus'],
-            current_data['PF Value']
-        ]
-
-        fig_current = px.pie(values=[max(0, x) for x in current_allocation],
-                             names=[
-                                 'Stocks', 'Mutual Funds', 'Fixed Deposits',
-                                 'Provident Fund'
-                             ],
-                             title="Current Asset Allocation")
-        st.plotly_chart(fig_current, use_container_width=True)
+        # Age progression chart
+        st.subheader("Age Progression Over Time")
+        st.plotly_chart(age_figure(df, params), use_container_width=True)
 
-    with col2:
-        st.write("**Final Allocation**")
-        final_data = df.iloc[-1]
-        final_allocation = [
-            final_data['Stocks Value'], final_data['MF Value'],
-            final_data['FD Value'], final_data['PF Value']
-        ]
-
-        fig_final = px.pie(values=final_allocation,
-                           names=[
-                               'Stocks', 'Mutual Funds', 'Fixed Deposits',
-                               'Provident Fund'
-                           ],
-                           title=f"Final Asset Allocation ({end_year})")
-        st.plotly_chart(fig_final, use_container_width=True)
-
-    # Asset growth comparison
-    st.write("**Asset Growth Comparison**")
-    asset_growth_df = pd.DataFrame({
-        'Asset Type':
-        ['Stocks', 'Mutual Funds', 'Fixed Deposits', 'Provident Fund'],
-        'Initial Value': [stocks_val, mf_val, fd_val, pf_val],
-        'Final Value': [
-            final_data['Stocks Value'], final_data['MF Value'],
-            final_data['FD Value'], final_data['PF Value']
-        ]
-    })
+if tab5.open:
+    with tab5, profile.phase("Export Data tab"):
+        st.subheader("Export Your Financial Plan")
 
-    asset_growth_df['Growth'] = asset_growth_df[
-        'Final Value'] - asset_growth_df['Initial Value']
-    asset_growth_df['Growth %'] = (asset_growth_df['Growth'] /
-                                   asset_growth_df['Initial Value'] *
-                                   100).round(1)
-
-    fig_growth = px.bar(asset_growth_df,
-                        x='Asset Type',
-                        y=['Initial Value', 'Final Value'],
-                        barmode='group',
-                        title="Asset Growth Comparison",
-                        labels={
-                            'value': 'Amount (₹)',
-                            'variable': 'Value Type'
-                        })
-    st.plotly_chart(fig_growth, use_container_width=True)
-
-    # Display growth table
-    st.dataframe(asset_growth_df.style.format({
-        'Initial Value': '₹{:,.0f}',
-        'Final Value': '₹{:,.0f}',
-        'Growth': '₹{:,.0f}',
-        'Growth %': '{:.1f}%'
-    }),
-                 use_container_width=True)
-
-with tab4:
-    st.subheader("📅 Financial Timeline & Milestones")
-
-    # Create timeline data
-    timeline_events = []
-
-    # Add major expense events
-    if house_cost > 0:
-        timeline_events.append({
-            'Year':
-            house_construction_year,
-            'Event':
-            'House Construction',
-            'Amount':
-            house_cost,
-            'Type':
-            'Major Expense',
-            'Your Age':
-            age_me + (house_construction_year - start_year),
-            'Partner Age':
-            age_wife + (house_construction_year - start_year)
-        })
-
-    if bike_cost > 0:
-        timeline_events.append({
-            'Year':
-            bike_purchase_year,
-            'Event':
-            'Bike Purchase',
-            'Amount':
-            bike_cost,
-            'Type':
-            'Major Expense',
-            'Your Age':
-            age_me + (bike_purchase_year - start_year),
-            'Partner Age':
-            age_wife + (bike_purchase_year - start_year)
-        })
-
-    # Add kids education start and end
-    if kids_edu_annual > 0:
-        timeline_events.append({
-            'Year':
-            kids_edu_start_year,
-            'Event':
-            'Kids Education Starts',
-            'Amount':
-            kids_edu_annual,
-            'Type':
-            'Annual Expense',
-            'Your Age':
-            age_me + (kids_edu_start_year - start_year),
-            'Partner Age':
-            age_wife + (kids_edu_start_year - start_year)
-        })
-
-        if kids_edu_end_year > kids_edu_start_year:
-            timeline_events.append({
-                'Year':
-                kids_edu_end_year + 1,
-                'Event':
-                'Kids Education Ends',
-                'Amount':
-                kids_edu_annual *
-                ((1 + kids_edu_inflation)**(kids_edu_end_year - start_year)),
-                'Type':
-                'Expense End',
-                'Your Age':
-                age_me + (kids_edu_end_year + 1 - start_year),
-                'Partner Age':
-                age_wife + (kids_edu_end_year + 1 - start_year)
+        st.write(
+            "Download your complete financial projections as an Excel file.")
+
+        st.download_button(
+            label="📥 Download Excel Report",
+            data=partial(profile.timed(cached_excel_report, "Excel build"),
+                         params, monthly_params),
+            file_name=f"financial_plan_{start_year}_{end_year}.xlsx",
+            mime=
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+        # Also provide CSV download
+        st.download_button(
+            label="📥 Download CSV Data",
+            data=partial(profile.timed(cached_csv_report, "CSV build"), params,
+                         monthly_params),
+            file_name=f"financial_projections_{start_year}_{end_year}.csv",
+            mime="text/csv")
+
+        st.write(
+            "Columnar formats keep the inputs with the data, so a saved file can be loaded back below without recomputing."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Download Parquet",
+                data=partial(cached_columnar_report, params, monthly_params,
+                             "parquet"),
+                file_name=
+                f"financial_projections_{start_year}_{end_year}.parquet",
+                mime="application/vnd.apache.parquet")
+        with col2:
+            st.download_button(
+                label="📥 Download Arrow IPC",
+                data=partial(cached_columnar_report, params, monthly_params,
+                             "arrow"),
+                file_name=f"financial_projections_{start_year}_{end_year}.arrow",
+                mime="application/vnd.apache.arrow.file")
+
+        if monte_carlo_enabled:
+            st.write("**Monte Carlo Results**")
+            mc_format = st.radio("Format", ["parquet", "arrow"],
+                                 horizontal=True,
+                                 format_func={
+                                     "parquet": "Parquet",
+                                     "arrow": "Arrow IPC"
+                                 }.get)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="📥 Download Percentile Summary",
+                    data=partial(cached_monte_carlo_report, params,
+                                 sim_params, mc_format),
+                    file_name=f"monte_carlo_summary.{mc_format}")
+            with col2:
+                st.download_button(
+                    label=f"📥 Download All {mc_paths:,} Paths",
+                    data=partial(monte_carlo_paths_report, params, sim_params,
+                                 mc_format),
+                    file_name=f"monte_carlo_paths.{mc_format}")
+
+        st.subheader("Load Saved Results")
+        uploaded = st.file_uploader("Parquet or Arrow file",
+                                    type=["parquet", "arrow"])
+        if uploaded is not None:
+            try:
+                saved, metadata = read_results(uploaded.getvalue())
+            except Exception as exc:
+                st.error(f"Couldn't read {uploaded.name}: {exc}")
+            else:
+                saved_params = params_from_metadata(metadata)
+                kind = metadata.get("kind")
+                st.caption(f"{len(saved):,} rows of {kind or 'results'}")
+                if kind == "projections":
+                    saved_target = saved_params["params"].target_corpus
+                    saved["FI Achieved?"] = saved["FI Achieved?"].astype(str)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("Final Corpus",
+                                  f"₹{saved['Total Corpus'].iloc[-1]:,.0f}")
+                    with col2:
+                        reached = saved[saved["FI Achieved?"] == "Yes"]
+                        st.metric(
+                            "FI Year",
+                            reached["Year"].iloc[0]
+                            if len(reached) else "Not Achieved")
+                    st.plotly_chart(corpus_growth_figure(saved, saved_target),
+                                    use_container_width=True)
+                elif kind == "monte_carlo_summary":
+                    st.plotly_chart(probability_figure(saved),
+                                    use_container_width=True)
+                elif kind == "monte_carlo_paths":
+                    # Percentile bands are computed here, not plotted per path
+                    n_years = saved["Year"].nunique()
+                    saved_summary = corpus_path_summary(
+                        saved["Total Corpus"].to_numpy().reshape(-1, n_years),
+                        saved["Year"].to_numpy()[:n_years],
+                        saved_params["params"].target_corpus)
+                    st.plotly_chart(fan_chart_figure(
+                        saved_summary, None,
+                        saved_params["params"].target_corpus),
+                                    use_container_width=True)
+                paged_dataframe(saved, "saved_page")
+
+if tab6.open:
+    with tab6, profile.phase("Parameter Sweep tab"):
+        st.subheader("Parameter Sweep")
+        st.write(
+            "Pick two or three inputs and a range for each to see the FI year and final corpus for every combination."
+        )
+
+        sweep_names = st.multiselect(
+            "Inputs to Sweep",
+            list(SWEEP_PARAMS),
+            default=["income_growth", "stocks_return"],
+            format_func=lambda name: SWEEP_PARAMS[name][0],
+            max_selections=3)
+
+        if len(sweep_names) < 2:
+            st.info("Select at least two inputs to sweep.")
+        else:
+            axes = {}
+            for name in sweep_names:
+                label, scale = SWEEP_PARAMS[name]
+                current = getattr(params, name) * scale
+                if scale == 100:
+                    low, high = max(0.0, current - 5), current + 5
+                else:
+                    low, high = current * 0.5, max(current * 1.5, 1.0)
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    low = st.number_input(f"{label} From",
+                                          value=float(low),
+                                          key=f"sweep_low_{name}")
+                with col2:
+                    high = st.number_input(f"{label} To",
+                                           value=float(high),
+                                           key=f"sweep_high_{name}")
+                with col3:
+                    steps = st.number_input("Steps",
+                                            min_value=2,
+                                            max_value=101,
+                                            value=21,
+                                            step=1,
+                                            key=f"sweep_steps_{name}")
+                axes[name] = np.linspace(low, high, steps) / scale
+
+            fi_year_grid, final_corpus_grid = cached_sweep_grid(params, axes)
+            st.caption(
+                f"{fi_year_grid.size:,} combinations evaluated. Blank cells never reach the target by {end_year}."
+            )
+
+            y_name, x_name = sweep_names[0], sweep_names[1]
+            if len(sweep_names) == 3:
+                z_name = sweep_names[2]
+                z_label, z_scale = SWEEP_PARAMS[z_name]
+                z_index = st.select_slider(
+                    z_label,
+                    options=list(range(len(axes[z_name]))),
+                    value=len(axes[z_name]) // 2,
+                    format_func=lambda i: f"{axes[z_name][i] * z_scale:,.2f}")
+                fi_year_grid = fi_year_grid[:, :, z_index]
+                final_corpus_grid = final_corpus_grid[:, :, z_index]
+
+            chart_type = st.radio("Chart Type", ["Heatmap", "Contour"],
+                                  horizontal=True)
+            trace = go.Heatmap if chart_type == "Heatmap" else go.Contour
+            x_label, x_scale = SWEEP_PARAMS[x_name]
+            y_label, y_scale = SWEEP_PARAMS[y_name]
+
+            col1, col2 = st.columns(2)
+            for column, grid, title, colorscale in [
+                (col1, fi_year_grid, "FI Year", "Viridis"),
+                (col2, final_corpus_grid, "Final Corpus (₹)", "Blues")
+            ]:
+                fig_sweep = go.Figure(
+                    trace(x=axes[x_name] * x_scale,
+                          y=axes[y_name] * y_scale,
+                          z=grid,
+                          colorscale=colorscale,
+                          colorbar=dict(title=title)))
+                fig_sweep.update_layout(title=title,
+                                        xaxis_title=x_label,
+                                        yaxis_title=y_label,
+                                        height=500)
+                with column:
+                    st.plotly_chart(fig_sweep, use_container_width=True)
+
+if tab7.open:
+    with tab7, profile.phase("Goal Solver tab"):
+        st.subheader("Goal Solver")
+        st.write(
+            "Find the value of each input, holding all the others fixed, that reaches your target corpus by a chosen year."
+        )
+
+        goal_year = st.slider("Reach FI By",
+                              min_value=start_year,
+                              max_value=end_year,
+                              value=end_year,
+                              step=1)
+        solutions = cached_goal_solutions(params, goal_year, monthly_params)
+
+        def format_param(name, value):
+            if SWEEP_PARAMS[name][1] == 100:
+                return f"{value * 100:.2f}%"
+            return f"₹{value:,.0f}"
+
+        goal_met = ((df['Year'] <= goal_year) &
+                    (df['FI Achieved?'] == 'Yes')).any()
+        if goal_met:
+            st.success(f"Your current plan reaches the target by {goal_year}. "
+                       "The table shows how far each input can move.")
+        else:
+            st.warning(f"Your current plan misses the target in {goal_year}. "
+                       "The table shows what each input would need to be.")
+
+        solver_rows = []
+        for solution in solutions:
+            current = getattr(params, solution.name)
+            if solution.status == "solved":
+                required = format_param(solution.name, solution.value)
+                rises = solution.value > current
+                if goal_met:
+                    note = ("Can rise up to this"
+                            if rises else "Can fall down to this")
+                else:
+                    note = ("Raise to at least this"
+                            if rises else "Lower to at most this")
+            elif solution.status == "always":
+                required = "—"
+                note = "Goal met across the whole search range"
+            else:
+                required = "—"
+                note = "Goal not reachable by changing this alone"
+            solver_rows.append({
+                "Input": SWEEP_PARAMS[solution.name][0],
+                "Current": format_param(solution.name, current),
+                "Required": required,
+                "Note": note
             })
 
-    # Add loan completion events
-    if house_loan_emi > 0:
-        timeline_events.append({
-            'Year':
-            house_loan_closure_year,
-            'Event':
-            'House Loan Completes',
-            'Amount':
-            house_loan_emi * 12,
-            'Type':
-            'Loan End',
-            'Your Age':
-            age_me + (house_loan_closure_year - start_year),
-            'Partner Age':
-            age_wife + (house_loan_closure_year - start_year)
-        })
-
-    if car_loan_emi > 0:
-        timeline_events.append({
-            'Year':
-            car_loan_closure_year,
-            'Event':
-            'Car Loan Completes',
-            'Amount':
-            car_loan_emi * 12,
-            'Type':
-            'Loan End',
-            'Your Age':
-            age_me + (car_loan_closure_year - start_year),
-            'Partner Age':
-            age_wife + (car_loan_closure_year - start_year)
-        })
-
-    # Add FI achievement
-    fi_years = df[df['FI Achieved?'] == 'Yes']
-    if not fi_years.empty:
-        fi_year = fi_years.iloc[0]['Year']
-        fi_corpus = fi_years.iloc[0]['Total Corpus']
-        timeline_events.append({
-            'Year': fi_year,
-            'Event': '🎉 Financial Independence Achieved!',
-            'Amount': fi_corpus,
-            'Type': 'Milestone',
-            'Your Age': age_me + (fi_year - start_year),
-            'Partner Age': age_wife + (fi_year - start_year)
-        })
-
-    # Sort by year
-    timeline_events = sorted(timeline_events, key=lambda x: x['Year'])
-
-    if timeline_events:
-        timeline_df = pd.DataFrame(timeline_events)
-
-        # Create timeline visualization
-        fig_timeline = go.Figure()
-
-        # Color mapping for different event types
-        color_map = {
-            'Major Expense': '#ff6b6b',
-            'Annual Expense': '#ffa500',
-            'Loan End': '#4ecdc4',
-            'Expense End': '#2ecc71',
-            'Milestone': '#45b7d1'
-        }
-
-        for event_type in timeline_df['Type'].unique():
-            type_data = timeline_df[timeline_df['Type'] == event_type]
-            fig_timeline.add_trace(
-                go.Scatter(
-                    x=type_data['Year'],
-                    y=[event_type] * len(type_data),
-                    mode='markers+text',
-                    marker=dict(size=15,
-                                color=color_map.get(event_type, '#95a5a6')),
-                    text=type_data['Event'],
-                    textposition='top center',
-                    name=event_type,
-                    hovertemplate='<b>%{text}</b><br>' + 'Year: %{x}<br>' +
-                    'Amount: ₹%{customdata[0]:,.0f}<br>' +
-                    'Your Age: %{customdata[1]}<br>' +
-                    'Partner Age: %{customdata[2]}' + '<extra></extra>',
-                    customdata=list(
-                        zip(type_data['Amount'], type_data['Your Age'],
-                            type_data['Partner Age']))))
-
-        fig_timeline.update_layout(title="Financial Timeline & Key Milestones",
-                                   xaxis_title="Year",
-                                   yaxis_title="Event Type",
-                                   height=500,
-                                   showlegend=True)
-
-        st.plotly_chart(fig_timeline, use_container_width=True)
-
-        # Display timeline table
-        st.subheader("Timeline Details")
-        display_timeline = timeline_df.copy()
-        display_timeline['Amount'] = display_timeline['Amount'].apply(
-            lambda x: f"₹{x:,.0f}")
-        st.dataframe(display_timeline, use_container_width=True)
-    else:
-        st.info(
-            "No major timeline events configured. Add house construction, bike purchase, or other expenses to see your financial timeline."
+        st.dataframe(pd.DataFrame(solver_rows),
+                     use_container_width=True,
+                     hide_index=True)
+
+if tab8.open:
+    with tab8, profile.phase("Drawdown tab"):
+        st.subheader("Drawdown After Financial Independence")
+        st.write(
+            "Stop working in a chosen year and live off withdrawals to see whether the corpus lasts."
         )
 
-    # Age progression chart
-    st.subheader("Age Progression Over Time")
-    age_df = df[['Year', 'Age Me', 'Age Wife']].copy()
-
-    fig_age = px.line(age_df.melt(id_vars=['Year'],
-                                  value_vars=['Age Me', 'Age Wife'],
-                                  var_name='Person',
-                                  value_name='Age'),
-                      x='Year',
-                      y='Age',
-                      color='Person',
-                      title="Age Progression Timeline",
-                      labels={
-                          'Age': 'Age (Years)',
-                          'Person': 'Family Member'
-                      })
-    fig_age.update_traces(mode='lines+markers')
-
-    # Mark FI achievement on age chart
-    if not fi_years.empty:
-        fi_year = fi_years.iloc[0]['Year']
-        fi_age_me = age_me + (fi_year - start_year)
-        fi_age_wife = age_wife + (fi_year - start_year)
-
-        fig_age.add_vline(
-            x=fi_year,
-            line_dash="dash",
-            line_color="green",
-            annotation_text=
-            f"FI Achieved<br>You: {fi_age_me}y, Partner: {fi_age_wife}y")
-
-    st.plotly_chart(fig_age, use_container_width=True)
-
-with tab5:
-    st.subheader("Export Your Financial Plan")
-
-    st.write("Download your complete financial projections as an Excel file.")
-
-    # Create Excel file in memory
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Financial Projections', index=False)
-
-        # Add summary sheet
-        summary_data = {
-            'Parameter': [
-                'Target Corpus', 'Final Corpus', 'Years to FI',
-                'Current Age (You)', 'Current Age (Partner)',
-                'Monthly Salary (You)', 'Monthly Salary (Partner)',
-                'Current Rental Income', 'Annual Income Growth',
-                'Stocks Return', 'MF Return', 'FD Return', 'PF Return'
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            strategy = st.selectbox(
+                "Withdrawal Strategy",
+                list(STRATEGIES),
+                format_func=WITHDRAWAL_STRATEGIES.get,
+                help=
+                "Fixed raises the first year's withdrawal with inflation; Percentage takes the same share of the portfolio every year; Guardrails adjusts a fixed withdrawal when the portfolio drifts too far")
+        with col2:
+            withdrawal_rate = st.slider(
+                "Initial Withdrawal Rate (%)",
+                min_value=1.0,
+                max_value=10.0,
+                value=4.0,
+                step=0.25,
+                help="Share of the corpus at retirement withdrawn in the first year") / 100
+        with col3:
+            drawdown_years = st.slider("Drawdown Years",
+                                       min_value=10,
+                                       max_value=60,
+                                       value=50,
+                                       step=1)
+
+        default_retirement = int(
+            fi_years.iloc[0]['Year']) if not fi_years.empty else end_year
+        retirement = st.slider("Last Working Year",
+                               min_value=start_year,
+                               max_value=end_year,
+                               value=default_retirement,
+                               step=1,
+                               help="Defaults to your FI year")
+        if strategy == "Guardrails":
+            col1, col2 = st.columns(2)
+            with col1:
+                guardrail_band = st.slider(
+                    "Guardrail Band (%)",
+                    min_value=5.0,
+                    max_value=50.0,
+                    value=20.0,
+                    step=5.0,
+                    help="How far the current withdrawal rate may drift from the initial rate") / 100
+            with col2:
+                guardrail_adjustment = st.slider(
+                    "Spending Adjustment (%)",
+                    min_value=5.0,
+                    max_value=25.0,
+                    value=10.0,
+                    step=1.0,
+                    help="Cut or raise in spending when a guardrail is crossed") / 100
+        else:
+            guardrail_band, guardrail_adjustment = 0.20, 0.10
+
+        drawdown_params = DrawdownParams(
+            strategy=strategy,
+            years=drawdown_years,
+            withdrawal_rate=withdrawal_rate,
+            retirement_year=retirement,
+            guardrail_band=guardrail_band,
+            guardrail_adjustment=guardrail_adjustment)
+        # Drawdown starts from the yearly projection, also in monthly mode
+        if monthly_enabled:
+            st.caption("Drawdown starts from the yearly projection.")
+        yearly_df = calculate_projections(params)
+        expected, _ = cached_drawdown(params, drawdown_params)
+        years_funded = int(expected['P(Solvent)'].sum())
+        start_corpus = yearly_df.loc[yearly_df['Year'] == retirement,
+                                     'Total Corpus'].iloc[0]
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Corpus at Retirement", f"₹{start_corpus:,.0f}")
+        with col2:
+            st.metric("First-Year Withdrawal",
+                      f"₹{expected['Median Withdrawal'].iloc[0]:,.0f}")
+        with col3:
+            if years_funded == drawdown_years:
+                st.metric("With Expected Returns",
+                          f"Lasts {drawdown_years} years")
+            else:
+                st.metric("With Expected Returns",
+                          f"Runs out in {retirement + years_funded + 1}",
+                          delta=f"after {years_funded} years",
+                          delta_color="inverse")
+
+        if monte_carlo_enabled:
+            dd_summary, depletion = cached_drawdown(params, drawdown_params,
+                                                    sim_params)
+            depleted = depletion['Paths'].sum()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Probability of Success",
+                          f"{dd_summary['P(Solvent)'].iloc[-1] * 100:.1f}%",
+                          delta=f"{mc_paths:,} paths, {mc_distribution}",
+                          delta_color="off")
+            with col2:
+                if depleted:
+                    median_funded = np.repeat(depletion['Years Funded'],
+                                              depletion['Paths']).median()
+                    st.metric("Median Years Funded When Depleted",
+                              f"{median_funded:.0f} years")
+                else:
+                    st.metric("Median Years Funded When Depleted",
+                              "No path runs out")
+
+            st.plotly_chart(fan_chart_figure(
+                dd_summary,
+                None,
+                None,
+                title="Simulated Balance During Drawdown"),
+                            use_container_width=True)
+            st.plotly_chart(solvency_figure(dd_summary),
+                            use_container_width=True)
+            if depleted:
+                st.plotly_chart(depletion_figure(depletion),
+                                use_container_width=True)
+        else:
+            st.plotly_chart(fan_chart_figure(
+                expected, None, None, title="Balance During Drawdown"),
+                            use_container_width=True)
+            st.info(
+                "Turn on Monte Carlo in the sidebar to see the probability of success across simulated market paths."
+            )
+
+if tab9.open:
+    with tab9, profile.phase("Loans tab"):
+        st.subheader("Loan Amortization")
+        if not params.loans:
+            st.info(
+                "Switch the House Loan Model to Amortized in the sidebar to see its schedule and compare prepaying with investing."
+            )
+        else:
+            loan = params.loans[0]
+            schedule = full_schedule(loan)
+            yearly_loan = yearly_schedule(schedule)
+            without_prepayment = full_schedule(
+                replace(loan, annual_prepayment=0, prepayments=()))
+            final_payment = loan.start_year * 12 + loan.start_month - 2 + len(
+                schedule['Balance'])
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("First EMI", f"₹{schedule['EMI'][0]:,.0f}")
+            with col2:
+                st.metric("Total Interest",
+                          f"₹{schedule['Interest'].sum():,.0f}",
+                          delta=f"₹{without_prepayment['Interest'].sum() - schedule['Interest'].sum():,.0f} saved by prepaying"
+                          if loan.annual_prepayment else None)
+            with col3:
+                st.metric(
+                    "Final Payment",
+                    f"{calendar.month_abbr[final_payment % 12 + 1]} {final_payment // 12}"
+                    if schedule['Balance'][-1] <= 0 else "Not repaid")
+
+            st.plotly_chart(loan_schedule_figure(yearly_loan),
+                            use_container_width=True)
+            with st.expander("Yearly Schedule"):
+                st.dataframe(yearly_loan.style.format(
+                    {
+                        'Rate': '{:.2%}',
+                        **{
+                            name: CURRENCY_FORMAT
+                            for name in yearly_loan.columns
+                            if name not in ('Year', 'Rate')
+                        }
+                    }),
+                             use_container_width=True,
+                             hide_index=True)
+
+            st.subheader("Prepay or Invest?")
+            st.write(
+                "Compare paying extra towards the loan every year with investing the same amount. Both spend the same each month until the loan would otherwise close."
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                max_prepayment = st.number_input(
+                    "Largest Extra Payment (₹/year)",
+                    min_value=10000,
+                    max_value=100000000,
+                    value=500000,
+                    step=10000)
+            with col2:
+                invest_return = st.slider(
+                    "Investment Return (%)",
+                    min_value=0.0,
+                    max_value=20.0,
+                    value=round(mf_return * 100, 1),
+                    step=0.5,
+                    help="Defaults to the mutual fund return") / 100
+            comparison = prepay_vs_invest(
+                loan, np.linspace(0, max_prepayment, 21), invest_return)
+            st.plotly_chart(prepay_invest_figure(comparison),
+                            use_container_width=True)
+            st.dataframe(comparison.style.format({
+                name: CURRENCY_FORMAT
+                for name in comparison.columns if name != 'Months Saved'
+            }),
+                         use_container_width=True,
+                         hide_index=True)
+            st.caption(
+                "Tax deductions on home loan interest and tax on investment gains aren't included."
+            )
+
+if tab10.open:
+    with tab10, profile.phase("Sensitivity tab"):
+        st.subheader("Sensitivity")
+        st.write(
+            "Nudge every input down and up, one at a time, to see which ones move your plan the most."
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            relative = st.slider(
+                "Amounts Nudged By (%)",
+                min_value=1,
+                max_value=50,
+                value=10,
+                step=1,
+                help="Incomes, expenses, costs and balances move by this share of their value") / 100
+        with col2:
+            rate_step = st.slider(
+                "Rates Nudged By (points)",
+                min_value=0.25,
+                max_value=5.0,
+                value=1.0,
+                step=0.25,
+                help="Returns, growth, inflation and allocation shares move by this many percentage points. Years and ages move by one.") / 100
+        with col3:
+            rank_by = st.radio("Rank By", ["Final Corpus", "FI Year"],
+                               horizontal=True,
+                               key="sensitivity_rank")
+
+        sensitivity = cached_tornado(params, relative, rate_step,
+                                     monthly_params)
+        swing = 'Corpus Swing' if rank_by == 'Final Corpus' else 'FI Year Swing'
+        sensitivity = sensitivity.sort_values(
+            [swing, 'Corpus Swing'], ascending=False, kind='stable')
+        moved = sensitivity[(sensitivity['Corpus Swing'] > 0.5) |
+                            (sensitivity['FI Year Swing'] > 0)]
+        unmoved = sensitivity[~sensitivity.index.isin(moved.index)]
+        st.caption(
+            f"{2 * len(sensitivity)} nudged plans evaluated in one batch.")
+
+        shown = st.slider("Inputs Shown",
+                          min_value=1,
+                          max_value=max(len(moved), 1),
+                          value=min(len(moved), 15)) if len(moved) > 1 else 1
+        top = moved.head(shown)
+
+        def format_input(name, value):
+            if SENSITIVITY_LABELS[name][1] == 100:
+                return f"{value * 100:.2f}%"
+            if name in YEAR_PARAMS:
+                return f"{value:.0f}"
+            return f"₹{value:,.0f}"
+
+        base_fi_year = fi_years.iloc[0]['Year'] if not fi_years.empty else np.nan
+        if not top.empty:
+            st.plotly_chart(tornado_figure(
+                top, [SENSITIVITY_LABELS[name][0] for name in top['Input']],
+                rank_by,
+                final_corpus if rank_by == 'Final Corpus' else base_fi_year,
+                end_year),
+                            use_container_width=True)
+
+        def format_fi_year(year):
+            return "Not reached" if np.isnan(year) else f"{year:.0f}"
+
+        st.dataframe(pd.DataFrame({
+            "Input": [SENSITIVITY_LABELS[name][0] for name in moved['Input']],
+            "Current": [
+                format_input(name, getattr(params, name))
+                for name in moved['Input']
             ],
-            'Value': [
-                f"₹{target_corpus:,.0f}", f"₹{final_corpus:,.0f}",
-                f"{fi_years.iloc[0]['Year'] - start_year} years"
-                if not fi_years.empty else "Not achieved", age_me, age_wife,
-                f"₹{salary_me_monthly:,.0f}", f"₹{salary_wife_monthly:,.0f}",
-                f"₹{rental_monthly_now:,.0f}", f"{income_growth*100:.1f}%",
-                f"{stocks_return*100:.1f}%", f"{mf_return*100:.1f}%",
-                f"{fd_return*100:.1f}%", f"{pf_return*100:.1f}%"
-            ]
-        }
-        summary_df = pd.DataFrame(summary_data)
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-
-    output.seek(0)
-
-    st.download_button(
-        label="📥 Download Excel Report",
-        data=output.getvalue(),
-        file_name=f"financial_plan_{start_year}_{end_year}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+            "Low": [
+                format_input(name, value)
+                for name, value in zip(moved['Input'], moved['Low'])
+            ],
+            "High": [
+                format_input(name, value)
+                for name, value in zip(moved['Input'], moved['High'])
+            ],
+            "Final Corpus (Low)": moved['Final Corpus (Low)'].map(
+                CURRENCY_FORMAT.format),
+            "Final Corpus (High)": moved['Final Corpus (High)'].map(
+                CURRENCY_FORMAT.format),
+            "FI Year (Low)": moved['FI Year (Low)'].map(format_fi_year),
+            "FI Year (High)": moved['FI Year (High)'].map(format_fi_year),
+        }),
+                     use_container_width=True,
+                     hide_index=True)
+        if not unmoved.empty:
+            st.caption("No effect on this plan: " + ", ".join(
+                SENSITIVITY_LABELS[name][0] for name in unmoved['Input']))
+
+if tab11.open:
+    with tab11, profile.phase("Global Sensitivity tab"):
+        st.subheader("Global Sensitivity")
+        st.write(
+            "Vary several inputs together over the ranges you set to see how much of the spread in outcomes each one explains, on its own and through its interactions with the others."
+        )
 
-    # Also provide CSV download
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download CSV Data",
-        data=csv,
-        file_name=f"financial_projections_{start_year}_{end_year}.csv",
-        mime="text/csv")
+        sobol_names = st.multiselect(
+            "Inputs to Vary",
+            list(SENSITIVITY_LABELS),
+            default=[
+                "income_growth", "inflation_exp", "stocks_return",
+                "salary_me_monthly"
+            ],
+            format_func=lambda name: SENSITIVITY_LABELS[name][0],
+            max_selections=10,
+            key="sobol_names")
+
+        if len(sobol_names) < 2:
+            st.info("Select at least two inputs to vary.")
+        else:
+            defaults = nudged_values(params,
+                                     sobol_names,
+                                     relative=0.2,
+                                     rate_step=0.02)
+            ranges = {}
+            for name in sobol_names:
+                label, scale = SENSITIVITY_LABELS[name]
+                low, high = defaults[name]
+                col1, col2 = st.columns(2)
+                with col1:
+                    low = st.number_input(f"{label} From",
+                                          value=float(low * scale),
+                                          key=f"sobol_low_{name}")
+                with col2:
+                    high = st.number_input(f"{label} To",
+                                           value=float(high * scale),
+                                           key=f"sobol_high_{name}")
+                ranges[name] = (low / scale, high / scale)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                n_samples = st.select_slider(
+                    "Base Samples",
+                    options=[2**k for k in range(10, 17)],
+                    value=8192,
+                    key="sobol_samples",
+                    help="Each base sample runs the plan once per input plus twice")
+            with col2:
+                sobol_output = st.radio("Output", ["Final Corpus", "FI Year"],
+                                        horizontal=True,
+                                        key="sobol_output")
+
+            if any(low > high for low, high in ranges.values()):
+                st.error("Each range must run from low to high.")
+            else:
+                indices, convergence = cached_sobol_indices(
+                    params, ranges, n_samples, monthly_params)
+                st.caption(
+                    f"{n_samples * (len(sobol_names) + 2):,} plans evaluated from a scrambled Halton sample. FI years not reached by {end_year} count as {end_year + 1}."
+                )
+                indices = indices[indices['Output'] == sobol_output]
+                convergence = convergence[convergence['Output'] ==
+                                          sobol_output]
+                labels = [
+                    SENSITIVITY_LABELS[name][0] for name in indices['Input']
+                ]
+                if indices['Total Effect'].isna().all():
+                    st.info(
+                        f"{sobol_output} doesn't change over these ranges.")
+                else:
+                    st.plotly_chart(sobol_figure(indices, labels,
+                                                 sobol_output),
+                                    use_container_width=True)
+                    st.plotly_chart(sobol_convergence_figure(
+                        convergence, labels),
+                                    use_container_width=True)
+                    interactions = (indices['Total Effect'] -
+                                    indices['First Order']).clip(lower=0)
+                    st.dataframe(pd.DataFrame({
+                        "Input": labels,
+                        "First Order": indices['First Order'].to_numpy(),
+                        "Total Effect": indices['Total Effect'].to_numpy(),
+                        "Through Interactions": interactions.to_numpy(),
+                    }).style.format('{:.3f}',
+                                    subset=[
+                                        'First Order', 'Total Effect',
+                                        'Through Interactions'
+                                    ]),
+                                 use_container_width=True,
+                                 hide_index=True)
+                    st.caption(
+                        "First order is the share of variance an input explains alone; total effect adds everything it does together with other inputs. Small negative values are sampling noise."
+                    )
+
+if tab12.open:
+    with tab12, profile.phase("Scenarios tab"):
+        st.subheader("Scenarios")
+        st.write(
+            "Save the current plan under a name, look back at saved plans and compare several of them side by side."
+        )
+        store = scenario_store()
+
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            scenario_user = st.text_input(
+                "User or Client",
+                value="default",
+                key="scenario_user",
+                help="Scenarios are kept separately for each user or client")
+        with col2:
+            scenario_name = st.text_input("Scenario Name",
+                                          key="scenario_name")
+        with col3:
+            st.write("")
+            save_scenario = st.button("💾 Save Current Plan",
+                                      key="save_scenario")
+        if save_scenario:
+            if not scenario_name.strip():
+                st.error("Give the scenario a name first.")
+            else:
+                same_inputs = [
+                    name
+                    for name in store.find(scenario_user, params,
+                                           monthly_params)
+                    if name != scenario_name
+                ]
+                store.save(scenario_user, scenario_name, params,
+                           monthly_params, df)
+                st.success(f"Saved {scenario_name}.")
+                if same_inputs:
+                    st.info(
+                        f"{', '.join(same_inputs)} already had these inputs.")
+
+        saved = store.list(scenario_user)
+        if saved.empty:
+            st.info("No saved scenarios yet.")
+        else:
+            st.dataframe(pd.DataFrame({
+                "Scenario":
+                saved['name'],
+                "FI Year":
+                saved['fi_year'].map(lambda year: "Not Achieved"
+                                     if pd.isna(year) else f"{year:.0f}"),
+                "Final Corpus":
+                saved['final_corpus'].map(CURRENCY_FORMAT.format),
+                "Saved":
+                saved['updated'].map(lambda stamp: datetime.fromtimestamp(
+                    stamp).strftime("%Y-%m-%d %H:%M")),
+                "Inputs":
+                saved['params_hash'].str[:10],
+            }),
+                         use_container_width=True,
+                         hide_index=True)
+            current_matches = store.find(scenario_user, params,
+                                         monthly_params)
+            if current_matches:
+                st.caption("The current plan matches " +
+                           ", ".join(current_matches) + ".")
+
+            st.subheader("Saved Plan")
+            viewed = st.selectbox("Scenario",
+                                  saved['name'],
+                                  key="scenario_view")
+            viewed_params, viewed_monthly, viewed_df = store.load(
+                scenario_user, viewed)
+            reached = viewed_df[viewed_df['FI Achieved?'] == 'Yes']
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Final Corpus",
+                          f"₹{viewed_df['Total Corpus'].iloc[-1]:,.0f}")
+            with col2:
+                st.metric(
+                    "FI Year",
+                    reached['Year'].iloc[0] if len(reached) else "Not Achieved")
+            st.plotly_chart(corpus_growth_figure(viewed_df,
+                                                 viewed_params.target_corpus),
+                            use_container_width=True)
+            with st.expander("Inputs That Differ From the Current Plan"):
+                differences = [{
+                    "Input": name,
+                    "Saved": str(getattr(viewed_params, name)),
+                    "Current": str(getattr(params, name))
+                } for name in SENSITIVITY_LABELS.keys() | {
+                    "start_year", "end_year", "tax_regime", "allocation",
+                    "rebalancing", "events", "loans"
+                } if getattr(viewed_params, name) != getattr(params, name)]
+                if viewed_monthly != monthly_params:
+                    differences.append({
+                        "Input": "monthly_params",
+                        "Saved": str(viewed_monthly),
+                        "Current": str(monthly_params)
+                    })
+                if differences:
+                    st.dataframe(pd.DataFrame(differences).sort_values(
+                        "Input"),
+                                 use_container_width=True,
+                                 hide_index=True)
+                else:
+                    st.write("Same inputs as the current plan.")
+            if st.button(f"🗑️ Delete {viewed}", key="delete_scenario"):
+                store.delete(scenario_user, viewed)
+                st.rerun()
+
+            st.subheader("Compare Scenarios")
+            compared = st.multiselect("Scenarios to Compare",
+                                      list(saved['name']),
+                                      default=list(saved['name'][:3]),
+                                      key="scenario_compare")
+            include_current = st.checkbox("Include the current plan",
+                                          value=True,
+                                          key="scenario_include_current")
+            plans = {}
+            if include_current:
+                plans["Current plan"] = (params, monthly_params)
+            for name in compared:
+                plans[name] = store.load(scenario_user, name)[:2]
+            if len(plans) < 2:
+                st.info("Pick at least two plans to compare.")
+            else:
+                comparison = compare_scenarios(plans)
+                st.plotly_chart(scenario_comparison_figure(
+                    comparison,
+                    {name: plan.target_corpus
+                     for name, (plan, _) in plans.items()}),
+                                use_container_width=True)
+                rows = []
+                for name, group in comparison.groupby('Scenario', sort=False):
+                    reached = group[group['FI Achieved?'] == 'Yes']
+                    rows.append({
+                        "Scenario": name,
+                        "FI Year": str(reached['Year'].iloc[0])
+                        if len(reached) else "Not Achieved",
+                        "Final Corpus": group['Total Corpus'].iloc[-1],
+                        "Total Income": group['Total Income'].sum(),
+                        "Total Expenses": group['Total Expenses'].sum(),
+                    })
+                st.dataframe(pd.DataFrame(rows).style.format(
+                    CURRENCY_FORMAT,
+                    subset=["Final Corpus", "Total Income",
+                            "Total Expenses"]),
+                             use_container_width=True,
+                             hide_index=True)
 
 # Footer with key insights
+profile.begin("Key insights")
 st.markdown("---")
 st.subheader("🔍 Key Insights")
 
@@ -1014,14 +2162,18 @@ col1, col2 = st.columns(2)
 
 with col1:
     total_income_period = df['Total Income'].sum()
+    total_tax_period = df['Income Tax'].sum()
     total_expenses_period = df['Total Expenses'].sum()
-    savings_rate = (total_income_period -
+    savings_rate = (total_income_period - total_tax_period -
                     total_expenses_period) / total_income_period * 100
 
     st.write(f"**Average Savings Rate:** {savings_rate:.1f}%")
     st.write(
         f"**Total Income ({start_year}-{end_year}):** ₹{total_income_period:,.0f}"
     )
+    st.write(
+        f"**Total Income Tax ({start_year}-{end_year}):** ₹{total_tax_period:,.0f}"
+    )
     st.write(
         f"**Total Expenses ({start_year}-{end_year}):** ₹{total_expenses_period:,.0f}"
     )
@@ -1040,4 +2192,53 @@ with col2:
         )
 
 st.markdown("---")
-st.markdown("*Built with Streamlit • Financial Independence Calculator*")
\ No newline at end of file
+st.markdown("*Built with Streamlit • Financial Independence Calculator*")
+profile.end()
+
+# Performance panel: this rerun's phases, plus counters and a trace export
+# over the session's recent reruns. Downloads built after the rerun show up
+# in the trace and counters once they have run.
+if profile.enabled:
+    history = st.session_state.setdefault("perf_history",
+                                          deque(maxlen=PERF_HISTORY))
+    history.append(profile.spans)
+    spans = spans_frame(profile.spans)
+    with st.expander("🛠️ Performance", expanded=True):
+        st.caption(
+            f"Rerun took {spans.loc[spans['Depth'] == 0, 'Wall (ms)'].sum():,.1f} ms "
+            f"over {len(spans)} phases")
+        st.plotly_chart(phase_timeline_figure(spans),
+                        use_container_width=True)
+        st.dataframe(spans.style.format(precision=1),
+                     use_container_width=True,
+                     hide_index=True)
+
+        scope = st.radio("Counters Over", ["This Session", "All Sessions"],
+                         horizontal=True,
+                         key="perf_scope",
+                         help="All sessions served by this process")
+        if scope == "This Session":
+            counters = PhaseCounters()
+            for rerun in history:
+                for span in rerun:
+                    counters.add(span)
+        else:
+            counters = phase_counters()
+        counter_table = counters.frame()
+        st.dataframe(counter_table.style.format(precision=1),
+                     use_container_width=True,
+                     hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Download Chrome Trace",
+                data=partial(chrome_trace, list(history)),
+                file_name="fi_calculator_trace.json",
+                mime="application/json",
+                help="Open in chrome://tracing or ui.perfetto.dev")
+        with col2:
+            st.download_button(label="📥 Download Counters",
+                               data=counter_table.to_csv(index=False),
+                               file_name="fi_calculator_counters.csv",
+                               mime="text/csv")
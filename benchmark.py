@@ -0,0 +1,365 @@
+# Benchmarks for the projection engine, the Projections Table styling, each
+# Plotly figure and the Excel/CSV exports, across horizons and Monte Carlo
+# sizes. Results are written as JSON so later runs can be checked against a
+# saved baseline.
+#
+#   python benchmark.py --save benchmark_baseline.json
+#   python benchmark.py --compare benchmark_baseline.json
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from fi_engine import (DEFAULT_PARAMS, CashFlowEvent, DrawdownParams,
+                       LoanParams, MonthlyParams, SimulationParams,
+                       compare_scenarios, corpus_path_summary, loan_totals,
+                       monthly_arrays, prepay_vs_invest, projection_arrays,
+                       projection_state, rounded_frame,
+                       simulate_corpus_paths, simulate_drawdown,
+                       sobol_indices, tornado, update_projection)
+from fi_engine.diskcache import decode_result, encode_result
+from fi_engine.projection import custom_event_totals
+from fi_engine.tax import income_tax
+from perf import RerunProfile
+from views import (age_figure, asset_growth_figure, asset_growth_table,
+                   corpus_growth_figure, csv_report, current_allocation_figure,
+                   excel_report, fan_chart_figure, final_allocation_figure,
+                   probability_figure, style_projections, timeline_events,
+                   timeline_figure)
+
+HORIZONS = [10, 25, 50, 100]
+MC_PATHS = [1000, 10000, 100000, 1000000]
+
+
+# Call fn repeatedly until min_time has elapsed (at least once, at most
+# max_repeats times) and return per-call timings in seconds. One untimed
+# warm-up call keeps lazy imports and first-use caches out of the numbers,
+# including each case's setup state.
+def time_call(fn, min_time, max_repeats=1000):
+    fn()
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeats:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+        if time.perf_counter() - start >= min_time:
+            break
+    return timings
+
+
+# Every benchmark case as (name, labels, fn) for one horizon, generated
+# lazily. Setup state comes from cached helpers, so it is only built by the
+# warm-up call of a case that actually runs.
+def horizon_cases(horizon):
+    params = replace(DEFAULT_PARAMS,
+                     end_year=DEFAULT_PARAMS.start_year + horizon - 1)
+    labels = {"horizon": horizon}
+    late_edit = replace(params, bike_purchase_year=params.end_year - 1)
+
+    @lru_cache(maxsize=1)
+    def columns():
+        return projection_arrays(params)
+
+    @lru_cache(maxsize=1)
+    def df():
+        return rounded_frame(columns())
+
+    @lru_cache(maxsize=1)
+    def growth():
+        return asset_growth_table(df(), params)
+
+    @lru_cache(maxsize=1)
+    def events():
+        return pd.DataFrame(timeline_events(df(), params))
+
+    @lru_cache(maxsize=1)
+    def state():
+        return projection_state(params)
+
+    # A thousand planned events of every kind spread over the horizon
+    @lru_cache(maxsize=1)
+    def planned():
+        rng = np.random.default_rng(0)
+        return tuple(
+            CashFlowEvent(f"Event {i}",
+                          str(rng.choice(["Lump Sum", "Other Expenses",
+                                          "Other Income"])),
+                          float(rng.uniform(10000, 1000000)),
+                          int(rng.integers(params.start_year,
+                                           params.end_year + 1)),
+                          int(params.end_year) if i % 2 else None,
+                          float(rng.uniform(0, 0.1)),
+                          monthly=bool(i % 4 == 1)) for i in range(1000))
+
+    @lru_cache(maxsize=1)
+    def with_events():
+        return replace(params, events=planned())
+
+    # A floating-rate loan over the horizon, reset every five years
+    loan = LoanParams("House Loan",
+                      "House Loan EMI",
+                      5000000,
+                      0.085,
+                      12 * horizon,
+                      params.start_year,
+                      rate_resets=tuple(
+                          (year, 1, 0.075 + 0.01 * (i % 3))
+                          for i, year in enumerate(
+                              range(params.start_year + 5, params.end_year +
+                                    1, 5))),
+                      annual_prepayment=100000)
+    # Surplus invested to a gliding target, rebalanced when it drifts
+    targeted = replace(params,
+                       allocation="Target Allocation",
+                       rebalancing="Threshold")
+
+    sobol_ranges = {
+        "income_growth": (0.03, 0.07),
+        "inflation_exp": (0.05, 0.09),
+        "stocks_return": (0.08, 0.16),
+        "mf_return": (0.07, 0.13),
+        "salary_me_monthly": (150000, 250000),
+        "house_cost": (5000000, 15000000),
+    }
+
+    # Fifty saved variants of the plan, compared in one batch
+    scenarios = {
+        f"Variant {i}": (replace(params,
+                                 income_growth=0.03 + 0.001 * i,
+                                 house_cost=8000000 + 100000 * i), None)
+        for i in range(50)
+    }
+
+    yield from [
+        ("projection_arrays", labels, lambda: projection_arrays(params)),
+        # A late-horizon edit patched onto the previous run
+        ("incremental_update", labels,
+         lambda: update_projection(state(), late_edit)),
+        # Compiling the event list, which projections then reuse
+        ("event_matrix", labels,
+         lambda: custom_event_totals.__wrapped__(
+             planned(), params.start_year, params.end_year)),
+        ("projection_with_events", labels,
+         lambda: projection_arrays(with_events())),
+        # Scheduling the loan, which projections then reuse
+        ("loan_schedule", labels,
+         lambda: loan_totals.__wrapped__(
+             (loan, ), params.start_year, params.end_year)),
+        # A thousand prepayment amounts in one batched schedule
+        ("prepay_vs_invest", labels,
+         lambda: prepay_vs_invest(loan, np.linspace(0, 1000000, 1000), 0.12)),
+        ("projection_target_allocation", labels,
+         lambda: projection_arrays(targeted)),
+        # Every numeric input nudged both ways in one batch
+        ("sensitivity_tornado", labels, lambda: tornado(params)),
+        # Six inputs, 8192 base samples: 65,536 plans in chunks
+        ("sobol_indices", labels,
+         lambda: sobol_indices(params, sobol_ranges, 8192)),
+        ("scenario_comparison", labels,
+         lambda: compare_scenarios(scenarios)),
+        ("monthly_arrays", labels,
+         lambda: monthly_arrays(params, MonthlyParams())),
+        ("dataframe_build", labels, lambda: rounded_frame(columns())),
+        ("calculate_projections", labels,
+         lambda: rounded_frame(projection_arrays(params))),
+        # The same with the performance panel's phase timing around it
+        ("calculate_projections_profiled", labels,
+         lambda: RerunProfile().timed(
+             lambda: rounded_frame(projection_arrays(params)),
+             "calculate_projections")()),
+        # Streamlit renders a Styler by computing every cell's style
+        ("table_styling", labels, lambda: style_projections(df()).to_html()),
+        ("figure_corpus_growth", labels,
+         lambda: corpus_growth_figure(df(), params.target_corpus)),
+        ("figure_current_allocation", labels,
+         lambda: current_allocation_figure(df())),
+        ("figure_final_allocation", labels,
+         lambda: final_allocation_figure(df(), params.end_year)),
+        ("figure_asset_growth", labels,
+         lambda: asset_growth_figure(growth())),
+        ("figure_timeline", labels, lambda: timeline_figure(events())),
+        ("figure_age", labels, lambda: age_figure(df(), params)),
+        ("export_excel", labels, lambda: excel_report(df(), params)),
+        ("export_csv", labels, lambda: csv_report(df())),
+    ]
+
+
+# Monte Carlo cases for one horizon and path count, generated the same way
+def monte_carlo_cases(horizon, n_paths):
+    params = replace(DEFAULT_PARAMS,
+                     end_year=DEFAULT_PARAMS.start_year + horizon - 1)
+    sim = SimulationParams(n_paths=n_paths,
+                           distribution="Log-normal",
+                           stocks_vol=0.18,
+                           mf_vol=0.14,
+                           fd_vol=0.01,
+                           pf_vol=0.005,
+                           seed=42)
+    labels = {"horizon": horizon, "paths": n_paths}
+
+    @lru_cache(maxsize=1)
+    def df():
+        return rounded_frame(projection_arrays(params))
+
+    def simulate(sim=sim, params=params):
+        corpus = simulate_corpus_paths(params, sim)
+        return corpus_path_summary(corpus, df()["Year"].to_numpy(),
+                                   params.target_corpus)
+
+    historical = replace(sim, distribution="Historical")
+    targeted = replace(params,
+                       allocation="Target Allocation",
+                       rebalancing="Threshold")
+
+    # Slab tax over one income per path and year, as a simulation with
+    # stochastic income or withdrawals would need
+    @lru_cache(maxsize=1)
+    def incomes():
+        return np.random.default_rng(0).uniform(0, 5000000,
+                                                (n_paths, horizon))
+
+    @lru_cache(maxsize=1)
+    def summary():
+        return simulate()
+
+    @lru_cache(maxsize=1)
+    def encoded():
+        return encode_result(summary())
+
+    yield from [
+        ("monte_carlo", labels, simulate),
+        ("monte_carlo_historical", labels, lambda: simulate(historical)),
+        # Target allocation steps through the years on every path
+        ("monte_carlo_target_allocation", labels,
+         lambda: simulate(params=targeted)),
+        ("income_tax_paths", labels,
+         lambda: income_tax(incomes(), 45, "new")),
+        # 50-year guardrails drawdown after the simulated accumulation
+        ("drawdown_guardrails", labels, lambda: simulate_drawdown(
+            params, DrawdownParams(strategy="Guardrails"), sim)),
+        # Storing and loading the summary in the on-disk result cache
+        ("result_cache_encode", labels, lambda: encode_result(summary())),
+        ("result_cache_decode", labels, lambda: decode_result(encoded())),
+        ("figure_fan_chart", labels,
+         lambda: fan_chart_figure(summary(), df(), params.target_corpus)),
+        ("figure_probability", labels,
+         lambda: probability_figure(summary())),
+    ]
+
+
+def case_key(result):
+    return (result["name"], result.get("horizon"), result.get("paths"))
+
+
+# Cases for every horizon and path count, one group at a time so only the
+# running group's setup state is alive
+def all_cases(horizons, mc_paths):
+    for horizon in horizons:
+        yield from horizon_cases(horizon)
+        for n_paths in mc_paths:
+            yield from monte_carlo_cases(horizon, n_paths)
+
+
+def run(horizons, mc_paths, min_time, name_filter):
+    results = []
+    for name, labels, fn in all_cases(horizons, mc_paths):
+        if name_filter and name_filter not in name:
+            continue
+        timings = time_call(fn, min_time)
+        result = {
+            "name": name,
+            **labels,
+            "repeats": len(timings),
+            "min_s": min(timings),
+            "median_s": statistics.median(timings),
+        }
+        results.append(result)
+        label = ", ".join(f"{k}={v}" for k, v in labels.items())
+        print(f"{name:28s} {label:28s} "
+              f"{result['median_s'] * 1000:12.3f} ms  (x{len(timings)})")
+    return results
+
+
+# Print each case's change against the baseline and return the regressions
+def compare(results, baseline, threshold):
+    previous = {case_key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'case':58s} {'baseline':>12s} {'current':>12s} {'ratio':>7s}")
+    for result in results:
+        before = previous.get(case_key(result))
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        name = " ".join(str(v) for v in case_key(result) if v is not None)
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:58s} {before['median_s'] * 1000:10.3f}ms "
+              f"{result['median_s'] * 1000:10.3f}ms {ratio:7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark projections, rendering and exports.")
+    parser.add_argument("--horizons",
+                        type=int,
+                        nargs="+",
+                        default=HORIZONS,
+                        help="projection horizons in years")
+    parser.add_argument("--paths",
+                        type=int,
+                        nargs="*",
+                        default=MC_PATHS,
+                        help="Monte Carlo path counts (none to skip)")
+    parser.add_argument("--min-time",
+                        type=float,
+                        default=0.2,
+                        help="seconds to spend repeating each case")
+    parser.add_argument("--filter",
+                        help="only run cases whose name contains this")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare",
+                        help="baseline JSON file to compare against")
+    parser.add_argument("--threshold",
+                        type=float,
+                        default=1.25,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.horizons, args.paths, args.min_time, args.filter)
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plotly": plotly.__version__,
+        },
+        "results": results,
+    }
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Headless financial-independence projection engine
+from .params import (DEFAULT_PARAMS, CashFlowEvent, DrawdownParams,
+                     FIParams, LoanParams, MonthlyParams, SimulationParams)
+from .events import (EVENT_CATEGORIES, EventMatrix, builtin_events,
+                     compile_events, event_table, event_totals,
+                     events_from_records)
+from .loans import (full_schedule, loan_schedule, loan_totals,
+                    loans_from_records, months_to_close, prepay_vs_invest,
+                    yearly_schedule)
+from .projection import (HORIZON_PARAMS, cached_projection, fi_summary,
+                         growth_factors, planned_events, projection_arrays,
+                         projection_columns, projection_frame, rounded_frame,
+                         store_projection, sweep_grid)
+from .portfolio import (ALLOCATIONS, REBALANCING, allocated_balances,
+                        target_balances, target_weights)
+from .montecarlo import (asset_growth, corpus_path_summary,
+                         simulate_corpus_paths, simulated_growth)
+from .historical import (HISTORICAL_SERIES, bootstrap_growth,
+                         historical_returns)
+from .drawdown import (STRATEGIES, depletion_distribution, drawdown_paths,
+                       drawdown_summary, simulate_drawdown)
+from .monthly import (monthly_arrays, monthly_columns, monthly_frame,
+                      monthly_projection_frame, yearly_rollup)
+from .incremental import (ProjectionState, cached_update,
+                          first_affected_year, projection_state,
+                          update_projection)
+from .sensitivity import (SENSITIVITY_PARAMS, halton, nudged_values,
+                          sobol_indices, tornado)
+from .scenarios import ScenarioStore, compare_scenarios
+from .solver import (SOLVER_BOUNDS, GoalSolution, fi_margin, solve_all,
+                     solve_for)
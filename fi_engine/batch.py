@@ -0,0 +1,202 @@
+# Batch runner: projects many households from a CSV, Parquet or Arrow file
+# across a process pool and writes year-by-year projections and summary
+# metrics. Parquet and Arrow outputs use compact column types and are
+# written in row groups.
+#
+#   python -m fi_engine.batch households.csv --summary summary.parquet \
+#       --projections projections.parquet --workers 8
+#
+# Each input row is one household. Columns named after FIParams fields set
+# that input; missing columns take the sidebar defaults.
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from .columnar import read_results, results_metadata, write_frame
+from .params import DEFAULT_PARAMS, FIParams
+from .projection import (HORIZON_PARAMS, SHARED_PARAMS, fi_summary,
+                         projection_arrays)
+
+# Inputs a household row can set. Planned events and loans are shared by a
+# whole batch, so they aren't read from rows.
+PARAM_NAMES = tuple(field.name for field in fields(FIParams)
+                    if field.name not in SHARED_PARAMS)
+
+# Engine columns that are kept as-is rather than rounded to whole rupees
+UNROUNDED_COLUMNS = ("Year", "Age Me", "Age Wife", "FI Achieved?")
+
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def read_table(path):
+    if path.endswith(PARQUET_SUFFIXES + ARROW_SUFFIXES):
+        return read_results(path)[0]
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    raise ValueError(
+        f"Unsupported file type: {path} (use .csv, .parquet or .arrow)")
+
+
+def write_table(frame, path, kind):
+    metadata = results_metadata(kind)
+    if path.endswith(PARQUET_SUFFIXES):
+        write_frame(frame, path, "parquet", metadata)
+    elif path.endswith(ARROW_SUFFIXES):
+        write_frame(frame, path, "arrow", metadata)
+    elif path.endswith(".csv"):
+        frame.to_csv(path, index=False)
+    else:
+        raise ValueError(
+            f"Unsupported file type: {path} (use .csv, .parquet or .arrow)")
+
+
+def load_households(path, id_column):
+    return complete_households(read_table(path), id_column)
+
+
+# Fill in missing inputs from the defaults and make sure every household has
+# an identifier
+def complete_households(households, id_column):
+    households = households.reset_index(drop=True)
+    if id_column not in households:
+        households[id_column] = households.index
+    for name in PARAM_NAMES:
+        if name not in households:
+            households[name] = getattr(DEFAULT_PARAMS, name)
+    return households
+
+
+# Summary metrics from engine output, batched or for a single parameter set
+def summary_columns(columns, start_year, target_corpus):
+    fi_year, final_corpus = fi_summary(columns)
+    reached = columns["FI Achieved?"]
+    fi_index = reached.argmax(axis=-1)[..., None]
+    corpus_at_fi = np.take_along_axis(columns["Total Corpus"], fi_index,
+                                      axis=-1)[..., 0]
+    return {
+        "FI Year":
+        fi_year,
+        "Years to FI":
+        fi_year - start_year,
+        "Corpus at FI":
+        np.where(reached.any(axis=-1), np.round(corpus_at_fi, 0), np.nan),
+        "Final Corpus":
+        np.round(final_corpus, 0),
+        "Shortfall":
+        np.round(np.maximum(target_corpus - final_corpus, 0), 0)
+    }
+
+
+# Project one chunk of households. Households sharing a horizon are run
+# together as a single batched engine call.
+def project_households(households, id_column, with_projections=True):
+    summaries, projections = [], []
+
+    for (start, end), group in households.groupby(list(HORIZON_PARAMS),
+                                                  sort=False):
+        batch = replace(
+            DEFAULT_PARAMS,
+            start_year=int(start),
+            end_year=int(end),
+            **{
+                name: group[name].to_numpy()
+                for name in PARAM_NAMES if name not in HORIZON_PARAMS
+            })
+        columns = projection_arrays(batch)
+        summaries.append(
+            pd.DataFrame(
+                {
+                    id_column: group[id_column].to_numpy(),
+                    **summary_columns(columns, int(start),
+                                      group["target_corpus"].to_numpy())
+                },
+                index=group.index))
+
+        if with_projections:
+            shape = columns["FI Achieved?"].shape
+            frame = {id_column: np.repeat(group[id_column].to_numpy(), shape[1])}
+            for name, values in columns.items():
+                values = np.broadcast_to(values, shape).ravel()
+                if name == "FI Achieved?":
+                    values = np.where(values, "Yes", "No")
+                elif name not in UNROUNDED_COLUMNS:
+                    values = np.round(values, 0)
+                frame[name] = values
+            projections.append(
+                pd.DataFrame(frame, index=np.repeat(group.index, shape[1])))
+
+    summary = pd.concat(summaries).sort_index(kind="stable")
+    if not with_projections:
+        return summary, None
+    return summary, pd.concat(projections).sort_index(kind="stable")
+
+
+def run_batch(households, id_column, workers, chunk_size, with_projections):
+    chunks = [
+        households.iloc[lo:lo + chunk_size]
+        for lo in range(0, len(households), chunk_size)
+    ]
+    if workers == 1 or len(chunks) == 1:
+        results = [
+            project_households(chunk, id_column, with_projections)
+            for chunk in chunks
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(project_households, chunks, repeat(id_column),
+                         repeat(with_projections)))
+
+    summary = pd.concat([s for s, _ in results], ignore_index=True)
+    if not with_projections:
+        return summary, None
+    return summary, pd.concat([p for _, p in results], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run FI projections for many households in parallel.")
+    parser.add_argument("households",
+                        help="CSV, Parquet or Arrow file, one household per row")
+    parser.add_argument("--summary",
+                        required=True,
+                        help="output file for per-household summary metrics")
+    parser.add_argument("--projections",
+                        help="output file for year-by-year projections")
+    parser.add_argument("--id-column",
+                        default="household_id",
+                        help="column identifying each household "
+                        "(default: household_id, row number if absent)")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=os.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size",
+                        type=int,
+                        default=1000,
+                        help="households per worker task (default: 1000)")
+    args = parser.parse_args(argv)
+
+    households = load_households(args.households, args.id_column)
+    summary, projections = run_batch(households, args.id_column, args.workers,
+                                     args.chunk_size, args.projections
+                                     is not None)
+
+    write_table(summary, args.summary, "batch_summary")
+    if projections is not None:
+        write_table(projections, args.projections, "batch_projections")
+
+    achieved = summary["FI Year"].notna().sum()
+    print(f"Projected {len(summary):,} households, "
+          f"{achieved:,} reach their target.")
+
+
+if __name__ == "__main__":
+    main()
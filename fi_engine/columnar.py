@@ -0,0 +1,174 @@
+# Columnar export and import of engine results as Parquet or Arrow IPC.
+# Frames are written with compact dtypes in row groups (record batches for
+# Arrow) so large simulation outputs stream to the sink, and the parameters
+# that produced them travel in the schema metadata so saved results can be
+# loaded back without recomputing.
+import json
+from dataclasses import asdict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .events import events_from_records
+from .loans import loans_from_records
+from .params import FIParams, MonthlyParams, SimulationParams
+
+FORMATS = ("parquet", "arrow")
+METADATA_KEY = b"fi_engine"
+ROW_GROUP_SIZE = 262144
+
+# Parameter objects that can be stored alongside results
+METADATA_PARAMS = {
+    "params": FIParams,
+    "monthly_params": MonthlyParams,
+    "sim_params": SimulationParams,
+}
+
+
+# Smallest lossless dtypes for engine output: whole-rupee floats become the
+# smallest integer type that holds them, other integers are downcast too
+# and text becomes categorical.
+# float32=True also narrows fractional floats (percentiles, probabilities).
+def compact_frame(df, float32=False):
+    columns = {}
+    for name, values in df.items():
+        if pd.api.types.is_bool_dtype(values):
+            pass
+        elif pd.api.types.is_integer_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            array = values.to_numpy()
+            # Integers are only exact in a float up to 2**53
+            if (np.isfinite(array).all() and (array == np.round(array)).all()
+                    and np.abs(array).max(initial=0) <= 2**53):
+                values = pd.to_numeric(values.astype(np.int64),
+                                       downcast="integer")
+            elif float32:
+                values = values.astype(np.float32)
+        elif not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype("category")
+        columns[name] = values
+    return pd.DataFrame(columns)
+
+
+# NumPy scalars stored in parameter objects as plain Python numbers
+def plain_value(value):
+    return value.item()
+
+
+def results_metadata(kind, **param_objects):
+    metadata = {"kind": kind}
+    for name, value in param_objects.items():
+        if value is not None:
+            metadata[name] = asdict(value)
+    return metadata
+
+
+# Write record batches sharing one schema to a path or file-like sink. Each
+# batch becomes one Parquet row group or one Arrow IPC record batch.
+def write_batches(batches, schema, sink, fmt="parquet", metadata=None):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (use one of {FORMATS})")
+    if metadata is not None:
+        schema = schema.with_metadata(
+            {METADATA_KEY: json.dumps(metadata, default=plain_value)})
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    with writer:
+        for batch in batches:
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=batch.num_rows)
+            else:
+                writer.write_batch(batch)
+
+
+def write_frame(df,
+                sink,
+                fmt="parquet",
+                metadata=None,
+                float32=False,
+                row_group_size=ROW_GROUP_SIZE):
+    table = pa.Table.from_pandas(compact_frame(df, float32),
+                                 preserve_index=False)
+    # Pandas' own schema metadata isn't needed to read the file back
+    schema = table.schema.remove_metadata()
+    table = table.replace_schema_metadata(None)
+    write_batches(table.to_batches(max_chunksize=row_group_size), schema,
+                  sink, fmt, metadata)
+
+
+# Serialized file contents, for download buttons and HTTP responses
+def frame_bytes(df, fmt="parquet", metadata=None, float32=False):
+    sink = BytesIO()
+    write_frame(df, sink, fmt, metadata, float32)
+    return sink.getvalue()
+
+
+# Simulated corpus paths in long form (path, year, corpus), yielded a batch
+# at a time so millions of paths never exist as one DataFrame
+def corpus_path_batches(corpus, years, paths_per_batch=None):
+    n_paths, n_years = corpus.shape
+    paths_per_batch = paths_per_batch or max(1, ROW_GROUP_SIZE // n_years)
+    years = np.asarray(years, dtype=np.int16)
+    for lo in range(0, n_paths, paths_per_batch):
+        hi = min(lo + paths_per_batch, n_paths)
+        yield pa.record_batch({
+            "Path":
+            np.repeat(np.arange(lo, hi, dtype=np.int32), n_years),
+            "Year":
+            np.tile(years, hi - lo),
+            "Total Corpus":
+            corpus[lo:hi].astype(np.float32, copy=False).ravel()
+        })
+
+
+CORPUS_PATH_SCHEMA = pa.schema([("Path", pa.int32()), ("Year", pa.int16()),
+                                ("Total Corpus", pa.float32())])
+
+
+# Load a Parquet or Arrow IPC file written by this module (or any other
+# columnar file). Returns the frame and the stored metadata, if any.
+def read_results(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    if hasattr(source, "read"):
+        source.seek(0)
+        magic = source.read(6)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            magic = f.read(6)
+
+    if magic == b"ARROW1":
+        with pa.ipc.open_file(source) as reader:
+            table = reader.read_all()
+    elif magic[:4] == b"PAR1":
+        table = pq.read_table(source)
+    else:
+        raise ValueError("Not a Parquet or Arrow IPC file")
+
+    stored = (table.schema.metadata or {}).get(METADATA_KEY)
+    metadata = json.loads(stored) if stored else {}
+    return table.to_pandas(), metadata
+
+
+# Rebuild the parameter objects stored with a result. Planned events and
+# loans are stored as lists of records.
+def params_from_metadata(metadata):
+    params = {}
+    for name, cls in METADATA_PARAMS.items():
+        if name in metadata:
+            values = dict(metadata[name])
+            if "events" in values:
+                values["events"] = events_from_records(values["events"])
+            if "loans" in values:
+                values["loans"] = loans_from_records(values["loans"])
+            params[name] = cls(**values)
+    return params
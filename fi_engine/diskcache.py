@@ -0,0 +1,208 @@
+# Content-addressed result cache on disk, shared across restarts and by any
+# number of processes. Entries are keyed on a hash of everything that
+# produced them (parameter objects, other arguments and the version of the
+# code) and stored as zstd-compressed Arrow IPC files. Writes go to a
+# temporary file that is renamed into place, so readers only ever see whole
+# entries. Reads touch an entry's modification time, and once the cache
+# grows past its size limit the least recently used entries are deleted.
+# Each process tracks the cache size from its last scan plus what it has
+# written since, and only rescans the directory when that crosses the limit.
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, is_dataclass
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+SUFFIX = ".arrow"
+# Eviction frees space down to this share of the limit, so a full cache
+# isn't rescanned on every write
+EVICT_TO = 0.9
+ENGINE_DIR = Path(__file__).parent
+
+
+# Hash of the engine's source and data files, plus any other files results
+# depend on, so entries made by other code are never returned
+@lru_cache(maxsize=16)
+def code_version(*extra_paths):
+    paths = sorted(ENGINE_DIR.glob("*.py")) + sorted(
+        ENGINE_DIR.glob("data/*")) + list(extra_paths)
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).name.encode())
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+# Plain JSON form of cache key parts. Arrays are represented by a digest of
+# their contents, so big inputs make small keys.
+def _key_part(value):
+    if is_dataclass(value):
+        return {type(value).__name__: asdict(value)}
+    if isinstance(value, np.ndarray):
+        return {
+            "array": hashlib.sha256(np.ascontiguousarray(value)).hexdigest(),
+            "dtype": str(value.dtype),
+            "shape": value.shape
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Can't use {type(value).__name__} in a cache key")
+
+
+def cache_key(*parts, version=None):
+    payload = json.dumps([version or code_version(), *parts],
+                         sort_keys=True,
+                         default=_key_part)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Results are stored as a table of parts, one row each: frames and arrays as
+# nested Arrow IPC, bytes and text as they are. A result that is a tuple has
+# one part per element.
+def _encode_part(value):
+    if isinstance(value, pd.DataFrame):
+        kind, table = "frame", pa.Table.from_pandas(value)
+    elif isinstance(value, np.ndarray):
+        kind = json.dumps({"shape": value.shape})
+        table = pa.table({"values": np.ascontiguousarray(value).ravel()})
+    elif isinstance(value, bytes):
+        return "bytes", value
+    elif isinstance(value, str):
+        return "text", value.encode()
+    else:
+        raise TypeError(f"Can't cache {type(value).__name__} results")
+    sink = BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return kind, sink.getvalue()
+
+
+def _decode_part(kind, data):
+    if kind == "bytes":
+        return data
+    if kind == "text":
+        return data.decode()
+    table = pa.ipc.open_stream(data).read_all()
+    if kind == "frame":
+        return table.to_pandas()
+    return table.column("values").to_numpy().reshape(json.loads(kind)["shape"])
+
+
+def encode_result(value):
+    parts = value if isinstance(value, tuple) else (value, )
+    encoded = [_encode_part(part) for part in parts]
+    table = pa.table({
+        "kind": [kind for kind, _ in encoded],
+        "data": pa.array([data for _, data in encoded], type=pa.large_binary())
+    }).replace_schema_metadata({"tuple": str(isinstance(value, tuple))})
+    sink = BytesIO()
+    with pa.ipc.new_file(
+            sink,
+            table.schema,
+            options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_result(source):
+    with pa.ipc.open_file(source) as reader:
+        table = reader.read_all()
+    parts = tuple(
+        _decode_part(kind, data) for kind, data in zip(
+            table.column("kind").to_pylist(),
+            table.column("data").to_pylist()))
+    return parts if table.schema.metadata[b"tuple"] == b"True" else parts[0]
+
+
+class DiskCache:
+
+    def __init__(self, path, max_bytes=1 << 30):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.estimated_bytes = self.size()
+
+    def _entry(self, key):
+        return self.path / key[:2] / (key + SUFFIX)
+
+    # Cached result for key, or None. A missing, half-evicted or unreadable
+    # entry is a miss.
+    def get(self, key):
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                value = decode_result(f)
+        except (OSError, pa.ArrowException):
+            return None
+        # The entry may have been evicted since it was read
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        data = encode_result(value)
+        fd, temp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp, entry)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        self.estimated_bytes += len(data)
+        if self.estimated_bytes > self.max_bytes:
+            self.evict()
+
+    # Cached result for key, computing and storing it on a miss
+    def fetch(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    # Entries as (last used, size, path), least recently used first. Entries
+    # deleted by another process while listing are skipped.
+    def entries(self):
+        entries = []
+        for entry in self.path.glob(f"*/*{SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    # Delete least recently used entries until the cache fits its limit,
+    # with some room to spare when it doesn't
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, entry in entries:
+                if total <= EVICT_TO * self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+        self.estimated_bytes = total
+
+    def clear(self):
+        for _, _, entry in self.entries():
+            entry.unlink(missing_ok=True)
+        self.estimated_bytes = 0
@@ -0,0 +1,267 @@
+# Post-FI drawdown: the corpus at retirement is drawn down year by year under
+# a withdrawal rule, across every simulated path at once. Paths that can't
+# fund a year's spending are marked depleted and masked from then on, which
+# gives the probability the corpus lasts and the distribution of years it
+# funds.
+import numpy as np
+import pandas as pd
+
+from .montecarlo import asset_growth, simulate_corpus_paths
+from .portfolio import ASSET_COLUMNS
+from .projection import projection_columns
+from .tax import equity_gains_tax, income_tax, realized_gain
+
+STRATEGIES = ("Fixed", "Percentage", "Guardrails")
+
+# Assets whose gains are taxed as equity when sold
+EQUITY_ASSETS = ("stocks", "mf")
+
+
+# Last working year: drawdown.retirement_year if set, otherwise the first FI
+# year, or the end of the horizon when the target is never reached
+def retirement_year(params, drawdown, columns):
+    if drawdown.retirement_year:
+        if not params.start_year <= drawdown.retirement_year <= params.end_year:
+            raise ValueError(
+                f"Retirement year {drawdown.retirement_year} is outside "
+                f"{params.start_year}-{params.end_year}")
+        return drawdown.retirement_year
+    fi_rows = np.flatnonzero(columns["FI Achieved?"])
+    if fi_rows.size:
+        return int(columns["Year"][fi_rows[0]])
+    return params.end_year
+
+
+# Share of each asset in the corpus at the end of a projection row. The
+# portfolio is rebalanced back to these weights every drawdown year. A
+# negative FD balance is debt: it is already netted out of Total Corpus, the
+# starting balance, so it is repaid at retirement and takes no weight. With
+# nothing invested the corpus is held as FD.
+def portfolio_weights(columns, row):
+    values = np.maximum(
+        [columns[name][row] for name in ASSET_COLUMNS.values()], 0)
+    total = values.sum()
+    if total <= 0:
+        return {asset: float(asset == "fd") for asset in ASSET_COLUMNS}
+    return dict(zip(ASSET_COLUMNS, values / total))
+
+
+# Cost basis of the holdings at the end of a projection row: the opening
+# balances plus everything invested since, at average cost. A year's trade
+# in an asset is its change beyond what the year's return explains, so a
+# purchase adds to the basis and a sale keeps it in proportion. Negative FD
+# is debt and holds nothing.
+def projected_cost_basis(params, columns, row):
+    total = 0
+    for asset, name in ASSET_COLUMNS.items():
+        held = max(getattr(params, f"{asset}_val"), 0)
+        basis = held
+        step = 1 + getattr(params, f"{asset}_return")
+        for value in np.maximum(columns[name][:row + 1], 0):
+            grown = held * step
+            if value >= grown:
+                basis += value - grown
+            elif grown > 0:
+                basis *= value / grown
+            held = value
+        total += basis
+    return total
+
+
+# Tax on the gain realized by withdrawals in drawdown year t, or None when
+# tax is ignored. The gain is split between the asset classes by weight:
+# equity pays LTCG and FD pays slab rates as interest, each earner on half.
+# PF withdrawals are tax free.
+def withdrawal_tax(params, weights, retired):
+    if params.tax_regime == "none":
+        return None
+    equity = np.clip(sum(weights[asset] for asset in EQUITY_ASSETS), 0, 1)
+    ages = (params.age_me, params.age_wife)
+    first = retired + 1 - params.start_year
+
+    def tax(gain, t):
+        half = gain / 2
+        return sum(
+            equity_gains_tax(equity * half) +
+            income_tax(0, age + first + t, params.tax_regime,
+                       other_income=weights["fd"] * half) for age in ages)
+
+    return tax
+
+
+# Gross portfolio return for each path and year from cumulative asset growth
+# factors (paths x years)
+def portfolio_returns(growth, weights):
+    total = 0
+    for asset, weight in weights.items():
+        factors = growth[asset]
+        yearly = np.empty_like(factors)
+        yearly[:, 0] = factors[:, 0]
+        np.divide(factors[:, 1:], factors[:, :-1], out=yearly[:, 1:])
+        total = total + weight * yearly
+    return total
+
+
+# Draw down start_balance (paths,) over the years of gross_returns
+# (paths x years). Each year's withdrawal comes out at the start of the year
+# and the rest grows with that year's return.
+#
+# Fixed spends the same first-year amount on every path (initial_spending,
+# by default withdrawal_rate of the median starting balance), raised with
+# inflation every year, so unlucky paths feel the sequence of returns.
+# Percentage spends withdrawal_rate of the current balance. Guardrails
+# starts like Fixed but cuts spending by
+# guardrail_adjustment when the current withdrawal rate is more than
+# guardrail_band above the initial rate, and raises it by the same when the
+# rate is as far below.
+#
+# With gains_tax, each withdrawal realizes its share of the gain over
+# cost_basis (the starting balance by default) at average cost,
+# gains_tax(gain, year) is charged on it and the tax is withdrawn on top.
+# Paths that start with nothing fund no years.
+def drawdown_paths(start_balance,
+                   gross_returns,
+                   drawdown,
+                   inflation,
+                   gains_tax=None,
+                   initial_spending=None,
+                   cost_basis=None):
+    if drawdown.strategy not in STRATEGIES:
+        raise ValueError(f"Unknown withdrawal strategy: {drawdown.strategy} "
+                         f"(use one of {STRATEGIES})")
+    n_paths, n_years = gross_returns.shape
+    balance = np.array(start_balance, dtype=float)
+    basis = np.array(balance if cost_basis is None else cost_basis,
+                     dtype=float)
+    if initial_spending is None:
+        initial_spending = drawdown.withdrawal_rate * np.median(balance)
+    spending = np.full(n_paths, initial_spending, dtype=float)
+    upper = drawdown.withdrawal_rate * (1 + drawdown.guardrail_band)
+    lower = drawdown.withdrawal_rate * (1 - drawdown.guardrail_band)
+
+    # Years run along the first axis inside the loop so each year's slice
+    # is contiguous
+    gross_returns = np.ascontiguousarray(gross_returns.T)
+    balances = np.empty((n_years, n_paths), dtype=np.float32)
+    withdrawals = np.empty((n_years, n_paths), dtype=np.float32)
+    solvent = balance > 0
+    years_funded = np.where(solvent, n_years, 0).astype(np.int32)
+
+    for t in range(n_years):
+        if drawdown.strategy == "Percentage":
+            spending = drawdown.withdrawal_rate * balance
+        elif t > 0:
+            spending = spending * (1 + inflation)
+            if drawdown.strategy == "Guardrails":
+                rate = spending / np.where(balance > 0, balance, 1)
+                spending = np.where(
+                    rate > upper, spending * (1 - drawdown.guardrail_adjustment),
+                    np.where(rate < lower,
+                             spending * (1 + drawdown.guardrail_adjustment),
+                             spending))
+
+        need = spending
+        if gains_tax is not None:
+            need = spending + gains_tax(
+                realized_gain(spending, balance, basis), t)
+
+        # A path is depleted in the first year it can't fund in full; it
+        # pays what it has and stays at zero
+        depleted = solvent & (need >= balance)
+        np.copyto(years_funded, t, where=depleted)
+        solvent &= ~depleted
+        withdrawal = np.where(solvent, need, np.maximum(balance, 0))
+        # Selling at average cost keeps the basis in proportion
+        held = np.where(balance > 0, balance, 1)
+        basis *= np.where(balance > 0, 1 - withdrawal / held, 0)
+        balance = np.where(solvent, (balance - withdrawal) * gross_returns[t],
+                           0)
+        balances[t] = balance
+        withdrawals[t] = withdrawal
+
+    return {
+        "Balance": np.ascontiguousarray(balances.T),
+        "Withdrawal": np.ascontiguousarray(withdrawals.T),
+        "Years Funded": years_funded,
+    }
+
+
+# Drawdown after retirement with the projection's expected returns (one
+# path), or over every Monte Carlo path when sim is given: each path starts
+# from its own simulated corpus at retirement and draws fresh returns.
+# Returns the drawdown years and the drawdown_paths result.
+def simulate_drawdown(params, drawdown, sim=None, chunk_elements=2000000):
+    columns = projection_columns(params)
+    retired = retirement_year(params, drawdown, columns)
+    row = retired - params.start_year
+    years = np.arange(retired + 1, retired + drawdown.years + 1)
+    weights = portfolio_weights(columns, row)
+    gains_tax = withdrawal_tax(params, weights, retired)
+    # Every path plans to spend the same amount, set from the projected
+    # corpus at retirement
+    spending = drawdown.withdrawal_rate * columns["Total Corpus"][row]
+    # Each path holds what the projection bought, so its basis is the same
+    # share of its balance. Repaying FD debt sells at average cost, which
+    # leaves the share unchanged.
+    invested = sum(
+        max(columns[name][row], 0) for name in ASSET_COLUMNS.values())
+    basis_share = projected_cost_basis(params, columns,
+                                       row) / invested if invested > 0 else 1
+
+    if sim is None:
+        gross = sum(weight * (1 + getattr(params, f"{asset}_return"))
+                    for asset, weight in weights.items())
+        start = columns["Total Corpus"][row:row + 1]
+        return years, drawdown_paths(start,
+                                     np.full((1, drawdown.years), gross),
+                                     drawdown, params.inflation_exp,
+                                     gains_tax, spending,
+                                     basis_share * start)
+
+    start = simulate_corpus_paths(params, sim)[:, row]
+    # A separate stream, so drawdown returns don't shift the accumulation
+    # paths for the same seed
+    rng = np.random.default_rng((sim.seed, 1))
+    chunk = max(1, chunk_elements // drawdown.years)
+    parts = []
+    for lo in range(0, sim.n_paths, chunk):
+        hi = min(lo + chunk, sim.n_paths)
+        growth = asset_growth(rng, params, sim, (hi - lo, drawdown.years))
+        parts.append(
+            drawdown_paths(start[lo:hi], portfolio_returns(growth, weights),
+                           drawdown, params.inflation_exp, gains_tax,
+                           spending, basis_share * start[lo:hi]))
+    return years, {
+        name: np.concatenate([part[name] for part in parts])
+        for name in parts[0]
+    }
+
+
+# Balance percentiles, median withdrawal and the share of paths still
+# funding their spending in each drawdown year
+def drawdown_summary(result, years):
+    balance = result["Balance"]
+    percentiles = np.percentile(balance, [5, 25, 50, 75, 95], axis=0)
+    solvent = result["Years Funded"][:, None] > np.arange(len(years))
+    return pd.DataFrame({
+        "Year": years,
+        "P5": percentiles[0],
+        "P25": percentiles[1],
+        "Median": percentiles[2],
+        "P75": percentiles[3],
+        "P95": percentiles[4],
+        "Median Withdrawal": np.median(result["Withdrawal"], axis=0),
+        "P(Solvent)": solvent.mean(axis=0)
+    })
+
+
+# Number and share of paths depleted after each count of funded years.
+# Paths that last the whole drawdown aren't counted.
+def depletion_distribution(result, n_years):
+    funded = result["Years Funded"]
+    counts = np.bincount(funded[funded < n_years], minlength=n_years)
+    return pd.DataFrame({
+        "Years Funded": np.arange(n_years),
+        "Paths": counts,
+        "Share": counts / len(funded)
+    })
@@ -0,0 +1,242 @@
+# Planned cash-flow events. The built-in purchases, education and loans and
+# any user-defined events are described the same way (CashFlowEvent) and
+# compiled into a sparse (events x periods) matrix of occurrences times
+# inflation growth. Category totals for every period are then one sparse
+# product with the vector of event amounts, however many events there are.
+from dataclasses import dataclass
+from numbers import Real
+
+import numpy as np
+
+from .params import CashFlowEvent, MonthlyParams
+
+# Projection column each category of event is totalled into. Income
+# categories add to income; the rest are expenses.
+EVENT_CATEGORIES = ("Kids Education", "House Loan EMI", "Car Loan EMI",
+                    "Other Expenses", "Lump Sum", "Other Income")
+INCOME_CATEGORIES = ("Other Income", )
+LOAN_CATEGORIES = ("House Loan EMI", "Car Loan EMI")
+
+# Event fields stacked into the arrays the matrix is compiled from
+TABLE_FIELDS = ("amount", "start_year", "end_year", "inflation", "month",
+                "monthly", "end_month")
+
+
+# The events behind the dedicated house, bike, education and loan inputs.
+# Fields are arrays when p (or m) is batched. Without monthly settings
+# everything happens in January, as in the yearly model; loans run from the
+# start of the projection to the month before closure.
+def builtin_events(p, m=None):
+    m = m or MonthlyParams()
+
+    def month_before(year, month):
+        stamp = np.asarray(year) * 12 + np.asarray(month) - 2
+        return stamp // 12, stamp % 12 + 1
+
+    house_loan_end = month_before(p.house_loan_closure_year,
+                                  m.house_loan_closure_month)
+    car_loan_end = month_before(p.car_loan_closure_year,
+                                m.car_loan_closure_month)
+    return [
+        CashFlowEvent("House Construction",
+                      "Lump Sum",
+                      p.house_cost,
+                      p.house_construction_year,
+                      month=m.house_construction_month),
+        CashFlowEvent("Bike Purchase",
+                      "Lump Sum",
+                      p.bike_cost,
+                      p.bike_purchase_year,
+                      month=m.bike_purchase_month),
+        CashFlowEvent("Kids Education",
+                      "Kids Education",
+                      p.kids_edu_annual,
+                      p.kids_edu_start_year,
+                      p.kids_edu_end_year,
+                      p.kids_edu_inflation,
+                      month=m.annual_expense_month),
+        CashFlowEvent("House Loan",
+                      "House Loan EMI",
+                      p.house_loan_emi,
+                      p.start_year,
+                      house_loan_end[0],
+                      monthly=True,
+                      end_month=house_loan_end[1]),
+        CashFlowEvent("Car Loan",
+                      "Car Loan EMI",
+                      p.car_loan_emi,
+                      p.start_year,
+                      car_loan_end[0],
+                      monthly=True,
+                      end_month=car_loan_end[1]),
+    ]
+
+
+# User-defined events from records (dicts keyed by CashFlowEvent field), as
+# sent by the API, stored in result metadata or edited in the app
+def events_from_records(records):
+    events = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Event {i} must be an object")
+        event = CashFlowEvent(**record)
+        if not all(
+                isinstance(getattr(event, name), Real)
+                for name in TABLE_FIELDS
+                if getattr(event, name) is not None):
+            raise ValueError(f"{event.name} amounts, rates, years and "
+                             "months must be numbers")
+        if event.category not in EVENT_CATEGORIES:
+            raise ValueError(f"Unknown event category: {event.category} "
+                             f"(use one of {EVENT_CATEGORIES})")
+        if event.end_year is None:
+            if event.monthly:
+                raise ValueError(f"{event.name} recurs monthly but has no "
+                                 "end year")
+        elif event.end_year < event.start_year:
+            raise ValueError(f"{event.name} ends before it starts")
+        if not (1 <= event.month <= 12 and 1 <= event.end_month <= 12):
+            raise ValueError(f"{event.name} months must be 1-12")
+        events.append(event)
+    return tuple(events)
+
+
+# Event fields stacked along a trailing event axis, shaped (*batch, events)
+def event_table(events):
+    table = {}
+    for name in TABLE_FIELDS:
+        values = [
+            event.start_year if name == "end_year" and event.end_year is None
+            else getattr(event, name) for event in events
+        ]
+        if all(np.ndim(value) == 0 for value in values):
+            table[name] = np.array(values)
+        else:
+            table[name] = np.stack(np.broadcast_arrays(*values), axis=-1)
+    table["category"] = np.array(
+        [EVENT_CATEGORIES.index(event.category) for event in events])
+    return table
+
+
+# Sparse event matrix in coordinate form. Entry i is values[i] at flat
+# (batch, event) row rows[i], and is totalled into flat (batch, category,
+# period) cell slots[i] of an output shaped shape.
+@dataclass(frozen=True, slots=True, eq=False)
+class EventMatrix:
+    rows: np.ndarray
+    slots: np.ndarray
+    values: np.ndarray
+    shape: tuple
+
+
+# Compile an event table over the years start_year..end_year, or over their
+# months when monthly is set. growth holds each event's inflation growth
+# factor for every year, shaped (*batch, events, years). Only periods in
+# which an event is paid are stored.
+def compile_events(table, start_year, end_year, growth, monthly=False):
+    years = np.arange(start_year, end_year + 1)
+    start = table["start_year"] * 12 + table["month"] - 1
+    end = table["end_year"] * 12 + np.where(table["monthly"],
+                                            table["end_month"],
+                                            table["month"]) - 1
+    start, end = start[..., None], end[..., None]
+    every_month = table["monthly"][..., None]
+
+    if monthly:
+        stamp = np.arange(start_year * 12, (end_year + 1) * 12)
+        # Yearly events are paid in their own month of each year
+        count = ((start <= stamp) & (stamp <= end) &
+                 (every_month | ((stamp - start) % 12 == 0)))
+        growth = np.repeat(growth, 12, axis=-1)
+    else:
+        # Monthly events count their months inside each year
+        first = years * 12
+        months = np.clip(
+            np.minimum(end, first + 11) - np.maximum(start, first) + 1, 0, 12)
+        paid = ((table["start_year"][..., None] <= years) &
+                (years <= table["end_year"][..., None]))
+        count = np.where(every_month, months, paid)
+    count = np.broadcast_to(count, np.broadcast_shapes(count.shape,
+                                                       growth.shape))
+
+    n_events, n_periods = count.shape[-2:]
+    batch_shape = count.shape[:-2]
+    rows, periods = np.nonzero(count.reshape(-1, n_periods))
+    categories = table["category"][rows % n_events]
+    n_categories = len(EVENT_CATEGORIES)
+    slots = ((rows // n_events) * n_categories + categories) * n_periods
+    values = (count.reshape(-1, n_periods)[rows, periods] *
+              np.broadcast_to(growth, count.shape).reshape(
+                  -1, n_periods)[rows, periods])
+    return EventMatrix(rows, slots + periods, values,
+                       batch_shape + (n_categories, n_periods))
+
+
+# Totals by category and period, shaped (*batch, categories, periods): the
+# sparse product of the event matrix with the amounts (*batch, events).
+# Amounts may be batched over a matrix compiled once for shared timings.
+def event_totals(matrix, amounts):
+    n_events = np.shape(amounts)[-1]
+    batch = np.broadcast_shapes(matrix.shape[:-2], np.shape(amounts)[:-1])
+    amounts = np.broadcast_to(amounts, batch + (n_events, ))
+    if batch == matrix.shape[:-2]:
+        weights = amounts.ravel()[matrix.rows] * matrix.values
+        slots = matrix.slots
+    else:
+        # The same matrix for every set of amounts, each totalled into its
+        # own block of the output
+        amounts = amounts.reshape(-1, n_events)
+        block = int(np.prod(matrix.shape[-2:]))
+        weights = (amounts[:, matrix.rows % n_events] *
+                   matrix.values).ravel()
+        slots = (matrix.slots % block +
+                 block * np.arange(len(amounts))[:, None]).ravel()
+    shape = batch + matrix.shape[-2:]
+    return np.bincount(slots, weights,
+                       minlength=int(np.prod(shape))).reshape(shape)
+
+
+# Timeline entries for planned events: one-off events in the year they
+# happen, recurring ones when they start and the year after they end. Loans
+# run from the start of the projection, so only their end is shown.
+def event_milestones(events, start_year):
+    milestones = []
+    for event in events:
+        if event.amount <= 0:
+            continue
+        income = event.category in INCOME_CATEGORIES
+        annual = event.amount * (12 if event.monthly else 1)
+        if event.end_year is None:
+            milestones.append({
+                'Year': event.start_year,
+                'Event': event.name,
+                'Amount': event.amount,
+                'Type': 'Income' if income else 'Major Expense'
+            })
+            continue
+        if event.category not in LOAN_CATEGORIES:
+            milestones.append({
+                'Year': event.start_year,
+                'Event': f'{event.name} Starts',
+                'Amount': annual,
+                'Type': 'Income' if income else 'Annual Expense'
+            })
+        if event.category in LOAN_CATEGORIES:
+            milestones.append({
+                'Year': event.end_year + 1,
+                'Event': f'{event.name} Completes',
+                'Amount': annual,
+                'Type': 'Loan End'
+            })
+        elif event.end_year > event.start_year:
+            milestones.append({
+                'Year':
+                event.end_year + 1,
+                'Event':
+                f'{event.name} Ends',
+                'Amount':
+                annual * ((1 + event.inflation)**(event.end_year - start_year)),
+                'Type':
+                'Income End' if income else 'Expense End'
+            })
+    return milestones
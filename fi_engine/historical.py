@@ -0,0 +1,74 @@
+# Historical-returns simulation: block bootstrap over a bundled table of
+# annual Indian asset returns. Whole blocks of consecutive years are drawn,
+# so runs of good and bad years (and the co-movement between asset classes
+# within a year) survive into the simulated paths.
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HISTORICAL_RETURNS_PATH = Path(__file__).parent / "data" / "india_returns.csv"
+
+# Dataset columns each asset class is resampled from, with weights. Mutual
+# funds are treated as a balanced equity/debt mix.
+HISTORICAL_SERIES = {
+    "stocks": {
+        "Equity": 1.0
+    },
+    "mf": {
+        "Equity": 0.5,
+        "Debt": 0.5
+    },
+    "fd": {
+        "FD": 1.0
+    },
+    "pf": {
+        "PF": 1.0
+    },
+}
+
+
+# Annual returns as fractions, indexed by year. Loaded once per process and
+# shared by every session.
+@lru_cache(maxsize=4)
+def historical_returns(path=HISTORICAL_RETURNS_PATH):
+    table = pd.read_csv(path, comment="#").set_index("Year").sort_index()
+    return table / 100
+
+
+# Return of each asset class in every historical year, shape (years, assets)
+@lru_cache(maxsize=4)
+def asset_return_table(path=HISTORICAL_RETURNS_PATH):
+    table = historical_returns(path)
+    columns = [
+        sum(weight * table[name] for name, weight in mix.items())
+        for mix in HISTORICAL_SERIES.values()
+    ]
+    returns = np.column_stack(columns)
+    returns.setflags(write=False)
+    return returns
+
+
+# Historical year index for every (path, year) of a circular block
+# bootstrap. Block starts are drawn once per block and every year of the
+# path is filled with a single gather.
+def block_bootstrap_indices(rng, n_history, shape, block_length):
+    n_paths, n_years = shape
+    block_length = max(1, min(block_length, n_history))
+    n_blocks = -(-n_years // block_length)
+    starts = rng.integers(0, n_history, (n_paths, n_blocks))
+    year = np.arange(n_years)
+    return (starts[:, year // block_length] + year % block_length) % n_history
+
+
+# Cumulative growth factors for each asset class, shape (paths, years),
+# keyed like HISTORICAL_SERIES
+def bootstrap_growth(rng, shape, block_length, path=HISTORICAL_RETURNS_PATH):
+    returns = asset_return_table(path)
+    index = block_bootstrap_indices(rng, len(returns), shape, block_length)
+    growth = np.cumprod(1 + returns[index], axis=1)
+    return {
+        asset: growth[..., i]
+        for i, asset in enumerate(HISTORICAL_SERIES)
+    }
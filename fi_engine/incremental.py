@@ -0,0 +1,207 @@
+# Incremental recomputation. When an edit only touches inputs that take
+# effect in later years (purchase, loan-closure and education years,
+# lump-sum amounts, planned events, the horizon end), the previous
+# projection is kept up to the first affected year and only the years after
+# it are recomputed. Patched results are identical to a full run.
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from .params import FIParams
+from .portfolio import allocated_balances, asset_steps, target_balances
+from .projection import (FLOW_RATES, batched_inputs, cached_projection,
+                         cash_flows, debt_columns, growth_factors,
+                         projection_arrays, store_projection)
+
+# Inputs that are calendar years: a change affects projections from the
+# earlier of the old and new year
+YEAR_PARAMS = ("house_construction_year", "house_loan_closure_year",
+               "car_loan_closure_year", "bike_purchase_year",
+               "kids_edu_start_year")
+
+# Inputs that only act from the year set by another input
+ANCHORED_PARAMS = {
+    "house_cost": "house_construction_year",
+    "rental_monthly_future": "house_construction_year",
+    "household_monthly_future": "house_construction_year",
+    "bike_cost": "bike_purchase_year",
+    "kids_edu_annual": "kids_edu_start_year",
+    "kids_edu_inflation": "kids_edu_start_year",
+}
+
+# Inputs that relabel rows without touching cash flows or balances. Ages
+# aren't among them because they set the tax slabs of older earners.
+LABEL_PARAMS = ("target_corpus", )
+
+# Balance columns and the asset whose value and return they grow from
+BALANCE_ASSETS = {
+    "Stocks Value": "stocks",
+    "MF Value": "mf",
+    "FD Value": "fd",
+    "PF Value": "pf",
+}
+
+
+# Engine output for one parameter set, with the growth factors it used and
+# the running sum of FD contributions discounted to the start year, which
+# later years build on
+@dataclass(frozen=True, slots=True, eq=False)
+class ProjectionState:
+    params: FIParams
+    columns: dict
+    factors: dict
+    discounted_fd: np.ndarray
+
+
+# Growth factors over the horizon: the cash-flow factors plus each asset's
+# end-of-year balance factor. Factors whose rate and horizon are unchanged
+# are taken from state.
+def horizon_factors(params, x, state=None):
+    n = params.end_year - params.start_year + 1
+    rates = dict(FLOW_RATES)
+    rates.update(
+        {asset: f"{asset}_return"
+         for asset in BALANCE_ASSETS.values()})
+    same_horizon = (state is not None
+                    and state.params.end_year == params.end_year)
+
+    factors = {}
+    for name, rate in rates.items():
+        if same_horizon and getattr(state.params, rate) == getattr(
+                params, rate):
+            factors[name] = state.factors[name]
+        elif name in FLOW_RATES:
+            factors[name] = growth_factors(x[rate], n)
+        else:
+            factors[name] = growth_factors(x[rate], n + 1)[..., 1:]
+    return factors
+
+
+# Earliest year whose cash flows differ between two parameter sets. Returns
+# new.end_year + 1 when no year within the new horizon needs recomputing.
+def first_affected_year(old, new):
+    if old.start_year != new.start_year:
+        return new.start_year
+
+    first = new.end_year + 1
+    for field in fields(FIParams):
+        name = field.name
+        before, after = getattr(old, name), getattr(new, name)
+        if before == after or name in LABEL_PARAMS:
+            continue
+        if name in ("end_year", "kids_edu_end_year"):
+            year = min(before, after) + 1
+        elif name in YEAR_PARAMS:
+            year = min(before, after)
+        elif name in ANCHORED_PARAMS:
+            anchor = ANCHORED_PARAMS[name]
+            year = min(getattr(old, anchor), getattr(new, anchor))
+        elif name == "events":
+            # Events only add to the years they're paid in; a reordered
+            # list changes how totals are summed, so it recomputes all
+            year = min((event.start_year for event in set(before) ^ set(after)),
+                       default=new.start_year)
+        elif name == "loans":
+            # A loan's payments and balance start with the loan
+            year = min((loan.start_year for loan in set(before) ^ set(after)),
+                       default=new.start_year)
+        else:
+            return new.start_year
+        first = min(first, year)
+    return max(first, new.start_year)
+
+
+def _read_only(columns):
+    for values in columns.values():
+        values.setflags(write=False)
+    return columns
+
+
+# State for params, from already computed engine columns if given
+def projection_state(params, columns=None):
+    if columns is None:
+        columns = projection_arrays(params)
+    factors = horizon_factors(params, batched_inputs(params))
+    discounted_fd = np.cumsum(columns["Annual Surplus"] / factors["fd"],
+                              axis=-1)
+    columns = _read_only({
+        name: np.array(values)
+        for name, values in columns.items()
+    })
+    return ProjectionState(params, columns, factors, discounted_fd)
+
+
+# Projection for params, reusing the rows of state that the change from
+# state.params doesn't reach
+def update_projection(state, params):
+    if state.params == params:
+        return state
+    k = first_affected_year(state.params, params) - params.start_year
+    if k <= 0:
+        return projection_state(params)
+
+    old = state.columns
+    years = np.arange(params.start_year, params.end_year + 1)
+    x = batched_inputs(params)
+    factors = horizon_factors(params, x, state)
+    flows = cash_flows(params, x, factors, first=k)
+
+    # FD keeps accumulating discounted surplus from where the kept rows
+    # left off; the other balances only depend on their own returns
+    discounted_fd = np.concatenate([
+        state.discounted_fd[:k],
+        np.cumsum(
+            np.concatenate([
+                state.discounted_fd[k - 1:k],
+                flows["Annual Surplus"] / factors["fd"][k:]
+            ]))[1:]
+    ])
+    balances = {
+        name: x[f"{asset}_val"] * factors[asset][k:]
+        for name, asset in BALANCE_ASSETS.items() if asset != "fd"
+    }
+    balances["FD Value"] = factors["fd"][k:] * (x["fd_val"] +
+                                                discounted_fd[k:])
+    # Target allocation carries on from the kept rows' balances
+    balances = allocated_balances(
+        x, balances, lambda: target_balances(
+            x, {asset: old[name][k - 1:k]
+                for name, asset in BALANCE_ASSETS.items()}, asset_steps(x),
+            flows["Annual Surplus"], np.arange(k, len(years))))
+    total_corpus = (balances["Stocks Value"] + balances["MF Value"] +
+                    balances["FD Value"] + balances["PF Value"])
+
+    columns = {
+        "Year": years,
+        "Age Me": x["age_me"] + (years - params.start_year),
+        "Age Wife": x["age_wife"] + (years - params.start_year),
+    }
+    for name, values in {
+            **flows,
+            "Unfunded Deficit": balances["Unfunded Deficit"],
+            **{name: balances[name]
+               for name in BALANCE_ASSETS},
+            "Total Corpus": total_corpus,
+            **debt_columns(params, total_corpus, first=k)
+    }.items():
+        columns[name] = np.concatenate([old[name][:k], values])
+    columns["FI Achieved?"] = columns["Total Corpus"] >= x["target_corpus"]
+    return ProjectionState(params, _read_only(columns), factors,
+                           discounted_fd)
+
+
+# Projection for params from the shared projection cache when it's there,
+# otherwise updated from state (or computed afresh without one) and added
+# to the cache, so returning to earlier inputs and other sessions reuse it
+def cached_update(state, params):
+    columns = cached_projection(params)
+    if columns is not None:
+        if state is not None and state.params == params:
+            return state
+        return projection_state(params, columns)
+    if state is None:
+        state = projection_state(params)
+    else:
+        state = update_projection(state, params)
+    store_projection(params, state.columns)
+    return state
@@ -0,0 +1,258 @@
+# Loan amortization. A loan is scheduled month by month from its start,
+# vectorized over any batch of loan inputs (such as many prepayment amounts
+# at once). The balance after month t is G_t * (principal - sum of payments
+# discounted by G), where G is the cumulative interest growth, so a schedule
+# is a cumprod and a cumsum rather than a loop over months. Only EMI
+# recalculations at rate resets need the balance reached so far.
+from dataclasses import replace
+from functools import lru_cache
+from numbers import Real
+
+import numpy as np
+import pandas as pd
+
+from .events import LOAN_CATEGORIES
+from .params import LoanParams
+
+# A balance under half a rupee counts as repaid
+PAID_OFF = 0.5
+SCHEDULE_COLUMNS = ("Rate", "EMI", "Prepayment", "Payment", "Interest",
+                    "Principal", "Balance")
+
+
+# Loans from records (dicts keyed by LoanParams field), as sent by the API,
+# stored in result metadata or entered in the app
+def loans_from_records(records):
+    loans = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Loan {i} must be an object")
+        record = dict(record)
+        for name in ("rate_resets", "prepayments"):
+            record[name] = tuple(
+                tuple(entry) for entry in record.get(name) or ())
+        loan = LoanParams(**record)
+        numbers = [
+            loan.principal, loan.rate, loan.tenure_months, loan.start_year,
+            loan.start_month, loan.annual_prepayment, loan.prepayment_month
+        ] + [value for entry in loan.rate_resets + loan.prepayments
+             for value in entry]
+        if not all(
+                isinstance(value, Real) and not isinstance(value, bool)
+                for value in numbers):
+            raise ValueError(f"{loan.name} amounts, rates, years and months "
+                             "must be numbers")
+        if loan.category not in LOAN_CATEGORIES:
+            raise ValueError(f"Unknown loan category: {loan.category} "
+                             f"(use one of {LOAN_CATEGORIES})")
+        if loan.tenure_months < 1:
+            raise ValueError(f"{loan.name} tenure must be at least a month")
+        if any(len(entry) != 3
+               for entry in loan.rate_resets + loan.prepayments):
+            raise ValueError(f"{loan.name} rate resets and prepayments must "
+                             "be (year, month, value)")
+        if not all(1 <= month <= 12 for month in [
+                loan.start_month, loan.prepayment_month
+        ] + [entry[1] for entry in loan.rate_resets + loan.prepayments]):
+            raise ValueError(f"{loan.name} months must be 1-12")
+        loans.append(loan)
+    return tuple(loans)
+
+
+def emi(balance, monthly_rate, n_months):
+    growth = (1 + monthly_rate)**n_months
+    return np.where(monthly_rate > 0,
+                    balance * monthly_rate * growth /
+                    np.where(growth > 1, growth - 1, 1), balance / n_months)
+
+
+def _start_stamp(loan):
+    return loan.start_year * 12 + loan.start_month - 1
+
+
+# Prepayments due in each month of stamp, shaped (*batch, months)
+def prepayment_amounts(loan, stamp):
+    first = _start_stamp(loan)
+    annual = ((stamp % 12 == loan.prepayment_month - 1) &
+              (stamp // 12 > loan.start_year))
+    amounts = np.where(annual,
+                       np.asarray(loan.annual_prepayment, dtype=float)[...,
+                                                                       None],
+                       0.0)
+    for year, month, amount in loan.prepayments:
+        if year * 12 + month - 1 >= first:
+            amounts = amounts + np.where(stamp == year * 12 + month - 1,
+                                         amount, 0.0)
+    return amounts
+
+
+# Month-by-month schedule for n_months from the loan's start (its tenure by
+# default). Payments are made at the end of each month; the last one only
+# clears what is left, and nothing is paid after that. Loan fields may be
+# arrays, giving columns shaped (*batch, months).
+def loan_schedule(loan, n_months=None):
+    n = n_months or loan.tenure_months
+    stamp = _start_stamp(loan) + np.arange(n)
+    principal = np.asarray(loan.principal, dtype=float)
+    rate = np.asarray(loan.rate, dtype=float)[..., None] / 12 * np.ones(n)
+    resets = sorted((year * 12 + month - 1, new_rate)
+                    for year, month, new_rate in loan.rate_resets)
+    for reset, new_rate in resets:
+        rate = np.where(stamp >= reset, new_rate / 12, rate)
+    prepay = prepayment_amounts(loan, stamp)
+    shape = np.broadcast_shapes(principal.shape + (n, ), rate.shape,
+                                prepay.shape)
+    rate, prepay = np.broadcast_to(rate, shape), np.broadcast_to(prepay, shape)
+
+    # EMI segments: the whole schedule when the EMI is kept, otherwise one
+    # per reset, with the EMI set to close the loan on its original date
+    bounds = [0]
+    if not loan.keep_emi:
+        bounds += [
+            int(reset - stamp[0]) for reset, _ in resets
+            if stamp[0] < reset <= stamp[-1]
+        ]
+    bounds = sorted(set(bounds)) + [n]
+    balance = np.empty(shape)
+    installment = np.empty(shape)
+    opening = np.broadcast_to(principal, shape[:-1])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        remaining = max(loan.tenure_months - lo, 1)
+        installment[..., lo:hi] = emi(np.maximum(opening, 0),
+                                      rate[..., lo], remaining)[..., None]
+        growth = np.cumprod(1 + rate[..., lo:hi], axis=-1)
+        balance[..., lo:hi] = growth * (opening[..., None] - np.cumsum(
+            (installment[..., lo:hi] + prepay[..., lo:hi]) / growth, axis=-1))
+        opening = balance[..., hi - 1]
+
+    closed = np.logical_or.accumulate(balance < PAID_OFF, axis=-1)
+    balance = np.where(closed, 0, balance)
+    previous = np.concatenate(
+        [np.broadcast_to(principal, shape[:-1])[..., None], balance[..., :-1]],
+        axis=-1)
+    was_open = previous > 0
+    interest = np.where(was_open, previous * rate, 0)
+    payment = np.where(closed, previous + interest,
+                       installment + prepay) * was_open
+    paid_emi = np.minimum(installment, payment)
+    return {
+        "Year": stamp // 12,
+        "Month": stamp % 12 + 1,
+        "Rate": rate * 12,
+        "EMI": paid_emi,
+        "Prepayment": payment - paid_emi,
+        "Payment": payment,
+        "Interest": interest,
+        "Principal": payment - interest,
+        "Balance": balance,
+    }
+
+
+# Schedule until the loan closes, allowing for rate rises stretching a loan
+# that keeps its EMI to three times its tenure
+def full_schedule(loan):
+    schedule = loan_schedule(loan, 3 * loan.tenure_months)
+    n = int(np.max(months_to_close(schedule)))
+    return {name: values[..., :n] for name, values in schedule.items()}
+
+
+# Months until the loan is repaid in a schedule, or n_months if it isn't
+def months_to_close(schedule):
+    closed = schedule["Balance"] <= 0
+    return np.where(closed.any(axis=-1), closed.argmax(axis=-1) + 1,
+                    closed.shape[-1])
+
+
+# Yearly totals of a single schedule: payments summed, balance at year end
+def yearly_schedule(schedule):
+    frame = pd.DataFrame({
+        name: schedule[name]
+        for name in ("Year", ) + SCHEDULE_COLUMNS
+    })
+    how = {name: "sum" for name in SCHEDULE_COLUMNS}
+    how.update(Rate="last", Balance="last")
+    return frame.groupby("Year").agg(how).reset_index()
+
+
+# Payments into each loan category and the total outstanding balance over
+# the years start_year..end_year (or their months), for loans shared by
+# every plan in a batch. Loans that started earlier are scheduled from their
+# own start so the balance carried into the projection is right.
+@lru_cache(maxsize=64)
+def loan_totals(loans, start_year, end_year, monthly=False):
+    stamp = np.arange(start_year * 12, (end_year + 1) * 12)
+    totals = {category: np.zeros(len(stamp)) for category in LOAN_CATEGORIES}
+    balance = np.zeros(len(stamp))
+    for loan in loans:
+        offset = stamp - _start_stamp(loan)
+        if offset[-1] < 0:
+            continue
+        schedule = loan_schedule(loan, int(offset[-1]) + 1)
+        active = offset >= 0
+        index = np.where(active, offset, 0)
+        totals[loan.category] += np.where(active,
+                                          schedule["Payment"][index], 0)
+        balance += np.where(active, schedule["Balance"][index], 0)
+    if not monthly:
+        totals = {
+            category: values.reshape(-1, 12).sum(axis=1)
+            for category, values in totals.items()
+        }
+        balance = balance[11::12]
+    for values in list(totals.values()) + [balance]:
+        values.setflags(write=False)
+    return totals, balance
+
+
+# Prepaying versus investing each of amounts (a yearly prepayment on top of
+# the loan's own) until the loan without it would close. Both strategies
+# spend the same every month: the loan's usual payment plus the amount in
+# its prepayment month. Prepaying sends the amount to the loan and invests
+# whatever the loan no longer needs once it closes (or its lower EMI);
+# investing keeps the loan as it is and invests the amount. Investments
+# grow at invest_return a year, compounded monthly. All amounts are
+# compared in one batched schedule.
+def prepay_vs_invest(loan, amounts, invest_return):
+    amounts = np.asarray(amounts, dtype=float)
+    base = full_schedule(loan)
+    n = len(base["Balance"])
+    prepaid = loan_schedule(
+        replace(loan, annual_prepayment=loan.annual_prepayment + amounts), n)
+
+    stamp = _start_stamp(loan) + np.arange(n)
+    extra = prepayment_amounts(
+        replace(loan, annual_prepayment=amounts, prepayments=()), stamp)
+    budget = base["Payment"] + extra
+    monthly_return = (1 + invest_return)**(1 / 12) - 1
+    # Each month's investment grows to the end of the last month
+    growth = (1 + monthly_return)**np.arange(n - 1, -1, -1)
+    prepay_invested = ((budget - prepaid["Payment"]) * growth).sum(axis=-1)
+    invest_invested = (extra * growth).sum(axis=-1)
+    prepay_worth = prepay_invested - prepaid["Balance"][..., -1]
+    invest_worth = invest_invested - base["Balance"][..., -1]
+    return pd.DataFrame({
+        "Annual Prepayment": amounts,
+        "Months Saved": n - months_to_close(prepaid),
+        "Interest Saved":
+        base["Interest"].sum() - prepaid["Interest"].sum(axis=-1),
+        "Net Worth (Prepay)": prepay_worth,
+        "Net Worth (Invest)": invest_worth,
+        "Prepay Advantage": prepay_worth - invest_worth,
+    })
+
+
+# Timeline entries for the year each loan is repaid in full
+def loan_milestones(loans):
+    milestones = []
+    for loan in loans:
+        schedule = full_schedule(loan)
+        if loan.principal <= 0 or schedule["Balance"][-1] > 0:
+            continue
+        closed = _start_stamp(loan) + len(schedule["Balance"])
+        milestones.append({
+            'Year': closed // 12,
+            'Event': f'{loan.name} Completes',
+            'Amount': 12 * schedule["EMI"][0],
+            'Type': 'Loan End'
+        })
+    return milestones
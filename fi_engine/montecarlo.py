@@ -0,0 +1,92 @@
+# Monte Carlo simulation of asset returns over the deterministic cash flows
+import numpy as np
+import pandas as pd
+
+from .historical import bootstrap_growth
+from .portfolio import ASSET_COLUMNS, target_balances, uses_targets
+from .projection import batched_inputs, projection_columns
+
+
+# Cumulative growth factors for simulated returns, shape (paths, years).
+# Factor t is the growth applied by the end of year t.
+def simulated_growth(rng, mean, vol, shape, distribution):
+    if distribution == "Normal":
+        returns = rng.normal(mean, vol, shape)
+        # A year can't lose more than the whole balance
+        np.maximum(returns, -0.99, out=returns)
+        return np.cumprod(1 + returns, axis=1)
+    # Log-normal gross returns matched to the same mean and volatility
+    sigma2 = np.log1p(vol**2 / (1 + mean)**2)
+    log_returns = rng.normal(np.log1p(mean) - sigma2 / 2, np.sqrt(sigma2),
+                             shape)
+    return np.exp(np.cumsum(log_returns, axis=1))
+
+
+# Growth factors for each asset class over one chunk of paths, either from
+# the chosen return distribution or resampled from historical returns
+def asset_growth(rng, params, sim, shape):
+    if sim.distribution == "Historical":
+        return bootstrap_growth(rng, shape, sim.block_length)
+    return {
+        asset:
+        simulated_growth(rng, getattr(params, f"{asset}_return"),
+                         getattr(sim, f"{asset}_vol"), shape,
+                         sim.distribution)
+        for asset in ("stocks", "mf", "pf", "fd")
+    }
+
+
+# Simulate total corpus for every path as one (paths x years) computation.
+# Cash flows don't depend on returns, so the deterministic surplus is shared
+# by all paths. Paths are processed in chunks to bound peak memory. Under
+# target allocation the surplus is invested and rebalanced along each path.
+def simulate_corpus_paths(params, sim, chunk_elements=2000000):
+    surplus = projection_columns(params)["Annual Surplus"]
+    n = len(surplus)
+    rng = np.random.default_rng(sim.seed)
+    corpus = np.empty((sim.n_paths, n), dtype=np.float32)
+    chunk = max(1, chunk_elements // n)
+    x = batched_inputs(params)
+    targeted = uses_targets(x).all()
+
+    for lo in range(0, sim.n_paths, chunk):
+        hi = min(lo + chunk, sim.n_paths)
+        growth = asset_growth(rng, params, sim, (hi - lo, n))
+        if targeted:
+            steps = {
+                asset: growth[asset] /
+                np.concatenate([np.ones((hi - lo, 1)), growth[asset][:, :-1]],
+                               axis=1)
+                for asset in ASSET_COLUMNS
+            }
+            balances = target_balances(
+                x, {asset: x[f"{asset}_val"]
+                    for asset in ASSET_COLUMNS}, steps, surplus, np.arange(n))
+            corpus[lo:hi] = sum(balances[name]
+                                for name in ASSET_COLUMNS.values())
+            continue
+        paths = params.stocks_val * growth["stocks"]
+        paths += params.mf_val * growth["mf"]
+        paths += params.pf_val * growth["pf"]
+        fd_factor = growth["fd"]
+        paths += fd_factor * (params.fd_val +
+                              np.cumsum(surplus / fd_factor, axis=1))
+        corpus[lo:hi] = paths
+
+    return corpus
+
+
+# Percentiles and probability of reaching the target for each year
+def corpus_path_summary(corpus, years, target_corpus):
+    reached = corpus >= target_corpus
+    percentiles = np.percentile(corpus, [5, 25, 50, 75, 95], axis=0)
+    return pd.DataFrame({
+        "Year": years,
+        "P5": percentiles[0],
+        "P25": percentiles[1],
+        "Median": percentiles[2],
+        "P75": percentiles[3],
+        "P95": percentiles[4],
+        "P(Corpus >= Target)": reached.mean(axis=0),
+        "P(FI by Year)": np.logical_or.accumulate(reached, axis=1).mean(axis=0)
+    })
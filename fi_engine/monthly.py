@@ -0,0 +1,223 @@
+# Monthly-resolution cash-flow engine. Salary, expenses, EMIs and SIPs are
+# evaluated for every month of the horizon and balances compound monthly, so
+# intra-year timing of construction, purchases and loan closure shows up in
+# the corpus. Yearly rollups carry the same columns as projection_arrays.
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .portfolio import (ASSET_COLUMNS, allocated_balances, asset_steps,
+                        target_balances)
+from .projection import (batched_inputs, debt_columns, growth_factors,
+                         planned_events, rounded_frame)
+from .tax import income_tax
+
+
+# Annual compounding factors held constant across the 12 months of each year
+def _monthly_steps(rate, n):
+    return np.repeat(growth_factors(rate, n), 12, axis=-1)
+
+
+# Balance after each month when it compounds at the monthly equivalent of an
+# annual rate and receives a contribution at the end of every month
+def _monthly_balance(initial, annual_rate, contributions):
+    months = contributions.shape[-1]
+    factor = growth_factors((1 + annual_rate)**(1 / 12) - 1,
+                            months + 1)[..., 1:]
+    return factor * (initial + np.cumsum(contributions / factor, axis=-1))
+
+
+# Sum of each year's 12 months along the last axis
+def _yearly_totals(values, n):
+    values = np.asarray(values)
+    return values.reshape(values.shape[:-1] + (n, 12)).sum(axis=-1)
+
+
+# Month-by-month engine. Inputs may be batched exactly as in
+# projection_arrays; outputs are unrounded columns shaped (*batch, months).
+def monthly_arrays(p, m):
+    years = np.arange(p.start_year, p.end_year + 1)
+    n = len(years)
+    month_year = np.repeat(years, 12)
+    month_of_year = np.tile(np.arange(1, 13), n)
+    # Months since year 0, so (year, month) pairs compare as one number
+    stamp = month_year * 12 + month_of_year - 1
+    x = batched_inputs(p)
+    y = batched_inputs(m)
+
+    def at(year, month):
+        return year * 12 + month - 1
+
+    # Shared growth factors for the whole horizon
+    income_factor = _monthly_steps(x["income_growth"], n)
+    inflation_factor = _monthly_steps(x["inflation_exp"], n)
+    fuel_factor = _monthly_steps(x["inflation_fuel"], n)
+    vacation_factor = _monthly_steps(x["vacation_inflation"], n)
+    sip_factor = _monthly_steps(y["sip_step_up"], n)
+    house_month = at(x["house_construction_year"],
+                     y["house_construction_month"])
+    before_house = stamp < house_month
+    billing_month = month_of_year == y["annual_expense_month"]
+
+    # Income
+    salary_me = x["salary_me_monthly"] * income_factor
+    salary_wife = x["salary_wife_monthly"] * income_factor
+    rental_income = np.where(before_house, x["rental_monthly_now"],
+                             x["rental_monthly_future"])
+    events = planned_events(p, m)
+    other_income = events["Other Income"]
+    total_income = salary_me + salary_wife + rental_income + other_income
+
+    # Income tax is assessed on each year's totals and deducted evenly
+    # through the year, as TDS would be
+    tax_years = years - p.start_year
+    rent_share = _yearly_totals(rental_income, n) / 2
+    other_share = _yearly_totals(other_income, n) / 2
+    annual_tax = (income_tax(_yearly_totals(salary_me, n),
+                             x["age_me"] + tax_years, x["tax_regime"],
+                             rent_share, other_share,
+                             x["old_regime_deductions"]) +
+                  income_tax(_yearly_totals(salary_wife, n),
+                             x["age_wife"] + tax_years, x["tax_regime"],
+                             rent_share, other_share,
+                             x["old_regime_deductions"]))
+    tax = np.repeat(annual_tax / 12, 12, axis=-1)
+
+    # Expenses
+    household_exp = np.where(before_house, x["household_monthly_now"],
+                             x["household_monthly_future"]) * inflation_factor
+    personal_exp = x["personal_monthly"] * inflation_factor
+    fuel_exp = x["fuel_monthly"] * fuel_factor
+    house_loan = events["House Loan EMI"]
+    car_loan = events["Car Loan EMI"]
+    vacation_exp = np.where(billing_month,
+                            x["vacation_annual"] * vacation_factor, 0)
+    kids_edu = events["Kids Education"]
+    other_exp = events["Other Expenses"]
+
+    total_exp = (household_exp + personal_exp + fuel_exp + house_loan +
+                 car_loan + vacation_exp + kids_edu + other_exp)
+
+    # Lump sums
+    lump_sum = events["Lump Sum"]
+
+    # Monthly surplus; SIPs go to stocks and MF, the rest to FD
+    surplus = total_income - tax - total_exp - lump_sum
+    sip_stocks = y["sip_stocks_monthly"] * sip_factor
+    sip_mf = y["sip_mf_monthly"] * sip_factor
+
+    shape = np.broadcast_shapes(surplus.shape, sip_stocks.shape,
+                                sip_mf.shape)
+    zeros = np.zeros(shape)
+    curr_stocks_val = _monthly_balance(x["stocks_val"], x["stocks_return"],
+                                       sip_stocks + zeros)
+    curr_mf_val = _monthly_balance(x["mf_val"], x["mf_return"], sip_mf + zeros)
+    curr_pf_val = _monthly_balance(x["pf_val"], x["pf_return"], zeros)
+    curr_fd_val = _monthly_balance(x["fd_val"], x["fd_return"],
+                                   surplus - sip_stocks - sip_mf + zeros)
+
+    # Or, beyond the SIPs, it is invested towards target weights
+    balances = allocated_balances(
+        x, {
+            "Stocks Value": curr_stocks_val,
+            "MF Value": curr_mf_val,
+            "FD Value": curr_fd_val,
+            "PF Value": curr_pf_val
+        }, lambda: target_balances(
+            x, {asset: x[f"{asset}_val"]
+                for asset in ASSET_COLUMNS},
+            asset_steps(x, 12),
+            surplus - sip_stocks - sip_mf,
+            np.arange(12 * n),
+            periods_per_year=12,
+            fixed={
+                "stocks": sip_stocks,
+                "mf": sip_mf
+            }))
+    total_corpus = (balances["Stocks Value"] + balances["MF Value"] +
+                    balances["FD Value"] + balances["PF Value"])
+
+    return {
+        "Year": month_year,
+        "Month": month_of_year,
+        "Total Income": np.broadcast_to(total_income, shape),
+        "Income Tax": np.broadcast_to(tax, shape),
+        "Total Expenses": np.broadcast_to(total_exp + lump_sum, shape),
+        "Annual Surplus": np.broadcast_to(surplus, shape),
+        "Household Exp": np.broadcast_to(household_exp, shape),
+        "Personal Exp": np.broadcast_to(personal_exp, shape),
+        "Fuel Exp": np.broadcast_to(fuel_exp, shape),
+        "Vacation Exp": np.broadcast_to(vacation_exp, shape),
+        "Kids Education": np.broadcast_to(kids_edu, shape),
+        "House Loan EMI": np.broadcast_to(house_loan, shape),
+        "Car Loan EMI": np.broadcast_to(car_loan, shape),
+        "Other Expenses": np.broadcast_to(other_exp, shape),
+        "Lump Sum": np.broadcast_to(lump_sum, shape),
+        "Other Income": np.broadcast_to(other_income, shape),
+        "SIP Stocks": np.broadcast_to(sip_stocks, shape),
+        "SIP MF": np.broadcast_to(sip_mf, shape),
+        "Unfunded Deficit": balances["Unfunded Deficit"],
+        "Stocks Value": balances["Stocks Value"],
+        "MF Value": balances["MF Value"],
+        "FD Value": balances["FD Value"],
+        "PF Value": balances["PF Value"],
+        "Total Corpus": total_corpus,
+        **debt_columns(p, total_corpus, monthly=True),
+        "FI Achieved?": total_corpus >= x["target_corpus"]
+    }
+
+
+# Flow columns are summed over each year; balances are taken at year end
+FLOW_COLUMNS = ("Total Income", "Income Tax", "Total Expenses",
+                "Annual Surplus", "Household Exp", "Personal Exp", "Fuel Exp",
+                "Vacation Exp", "Kids Education", "House Loan EMI",
+                "Car Loan EMI", "Other Expenses", "Lump Sum", "Other Income",
+                "Unfunded Deficit")
+BALANCE_COLUMNS = ("Stocks Value", "MF Value", "FD Value", "PF Value",
+                   "Total Corpus", "Loan Balance", "Net Worth")
+
+
+# Collapse monthly columns into the yearly layout of projection_arrays
+def yearly_rollup(p, monthly):
+    years = monthly["Year"][11::12]
+    x = batched_inputs(p)
+    columns = {
+        "Year": years,
+        "Age Me": x["age_me"] + (years - p.start_year),
+        "Age Wife": x["age_wife"] + (years - p.start_year),
+    }
+    for name in FLOW_COLUMNS:
+        columns[name] = _yearly_totals(monthly[name], len(years))
+    for name in BALANCE_COLUMNS:
+        columns[name] = monthly[name][..., 11::12]
+    columns["FI Achieved?"] = columns["Total Corpus"] >= x["target_corpus"]
+    return columns
+
+
+# Memoized monthly engine output for a single parameter set
+@lru_cache(maxsize=64)
+def monthly_columns(params, monthly_params):
+    columns = monthly_arrays(params, monthly_params)
+    for values in columns.values():
+        values.setflags(write=False)
+    return columns
+
+
+# Yearly projections from the monthly engine, same layout as projection_frame
+def monthly_projection_frame(params, monthly_params):
+    return rounded_frame(
+        yearly_rollup(params, monthly_columns(params, monthly_params)))
+
+
+# Month-by-month detail for one parameter set, rounded to whole rupees
+def monthly_frame(params, monthly_params):
+    columns = monthly_columns(params, monthly_params)
+    frame = {}
+    for name, values in columns.items():
+        if name == "FI Achieved?":
+            values = np.where(values, "Yes", "No")
+        elif name not in ("Year", "Month"):
+            values = np.round(values, 0)
+        frame[name] = values
+    return pd.DataFrame(frame)
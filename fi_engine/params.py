@@ -0,0 +1,202 @@
+# Parameter objects shared by the projection engine, the Streamlit app and
+# the batch tools
+from dataclasses import dataclass
+
+
+# One planned income or expense. Amounts are in start-year money and grow at
+# inflation from the start of the projection. A one-off event (end_year
+# None) is paid once in month of start_year; a recurring one is paid every
+# year from start_year to end_year in that month, or every month from
+# (start_year, month) to (end_year, end_month) when monthly is set.
+@dataclass(frozen=True, slots=True)
+class CashFlowEvent:
+    name: str
+    category: str
+    amount: float
+    start_year: int
+    end_year: int | None = None
+    inflation: float = 0.0
+    month: int = 1
+    monthly: bool = False
+    end_month: int = 12
+
+
+# Amortizing loan. rate is the annual interest rate, charged monthly, and
+# the EMI closes the loan after tenure_months. rate_resets are (year, month,
+# rate) for floating rates and prepayments are (year, month, amount) lump
+# sums; annual_prepayment is paid in prepayment_month of every year after
+# the loan starts. With keep_emi, resets and prepayments change how long the
+# loan runs; otherwise the EMI is recomputed at each reset to close the
+# loan on its original date. Payments are totalled into category.
+@dataclass(frozen=True, slots=True)
+class LoanParams:
+    name: str
+    category: str
+    principal: float
+    rate: float
+    tenure_months: int
+    start_year: int
+    start_month: int = 1
+    rate_resets: tuple = ()
+    prepayments: tuple = ()
+    annual_prepayment: float = 0
+    prepayment_month: int = 1
+    keep_emi: bool = True
+
+
+# All projection inputs. Frozen and slotted so a parameter set is small,
+# immutable and hashable, which is what results are memoized on. Batched runs
+# replace fields with arrays; those instances are never cached.
+@dataclass(frozen=True, slots=True)
+class FIParams:
+    start_year: int
+    end_year: int
+    target_corpus: float
+    age_me: int
+    age_wife: int
+    salary_me_monthly: float
+    salary_wife_monthly: float
+    rental_monthly_now: float
+    rental_monthly_future: float
+    income_growth: float
+    stocks_val: float
+    mf_val: float
+    fd_val: float
+    pf_val: float
+    stocks_return: float
+    mf_return: float
+    fd_return: float
+    pf_return: float
+    household_monthly_now: float
+    household_monthly_future: float
+    personal_monthly: float
+    fuel_monthly: float
+    inflation_exp: float
+    inflation_fuel: float
+    house_loan_emi: float
+    house_loan_closure_year: int
+    car_loan_emi: float
+    car_loan_closure_year: int
+    vacation_annual: float
+    vacation_inflation: float
+    kids_edu_annual: float
+    kids_edu_start_year: int
+    kids_edu_end_year: int
+    kids_edu_inflation: float
+    house_construction_year: int
+    house_cost: float
+    bike_cost: float
+    bike_purchase_year: int
+    # Income tax regime: "new", "old" or "none" for pre-tax figures.
+    # Deductions such as 80C and 80D only apply under the old regime.
+    tax_regime: str = "new"
+    old_regime_deductions: float = 150000
+    # How the surplus is invested (see fi_engine/portfolio.py). "Surplus to
+    # FD" puts it all in FD, which a deficit can take below zero. "Target
+    # Allocation" invests it towards target weights whose equity share
+    # glides from equity_start to equity_end between glide_start_age and
+    # glide_end_age, split between stocks and MF by stocks_share; deficits
+    # sell FD, MF, stocks, then PF. Every rebalance_every years the traded
+    # assets are rebalanced ("Calendar"), or only if one is more than
+    # rebalance_band off target ("Threshold"), or never ("None").
+    allocation: str = "Surplus to FD"
+    equity_start: float = 0.6
+    equity_end: float = 0.3
+    glide_start_age: int = 35
+    glide_end_age: int = 60
+    stocks_share: float = 0.5
+    rebalancing: str = "Calendar"
+    rebalance_every: int = 1
+    rebalance_band: float = 0.05
+    # Planned events beyond the built-in ones above, as a tuple of
+    # CashFlowEvent. Shared by every parameter set in a batch.
+    events: tuple = ()
+    # Amortizing loans as a tuple of LoanParams, also shared by a batch.
+    # Their outstanding balance is subtracted from the corpus for net worth.
+    loans: tuple = ()
+
+
+# Monte Carlo settings, kept apart from FIParams so deterministic results
+# stay cached when only simulation settings change
+@dataclass(frozen=True, slots=True)
+class SimulationParams:
+    n_paths: int
+    distribution: str
+    stocks_vol: float
+    mf_vol: float
+    fd_vol: float
+    pf_vol: float
+    seed: int
+    # Years per resampled block when distribution is "Historical"
+    block_length: int = 5
+
+
+# Post-FI drawdown settings. strategy is "Fixed" (a fixed real amount),
+# "Percentage" (a share of the current balance) or "Guardrails". Drawdown
+# starts after retirement_year, or after the first FI year when it is 0.
+@dataclass(frozen=True, slots=True)
+class DrawdownParams:
+    strategy: str = "Fixed"
+    years: int = 50
+    withdrawal_rate: float = 0.04
+    retirement_year: int = 0
+    guardrail_band: float = 0.20
+    guardrail_adjustment: float = 0.10
+
+
+# Intra-year timing for the monthly engine. Months run 1-12; an event in
+# month M of its year takes effect from that month. The defaults (everything
+# in January, no SIPs) reproduce the yearly model's cash flows.
+@dataclass(frozen=True, slots=True)
+class MonthlyParams:
+    house_construction_month: int = 1
+    bike_purchase_month: int = 1
+    house_loan_closure_month: int = 1
+    car_loan_closure_month: int = 1
+    annual_expense_month: int = 1
+    sip_stocks_monthly: float = 0
+    sip_mf_monthly: float = 0
+    sip_step_up: float = 0
+
+
+# Sidebar defaults, used to fill in inputs a caller doesn't provide
+DEFAULT_PARAMS = FIParams(start_year=2025,
+                          end_year=2037,
+                          target_corpus=80000000,
+                          age_me=33,
+                          age_wife=32,
+                          salary_me_monthly=195000,
+                          salary_wife_monthly=150000,
+                          rental_monthly_now=35000,
+                          rental_monthly_future=55000,
+                          income_growth=0.05,
+                          stocks_val=3000000,
+                          mf_val=2500000,
+                          fd_val=2000000,
+                          pf_val=1500000,
+                          stocks_return=0.12,
+                          mf_return=0.10,
+                          fd_return=0.07,
+                          pf_return=0.08,
+                          household_monthly_now=50000,
+                          household_monthly_future=40000,
+                          personal_monthly=15000,
+                          fuel_monthly=6000,
+                          inflation_exp=0.07,
+                          inflation_fuel=0.05,
+                          house_loan_emi=44000,
+                          house_loan_closure_year=2028,
+                          car_loan_emi=12500,
+                          car_loan_closure_year=2027,
+                          vacation_annual=200000,
+                          vacation_inflation=0.07,
+                          kids_edu_annual=300000,
+                          kids_edu_start_year=2028,
+                          kids_edu_end_year=2035,
+                          kids_edu_inflation=0.10,
+                          house_construction_year=2028,
+                          house_cost=10000000,
+                          bike_cost=450000,
+                          bike_purchase_year=2028,
+                          tax_regime="new",
+                          old_regime_deductions=150000)
@@ -0,0 +1,176 @@
+# Portfolio contributions, rebalancing and glide path. Under "Target
+# Allocation" each period's surplus is invested towards target weights for
+# stocks, MF and FD whose equity share glides with age, a deficit is met by
+# selling assets in a fixed order, and the traded assets are rebalanced on a
+# calendar or when they drift too far from target. PF can't be traded, so it
+# only grows and is sold last. Balances depend on the path taken, so the
+# kernel steps through the periods in order, vectorized over every parameter
+# set and simulated path at once.
+import numpy as np
+
+ALLOCATIONS = ("Surplus to FD", "Target Allocation")
+REBALANCING = ("None", "Calendar", "Threshold")
+
+# Balance column of each asset
+ASSET_COLUMNS = {
+    "stocks": "Stocks Value",
+    "mf": "MF Value",
+    "fd": "FD Value",
+    "pf": "PF Value",
+}
+TRADED_ASSETS = ("stocks", "mf", "fd")
+# Assets are sold in this order to cover a deficit
+LIQUIDATION_ORDER = ("fd", "mf", "stocks", "pf")
+
+
+# Which parameter sets use target allocation. Raises on unknown settings.
+def uses_targets(x):
+    for name, options in (("allocation", ALLOCATIONS), ("rebalancing",
+                                                         REBALANCING)):
+        unknown = set(np.unique(x[name])) - set(options)
+        if unknown:
+            raise ValueError(f"Unknown {name}: {unknown.pop()} "
+                             f"(use one of {options})")
+    return x["allocation"] == "Target Allocation"
+
+
+# Growth multiplier of each asset per period: its return over a year, or the
+# monthly equivalent with twelve periods a year
+def asset_steps(x, periods_per_year=1):
+    return {
+        asset: 1 + ((1 + x[f"{asset}_return"])**(1 / periods_per_year) - 1)
+        if periods_per_year > 1 else 1 + x[f"{asset}_return"]
+        for asset in ASSET_COLUMNS
+    }
+
+
+# Target weight of each traded asset at the given ages. The equity share
+# moves linearly from equity_start to equity_end between glide_start_age and
+# glide_end_age, and equity is split between stocks and MF by stocks_share.
+def target_weights(x, age):
+    span = x["glide_end_age"] - x["glide_start_age"]
+    progress = np.where(
+        span > 0,
+        np.clip((age - x["glide_start_age"]) / np.where(span > 0, span, 1), 0,
+                1), age >= x["glide_start_age"])
+    equity = x["equity_start"] + (x["equity_end"] -
+                                  x["equity_start"]) * progress
+    return {
+        "stocks": equity * x["stocks_share"],
+        "mf": equity * (1 - x["stocks_share"]),
+        "fd": 1 - equity,
+    }
+
+
+# Balances under target allocation for the given periods of the horizon
+# (period 0 is the first month or year), starting from initial balances
+# (*batch, 1) at the end of the period before. steps are each asset's growth
+# multiplier per period, cash the surplus (or deficit) left at the end of
+# each period and fixed any contributions made to an asset regardless of
+# targets, such as SIPs. Rebalancing is reviewed at the end of every
+# rebalance_every-th year: "Calendar" always rebalances then, "Threshold"
+# only when an asset is more than rebalance_band off its target. Returns the
+# balance columns and the deficit no asset was left to cover.
+def target_balances(x,
+                    initial,
+                    steps,
+                    cash,
+                    periods,
+                    periods_per_year=1,
+                    fixed=None):
+    fixed = fixed or {}
+    year = periods // periods_per_year
+    weights = target_weights(x, x["age_me"] + year)
+    every = np.maximum(x["rebalance_every"], 1)
+    review = ((periods % periods_per_year == periods_per_year - 1) &
+              ((year + 1) % every == 0) & (x["rebalancing"] != "None"))
+    band = np.where(x["rebalancing"] == "Threshold", x["rebalance_band"], 0)
+
+    shape = np.broadcast_shapes(
+        np.shape(cash), np.shape(review), np.shape(band),
+        *(np.shape(values) for values in [
+            *initial.values(), *steps.values(), *weights.values(),
+            *fixed.values()
+        ]))
+    shape = shape[:-1] + (len(periods), )
+
+    # Assets along a leading axis, traded ones first, so each period is a
+    # handful of whole-array operations
+    assets = tuple(ASSET_COLUMNS)
+    n_traded = len(TRADED_ASSETS)
+    order = [assets.index(asset) for asset in LIQUIDATION_ORDER]
+
+    def stacked(values, names):
+        return np.stack([np.broadcast_to(values[name], shape) for name in names])
+
+    steps = stacked(steps, assets)
+    weights = stacked(weights, TRADED_ASSETS)
+    fixed = stacked({asset: fixed.get(asset, 0) for asset in assets},
+                    assets) if fixed else None
+    cash = np.broadcast_to(cash, shape)
+    review = np.broadcast_to(review, shape)
+    band = np.broadcast_to(band, shape)
+    balances = np.stack([
+        np.broadcast_to(np.asarray(initial[asset])[..., 0], shape[:-1])
+        for asset in assets
+    ]).astype(float)
+    held = balances[:n_traded]
+    out = np.empty((len(assets), ) + shape)
+    deficit = np.empty(shape)
+
+    for t in range(shape[-1]):
+        balances *= steps[..., t]
+        if fixed is not None:
+            balances += fixed[..., t]
+        target = weights[..., t]
+
+        # New money goes to the assets furthest below target; the gaps
+        # always add up to at least the inflow
+        inflow = np.maximum(cash[..., t], 0)
+        gaps = np.maximum(target * (held.sum(axis=0) + inflow) - held, 0)
+        total_gap = gaps.sum(axis=0)
+        has_gap = total_gap > 0
+        held += inflow * np.where(
+            has_gap, gaps / np.where(has_gap, total_gap, 1), target)
+
+        need = np.maximum(-cash[..., t], 0)
+        if need.any():
+            for i in order:
+                sold = np.clip(balances[i], 0, need)
+                balances[i] -= sold
+                need = need - sold
+        deficit[..., t] = need
+
+        if review[..., t].any():
+            total = held.sum(axis=0)
+            drift = np.abs(held / np.where(total > 0, total, 1) -
+                           target).max(axis=0)
+            rebalance = review[..., t] & (total > 0) & (drift > band[..., t])
+            held[...] = np.where(rebalance, target * total, held)
+
+        out[..., t] = balances
+
+    return {
+        **{ASSET_COLUMNS[asset]: out[i]
+           for i, asset in enumerate(assets)}, "Unfunded Deficit": deficit
+    }
+
+
+# Balance columns for a batch: the surplus-to-FD balances where the
+# allocation is "Surplus to FD" (which never leaves a deficit unfunded), and
+# those from allocate() where it is "Target Allocation"
+def allocated_balances(x, surplus_to_fd, allocate):
+    targeted = uses_targets(x)
+    if not targeted.any():
+        return {
+            **surplus_to_fd, "Unfunded Deficit":
+            np.zeros(np.shape(surplus_to_fd["FD Value"]))
+        }
+    allocated = allocate()
+    if targeted.all():
+        return allocated
+    return {
+        name:
+        np.where(targeted, allocated[name], surplus_to_fd.get(name, 0))
+        for name in allocated
+    }
@@ -0,0 +1,318 @@
+# Deterministic year-by-year projection engine. No Streamlit dependency, so
+# it can be imported by the app, batch jobs and other tools alike.
+import threading
+from collections import OrderedDict
+from dataclasses import fields, replace
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .events import (EVENT_CATEGORIES, builtin_events, compile_events,
+                     event_table, event_totals)
+from .loans import loan_totals
+from .portfolio import (ASSET_COLUMNS, allocated_balances, asset_steps,
+                        target_balances)
+from .tax import income_tax
+
+
+# Compounding factors (1 + rate)**t for t = 0..n-1, built once as a running
+# product along the last axis so every expense line can share them. Rate is
+# a scalar or an array shaped (..., 1) for batched evaluation.
+def growth_factors(rate, n):
+    rate = np.asarray(rate, dtype=float)
+    steps = np.broadcast_to(1 + rate, np.broadcast_shapes(rate.shape,
+                                                          (n, ))).copy()
+    steps[..., 0] = 1.0
+    return np.cumprod(steps, axis=-1)
+
+
+# Projection inputs that must stay scalar because they define the horizon
+HORIZON_PARAMS = ("start_year", "end_year")
+# Inputs shared by every parameter set in a batch
+SHARED_PARAMS = ("events", "loans")
+
+
+# Parameter fields as arrays with a trailing time axis, ready to broadcast
+# against per-year (or per-month) arrays
+def batched_inputs(p):
+    return {
+        field.name: np.asarray(getattr(p, field.name))[..., None]
+        for field in fields(p)
+        if field.name not in HORIZON_PARAMS + SHARED_PARAMS
+    }
+
+
+# Rates the cash flows compound at, by growth-factor name
+FLOW_RATES = {
+    "income": "income_growth",
+    "inflation": "inflation_exp",
+    "fuel": "inflation_fuel",
+    "vacation": "vacation_inflation",
+}
+
+
+def flow_factors(x, n):
+    return {
+        name: growth_factors(x[rate], n)
+        for name, rate in FLOW_RATES.items()
+    }
+
+
+def _compiled_totals(events, start_year, end_year, monthly):
+    table = event_table(events)
+    growth = growth_factors(table["inflation"][..., None],
+                            end_year - start_year + 1)
+    return event_totals(
+        compile_events(table, start_year, end_year, growth, monthly),
+        table["amount"])
+
+
+# Totals of user-defined events, compiled once per event list and horizon
+@lru_cache(maxsize=64)
+def custom_event_totals(events, start_year, end_year, monthly=False):
+    totals = _compiled_totals(events, start_year, end_year, monthly)
+    totals.setflags(write=False)
+    return totals
+
+
+# Planned-event totals by category for every year (or every month, given
+# monthly settings m): the built-in events from p's dedicated inputs plus
+# p.events, with payments on p.loans added to their categories. Values are
+# shaped (*batch, periods).
+def planned_events(p, m=None):
+    totals = _compiled_totals(builtin_events(p, m), p.start_year, p.end_year,
+                              m is not None)
+    if p.events:
+        totals = totals + custom_event_totals(p.events, p.start_year,
+                                              p.end_year, m is not None)
+    events = dict(zip(EVENT_CATEGORIES, np.moveaxis(totals, -2, 0)))
+    if p.loans:
+        payments, _ = loan_totals(p.loans, p.start_year, p.end_year,
+                                  m is not None)
+        for category, values in payments.items():
+            events[category] = events[category] + values
+    return events
+
+
+# Outstanding balance on p.loans and net worth after it (the corpus less
+# that balance) for periods[first:] of the horizon. The flat EMIs of the
+# dedicated loan inputs have no balance to subtract.
+def debt_columns(p, total_corpus, first=0, monthly=False):
+    balance = np.zeros(total_corpus.shape[-1])
+    if p.loans:
+        balance = loan_totals(p.loans, p.start_year, p.end_year,
+                              monthly)[1][first:]
+    return {
+        "Loan Balance": np.broadcast_to(balance, total_corpus.shape),
+        "Net Worth": total_corpus - balance
+    }
+
+
+# Income, expense and lump-sum lines for years[first:] of the horizon, from
+# growth factors covering the whole horizon. Slicing the shared factors means
+# a suffix computed on its own matches the full computation exactly.
+def cash_flows(p, x, factors, first=0):
+    years = np.arange(p.start_year, p.end_year + 1)[first:]
+    income_factor = factors["income"][..., first:]
+    inflation_factor = factors["inflation"][..., first:]
+    fuel_factor = factors["fuel"][..., first:]
+    vacation_factor = factors["vacation"][..., first:]
+    events = {
+        name: values[..., first:]
+        for name, values in planned_events(p).items()
+    }
+    before_house = years < x["house_construction_year"]
+
+    # Income
+    salary_me = x["salary_me_monthly"] * 12 * income_factor
+    salary_wife = x["salary_wife_monthly"] * 12 * income_factor
+    rental_income = np.where(before_house, x["rental_monthly_now"],
+                             x["rental_monthly_future"]) * 12
+    other_income = events["Other Income"]
+    total_income = salary_me + salary_wife + rental_income + other_income
+
+    # Income tax, each earner assessed on their own salary and half the
+    # rent (as joint owners of the property) and of planned other income.
+    # Investment growth isn't taxed here: FD interest and rebalancing sales
+    # compound at the entered returns, which should be post-tax. Gains are
+    # taxed when drawdown withdraws them.
+    tax_years = years - p.start_year
+    tax = (income_tax(salary_me, x["age_me"] + tax_years, x["tax_regime"],
+                      rental_income / 2, other_income / 2,
+                      x["old_regime_deductions"]) +
+           income_tax(salary_wife, x["age_wife"] + tax_years,
+                      x["tax_regime"], rental_income / 2, other_income / 2,
+                      x["old_regime_deductions"]))
+
+    # Expenses
+    household_exp = (np.where(before_house, x["household_monthly_now"],
+                              x["household_monthly_future"]) *
+                     inflation_factor * 12)
+    personal_exp = x["personal_monthly"] * inflation_factor * 12
+    fuel_exp = x["fuel_monthly"] * fuel_factor * 12
+    house_loan = events["House Loan EMI"]
+    car_loan = events["Car Loan EMI"]
+    vacation_exp = x["vacation_annual"] * vacation_factor
+    kids_edu = events["Kids Education"]
+    other_exp = events["Other Expenses"]
+
+    total_exp = (household_exp + personal_exp + fuel_exp + house_loan +
+                 car_loan + vacation_exp + kids_edu + other_exp)
+
+    # Lump sums
+    lump_sum = events["Lump Sum"]
+
+    # Annual surplus
+    surplus = total_income - tax - total_exp - lump_sum
+
+    shape = np.broadcast_shapes(surplus.shape, total_exp.shape,
+                                lump_sum.shape)
+    return {
+        "Total Income": np.broadcast_to(total_income, shape),
+        "Income Tax": np.broadcast_to(tax, shape),
+        "Total Expenses": np.broadcast_to(total_exp + lump_sum, shape),
+        "Annual Surplus": np.broadcast_to(surplus, shape),
+        "Household Exp": np.broadcast_to(household_exp, shape),
+        "Personal Exp": np.broadcast_to(personal_exp, shape),
+        "Fuel Exp": np.broadcast_to(fuel_exp, shape),
+        "Vacation Exp": np.broadcast_to(vacation_exp, shape),
+        "Kids Education": np.broadcast_to(kids_edu, shape),
+        "House Loan EMI": np.broadcast_to(house_loan, shape),
+        "Car Loan EMI": np.broadcast_to(car_loan, shape),
+        "Other Expenses": np.broadcast_to(other_exp, shape),
+        "Lump Sum": np.broadcast_to(lump_sum, shape),
+        "Other Income": np.broadcast_to(other_income, shape),
+    }
+
+
+# Core projection engine. Every input other than the horizon may be a scalar
+# or an array with a leading batch shape; outputs are unrounded columns
+# shaped (*batch, years), so many parameter sets run in one broadcast call.
+def projection_arrays(p):
+    years = np.arange(p.start_year, p.end_year + 1)
+    n = len(years)
+    x = batched_inputs(p)
+    flows = cash_flows(p, x, flow_factors(x, n))
+
+    # Grow investments first; balances at the end of each year
+    curr_stocks_val = x["stocks_val"] * growth_factors(x["stocks_return"],
+                                                       n + 1)[..., 1:]
+    curr_mf_val = x["mf_val"] * growth_factors(x["mf_return"], n + 1)[..., 1:]
+    curr_pf_val = x["pf_val"] * growth_factors(x["pf_return"], n + 1)[..., 1:]
+
+    # Surplus goes to FD: discount each year's surplus back to the start,
+    # accumulate, then grow the running total forward again
+    fd_factor = growth_factors(x["fd_return"], n + 1)[..., 1:]
+    curr_fd_val = fd_factor * (x["fd_val"] + np.cumsum(
+        flows["Annual Surplus"] / fd_factor, axis=-1))
+
+    # Or it is invested towards target weights, year by year
+    balances = allocated_balances(
+        x, {
+            "Stocks Value": curr_stocks_val,
+            "MF Value": curr_mf_val,
+            "FD Value": curr_fd_val,
+            "PF Value": curr_pf_val
+        }, lambda: target_balances(
+            x, {asset: x[f"{asset}_val"]
+                for asset in ASSET_COLUMNS}, asset_steps(x),
+            flows["Annual Surplus"], np.arange(n)))
+    total_corpus = (balances["Stocks Value"] + balances["MF Value"] +
+                    balances["FD Value"] + balances["PF Value"])
+
+    shape = total_corpus.shape
+    return {
+        "Year": years,
+        "Age Me": x["age_me"] + (years - p.start_year),
+        "Age Wife": x["age_wife"] + (years - p.start_year),
+        **{name: np.broadcast_to(values, shape)
+           for name, values in flows.items()},
+        "Unfunded Deficit": np.broadcast_to(balances["Unfunded Deficit"],
+                                            shape),
+        "Stocks Value": np.broadcast_to(balances["Stocks Value"], shape),
+        "MF Value": np.broadcast_to(balances["MF Value"], shape),
+        "FD Value": balances["FD Value"],
+        "PF Value": np.broadcast_to(balances["PF Value"], shape),
+        "Total Corpus": total_corpus,
+        **debt_columns(p, total_corpus),
+        "FI Achieved?": total_corpus >= x["target_corpus"]
+    }
+
+
+# First year each parameter set reaches its target (NaN if never), plus the
+# final corpus, from batched engine output
+def fi_summary(columns):
+    reached = columns["FI Achieved?"]
+    fi_year = np.where(reached.any(axis=-1),
+                       columns["Year"][reached.argmax(axis=-1)], np.nan)
+    return fi_year, columns["Total Corpus"][..., -1]
+
+
+# Memoized engine output for single parameter sets, shared by every caller
+# in the process. The least recently used entry is dropped once the cache is
+# full. Arrays are read-only because every caller shares them.
+PROJECTION_CACHE_SIZE = 256
+_projection_cache = OrderedDict()
+_projection_cache_lock = threading.Lock()
+
+
+# Cached columns for params, or None if they haven't been computed
+def cached_projection(params):
+    with _projection_cache_lock:
+        columns = _projection_cache.get(params)
+        if columns is not None:
+            _projection_cache.move_to_end(params)
+        return columns
+
+
+# Add columns computed elsewhere (such as by an incremental update) to the
+# cache
+def store_projection(params, columns):
+    for values in columns.values():
+        values.setflags(write=False)
+    with _projection_cache_lock:
+        _projection_cache[params] = columns
+        _projection_cache.move_to_end(params)
+        while len(_projection_cache) > PROJECTION_CACHE_SIZE:
+            _projection_cache.popitem(last=False)
+    return columns
+
+
+def projection_columns(params):
+    columns = cached_projection(params)
+    if columns is None:
+        columns = store_projection(params, projection_arrays(params))
+    return columns
+
+
+# DataFrame of single-parameter-set engine columns, rounded to whole rupees
+def rounded_frame(columns):
+    frame = {
+        name: np.round(values, 0)
+        for name, values in columns.items()
+        if name not in ("Year", "Age Me", "Age Wife", "FI Achieved?")
+    }
+    return pd.DataFrame({
+        "Year": columns["Year"],
+        "Age Me": columns["Age Me"],
+        "Age Wife": columns["Age Wife"],
+        **frame,
+        "FI Achieved?": np.where(columns["FI Achieved?"], "Yes", "No")
+    })
+
+
+# Year-by-year projections for one parameter set
+def projection_frame(params):
+    return rounded_frame(projection_columns(params))
+
+
+# Evaluate every combination of the swept values in one batched engine call.
+# Returns FI year and final corpus arrays shaped like the grid.
+def sweep_grid(params, axes):
+    grids = np.meshgrid(*axes.values(), indexing="ij")
+    batch = replace(
+        params, **{name: grid.ravel()
+                   for name, grid in zip(axes, grids)})
+    fi_year, final = fi_summary(projection_arrays(batch))
+    return fi_year.reshape(grids[0].shape), final.reshape(grids[0].shape)
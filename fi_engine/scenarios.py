@@ -0,0 +1,170 @@
+# Named scenarios stored in a local SQLite database. Each scenario keeps its
+# inputs as JSON, a hash of them for finding identical plans, a couple of
+# summary metrics for listing and its year-by-year projections as Parquet,
+# so a saved plan can be shown without recomputing it. Scenarios are
+# compared by projecting them afresh, grouped into batched engine calls.
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import fields, replace
+
+import numpy as np
+import pandas as pd
+
+from .columnar import (frame_bytes, params_from_metadata, plain_value,
+                       read_results, results_metadata)
+from .monthly import monthly_arrays, monthly_projection_frame, yearly_rollup
+from .projection import (HORIZON_PARAMS, SHARED_PARAMS, projection_arrays,
+                         projection_frame, rounded_frame)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fi_year INTEGER,
+    final_corpus REAL NOT NULL,
+    projections BLOB NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (user, name)
+);
+CREATE INDEX IF NOT EXISTS scenarios_by_hash
+    ON scenarios (user, params_hash);
+"""
+
+SUMMARY_COLUMNS = ("name", "fi_year", "final_corpus", "params_hash",
+                   "updated")
+
+
+# Stored form of a plan's inputs and its hash. Keys are sorted so the same
+# inputs always hash the same.
+def scenario_record(params, monthly_params=None):
+    metadata = results_metadata("scenario",
+                                params=params,
+                                monthly_params=monthly_params)
+    stored = json.dumps(metadata, sort_keys=True, default=plain_value)
+    return stored, hashlib.sha256(stored.encode()).hexdigest()
+
+
+# Yearly projections for one plan, from the monthly engine when it has
+# monthly settings
+def scenario_projection(params, monthly_params=None):
+    if monthly_params is None:
+        return projection_frame(params)
+    return monthly_projection_frame(params, monthly_params)
+
+
+class ScenarioStore:
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # Save (or overwrite) a named scenario. projections are computed here
+    # unless the caller already has them.
+    def save(self, user, name, params, monthly_params=None, projections=None):
+        if not name.strip():
+            raise ValueError("Scenario name can't be empty")
+        if projections is None:
+            projections = scenario_projection(params, monthly_params)
+        stored, params_hash = scenario_record(params, monthly_params)
+        reached = projections.loc[projections["FI Achieved?"] == "Yes",
+                                  "Year"]
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT INTO scenarios (user, name, params_hash, params, "
+                "fi_year, final_corpus, projections, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user, name) DO UPDATE SET "
+                "params_hash = excluded.params_hash, "
+                "params = excluded.params, fi_year = excluded.fi_year, "
+                "final_corpus = excluded.final_corpus, "
+                "projections = excluded.projections, "
+                "updated = excluded.updated",
+                (user, name, params_hash, stored,
+                 int(reached.iloc[0]) if len(reached) else None,
+                 float(projections["Total Corpus"].iloc[-1]),
+                 frame_bytes(projections, "parquet",
+                             json.loads(stored)), time.time()))
+        return params_hash
+
+    # A user's scenarios, most recently saved first
+    def list(self, user):
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM scenarios "
+                "WHERE user = ? ORDER BY updated DESC", (user, )).fetchall()
+        return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+    # Names of a user's scenarios with exactly these inputs
+    def find(self, user, params, monthly_params=None):
+        _, params_hash = scenario_record(params, monthly_params)
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT name FROM scenarios "
+                "WHERE user = ? AND params_hash = ? ORDER BY name",
+                (user, params_hash)).fetchall()
+        return [name for name, in rows]
+
+    # Inputs of a saved scenario and the projections stored with it
+    def load(self, user, name):
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT params, projections FROM scenarios "
+                "WHERE user = ? AND name = ?", (user, name)).fetchone()
+        if row is None:
+            raise KeyError(f"No scenario named {name}")
+        saved = params_from_metadata(json.loads(row[0]))
+        return (saved["params"], saved.get("monthly_params"),
+                read_results(row[1])[0])
+
+    def delete(self, user, name):
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM scenarios WHERE user = ? AND name = ?",
+                       (user, name))
+
+
+# Projections of several plans ({name: (params, monthly_params)}) as one
+# long frame with a Scenario column. Plans sharing a horizon, events, loans
+# and monthly settings run together in one batched engine call.
+def compare_scenarios(scenarios):
+    groups = {}
+    for name, (params, monthly_params) in scenarios.items():
+        key = tuple(
+            getattr(params, field)
+            for field in HORIZON_PARAMS + SHARED_PARAMS) + (monthly_params, )
+        groups.setdefault(key, []).append(name)
+
+    frames = {}
+    for names in groups.values():
+        plans = [scenarios[name][0] for name in names]
+        monthly_params = scenarios[names[0]][1]
+        batch = replace(
+            plans[0], **{
+                field.name: np.array([getattr(p, field.name) for p in plans])
+                for field in fields(plans[0])
+                if field.name not in HORIZON_PARAMS + SHARED_PARAMS
+            })
+        if monthly_params is None:
+            columns = projection_arrays(batch)
+        else:
+            columns = yearly_rollup(batch,
+                                    monthly_arrays(batch, monthly_params))
+        shape = columns["FI Achieved?"].shape
+        for i, name in enumerate(names):
+            frames[name] = rounded_frame({
+                column: np.broadcast_to(values, shape)[i]
+                for column, values in columns.items()
+            })
+
+    return pd.concat(
+        [frames[name].assign(Scenario=name) for name in scenarios],
+        ignore_index=True)
@@ -0,0 +1,218 @@
+# One-at-a-time sensitivity (tornado) analysis: every numeric input is
+# nudged down and up with the others held fixed, and inputs are ranked by
+# how far that moves the final corpus and the FI year. All the nudged plans
+# are evaluated together in one batched engine call.
+from dataclasses import fields, replace
+
+import numpy as np
+import pandas as pd
+
+from .monthly import monthly_arrays, yearly_rollup
+from .params import FIParams
+from .projection import (HORIZON_PARAMS, SHARED_PARAMS, fi_summary,
+                         projection_arrays)
+
+# Inputs nudged by one (years, ages and counts) or by rate_step (rates and
+# shares) rather than in proportion to their value
+YEAR_PARAMS = ("age_me", "age_wife", "house_loan_closure_year",
+               "car_loan_closure_year", "kids_edu_start_year",
+               "kids_edu_end_year", "house_construction_year",
+               "bike_purchase_year", "glide_start_age", "glide_end_age",
+               "rebalance_every")
+RATE_PARAMS = ("income_growth", "stocks_return", "mf_return", "fd_return",
+               "pf_return", "inflation_exp", "inflation_fuel",
+               "vacation_inflation", "kids_edu_inflation", "equity_start",
+               "equity_end", "stocks_share", "rebalance_band")
+# Inputs that can't go above one
+SHARE_PARAMS = ("equity_start", "equity_end", "stocks_share")
+# Inputs that must stay at least one
+COUNT_PARAMS = ("rebalance_every", )
+
+# Numeric inputs of a parameter set, in field order
+SENSITIVITY_PARAMS = tuple(
+    field.name for field in fields(FIParams)
+    if field.name not in HORIZON_PARAMS + SHARED_PARAMS
+    and field.name not in ("tax_regime", "allocation", "rebalancing"))
+
+
+# Low and high value of each named input: amounts move by relative of their
+# value, rates and shares by rate_step and years by one. Nothing goes below
+# zero, shares stay at most one and counts at least one.
+def nudged_values(params, names, relative=0.1, rate_step=0.01):
+    nudged = {}
+    for name in names:
+        value = getattr(params, name)
+        if name in YEAR_PARAMS:
+            low, high = value - 1, value + 1
+        elif name in RATE_PARAMS:
+            low, high = value - rate_step, value + rate_step
+        else:
+            low, high = value * (1 - relative), value * (1 + relative)
+        low = max(low, 1 if name in COUNT_PARAMS else 0)
+        if name in SHARE_PARAMS:
+            high = min(high, 1)
+        nudged[name] = (low, high)
+    return nudged
+
+
+# Tornado table for a single parameter set, one row per input sorted by how
+# far it moves the final corpus. Rows 2i and 2i+1 of the batch have input i
+# at its low and high value. An FI year that isn't reached counts as the
+# year after end_year in the FI year swing.
+def tornado(params,
+            names=None,
+            monthly_params=None,
+            relative=0.1,
+            rate_step=0.01):
+    names = list(names or SENSITIVITY_PARAMS)
+    nudged = nudged_values(params, names, relative, rate_step)
+    batch = {}
+    for i, name in enumerate(names):
+        values = np.full(2 * len(names),
+                         getattr(params, name),
+                         dtype=float)
+        values[2 * i:2 * i + 2] = nudged[name]
+        batch[name] = values
+    batch = replace(params, **batch)
+
+    if monthly_params is None:
+        columns = projection_arrays(batch)
+    else:
+        columns = yearly_rollup(batch, monthly_arrays(batch, monthly_params))
+    fi_year, final = fi_summary(columns)
+    final = np.broadcast_to(final, fi_year.shape)
+    reached_by = np.where(np.isnan(fi_year), params.end_year + 1, fi_year)
+
+    low, high = slice(0, None, 2), slice(1, None, 2)
+    table = pd.DataFrame({
+        "Input": names,
+        "Low": [nudged[name][0] for name in names],
+        "High": [nudged[name][1] for name in names],
+        "Final Corpus (Low)": final[low],
+        "Final Corpus (High)": final[high],
+        "FI Year (Low)": fi_year[low],
+        "FI Year (High)": fi_year[high],
+        "Corpus Swing": np.abs(final[high] - final[low]),
+        "FI Year Swing": np.abs(reached_by[high] - reached_by[low]),
+    })
+    return table.sort_values(["Corpus Swing", "FI Year Swing"],
+                             ascending=False,
+                             kind="stable",
+                             ignore_index=True)
+
+
+def _primes(n):
+    primes = []
+    candidate = 2
+    while len(primes) < n:
+        if all(candidate % p for p in primes):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+# First n points of a d-dimensional Halton sequence in [0, 1), skipping the
+# origin. Digits other than zero are randomly permuted in each base (seeded)
+# to break up the correlation between high-base dimensions.
+def halton(n, d, seed=0):
+    rng = np.random.default_rng(seed)
+    index = np.arange(1, n + 1)
+    points = np.zeros((n, d))
+    for j, base in enumerate(_primes(d)):
+        digits = np.concatenate([[0], rng.permutation(np.arange(1, base))])
+        remaining, scale = index.copy(), 1.0
+        while remaining.any():
+            scale /= base
+            points[:, j] += scale * digits[remaining % base]
+            remaining //= base
+    return points
+
+
+# Final corpus and FI year (the year after end_year when the target isn't
+# reached) of each row of sampled inputs, run through the engine in chunks
+# of about chunk_cells plan-years
+def _sampled_outcomes(params, names, samples, monthly_params, chunk_cells):
+    n_years = params.end_year - params.start_year + 1
+    chunk = max(chunk_cells // n_years, 1)
+    final = np.empty(len(samples))
+    fi_year = np.empty(len(samples))
+    for lo in range(0, len(samples), chunk):
+        batch = replace(
+            params, **{
+                name: samples[lo:lo + chunk, j]
+                for j, name in enumerate(names)
+            })
+        if monthly_params is None:
+            columns = projection_arrays(batch)
+        else:
+            columns = yearly_rollup(batch,
+                                    monthly_arrays(batch, monthly_params))
+        reached, corpus = fi_summary(columns)
+        fi_year[lo:lo + chunk] = np.where(np.isnan(reached),
+                                          params.end_year + 1, reached)
+        final[lo:lo + chunk] = corpus
+    return {"Final Corpus": final, "FI Year": fi_year}
+
+
+# First-order and total-effect indices from outcomes of the A and B sample
+# matrices and of A with column i taken from B (rows of f_ab), using the
+# first n samples: Saltelli (2010) for first order, Jansen for total effect.
+# Outcomes are centred first, which the first-order estimator needs to stay
+# stable for outputs far from zero, such as a calendar year.
+def _indices(f_a, f_b, f_ab, n):
+    both = np.concatenate([f_a[:n], f_b[:n]])
+    mean, variance = both.mean(), both.var()
+    f_a, f_b, f_ab = f_a[:n] - mean, f_b[:n] - mean, f_ab[:, :n] - mean
+    scale = np.where(variance > 0, variance, np.nan)
+    first = (f_b * (f_ab - f_a)).mean(axis=-1) / scale
+    total = 0.5 * ((f_a - f_ab)**2).mean(axis=-1) / scale
+    return first, total
+
+
+# Variance-based (Sobol) sensitivity of the final corpus and FI year to the
+# inputs in ranges ({name: (low, high)}), each sampled uniformly from its
+# range with a scrambled Halton sequence. n_samples base samples take
+# n_samples * (inputs + 2) engine runs. Years, ages and counts are rounded
+# to whole values. Returns the indices (first order is the share of
+# variance an input explains alone, total effect adds its interactions)
+# and how they converge as the sample grows in powers of two.
+def sobol_indices(params,
+                  ranges,
+                  n_samples=4096,
+                  monthly_params=None,
+                  seed=0,
+                  chunk_cells=1 << 20):
+    names = list(ranges)
+    d = len(names)
+    low = np.array([ranges[name][0] for name in names], dtype=float)
+    high = np.array([ranges[name][1] for name in names], dtype=float)
+    points = low + halton(n_samples, 2 * d, seed).reshape(
+        n_samples, 2, d) * (high - low)
+    rounded = [name in YEAR_PARAMS for name in names]
+    points[..., rounded] = np.round(points[..., rounded])
+    a, b = points[:, 0], points[:, 1]
+    # A, B, then A with each column in turn taken from B
+    mixed = np.repeat(a[None], d, axis=0)
+    mixed[np.arange(d), :, np.arange(d)] = b.T
+    samples = np.concatenate([a, b, mixed.reshape(-1, d)])
+    outcomes = _sampled_outcomes(params, names, samples, monthly_params,
+                                 chunk_cells)
+
+    sizes = [n for n in 2**np.arange(6, 31) if n < n_samples] + [n_samples]
+    indices, convergence = [], []
+    for output, values in outcomes.items():
+        f_a, f_b = values[:n_samples], values[n_samples:2 * n_samples]
+        f_ab = values[2 * n_samples:].reshape(d, n_samples)
+        for n in sizes:
+            first, total = _indices(f_a, f_b, f_ab, n)
+            convergence.append(
+                pd.DataFrame({
+                    "Output": output,
+                    "Samples": n,
+                    "Input": names,
+                    "First Order": first,
+                    "Total Effect": total,
+                }))
+        indices.append(convergence[-1].drop(columns="Samples"))
+    return (pd.concat(indices, ignore_index=True),
+            pd.concat(convergence, ignore_index=True))
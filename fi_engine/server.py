@@ -0,0 +1,327 @@
+# Local JSON HTTP API over the projection engine, for tools that need
+# projections without a browser session. Calculations run in a warm process
+# pool and results are cached by a hash of the parameters that produced them.
+#
+#   python -m fi_engine.server --port 8765 --workers 4
+#
+#   GET  /health    liveness check
+#   GET  /params    default inputs (every field the API accepts)
+#   POST /project   {"params": {...}, "monthly_params": {...}, "rows": true}
+#   POST /batch     {"households": [{"household_id": ..., ...}, ...],
+#                    "rows": false}
+#
+# Inputs are named like the FIParams and MonthlyParams fields; omitted ones
+# take the sidebar defaults. "events" is a list of planned events named like
+# the CashFlowEvent fields and "loans" a list of loans named like the
+# LoanParams fields. Batch households run through the same batched engine as
+# the batch CLI, so they can't have their own events or loans.
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from .batch import complete_households, project_households, summary_columns
+from .events import events_from_records
+from .loans import loans_from_records
+from .monthly import monthly_columns, yearly_rollup
+from .params import DEFAULT_PARAMS, MonthlyParams
+from .portfolio import ALLOCATIONS, REBALANCING
+from .projection import SHARED_PARAMS, projection_columns, rounded_frame
+from .tax import REGIMES
+
+ID_COLUMN = "household_id"
+MAX_BODY_BYTES = 32 * 1024 * 1024
+# Text inputs and the values they accept
+CHOICES = {
+    "tax_regime": REGIMES,
+    "allocation": ALLOCATIONS,
+    "rebalancing": REBALANCING,
+}
+
+
+# Bounded least-recently-used map from request hash to response, shared by
+# the server's request threads
+class ResultCache:
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+# Parameter object from a JSON mapping of overrides to the defaults. Raises
+# ValueError for inputs the engine can't run with, so they're reported as
+# bad requests rather than failing inside a worker.
+def parse_params(values, defaults):
+    values = values or {}
+    if not isinstance(values, dict):
+        raise ValueError("Parameters must be a JSON object")
+    names = {field.name for field in fields(defaults)}
+    unknown = sorted(set(values) - names)
+    if unknown:
+        raise ValueError(f"Unknown inputs: {', '.join(unknown)}")
+    values = dict(values)
+    for name, value in values.items():
+        if name == "events":
+            if not isinstance(value, list):
+                raise ValueError("events must be a JSON array")
+            values[name] = events_from_records(value)
+        elif name == "loans":
+            if not isinstance(value, list):
+                raise ValueError("loans must be a JSON array")
+            values[name] = loans_from_records(value)
+        elif isinstance(getattr(defaults, name), str):
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string")
+            if name in CHOICES and value not in CHOICES[name]:
+                raise ValueError(f"Unknown {name}: {value} "
+                                 f"(use one of {', '.join(CHOICES[name])})")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name} must be a number")
+        elif name.endswith("_month") and not 1 <= value <= 12:
+            raise ValueError(f"{name} must be between 1 and 12")
+    params = replace(defaults, **values)
+    if "end_year" in names and params.end_year < params.start_year:
+        raise ValueError(f"end_year ({params.end_year}) can't be before "
+                         f"start_year ({params.start_year})")
+    return params
+
+
+# A true/false request option, which must be a JSON boolean
+def flag(body, name, default):
+    value = body.get(name, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"{name} must be true or false")
+    return value
+
+
+def cache_key(kind, *param_objects, rows):
+    payload = [kind, rows] + [
+        asdict(p) if p is not None else None for p in param_objects
+    ]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+# Summary metrics as plain JSON values: whole rupees and years as integers,
+# None where the target is never reached
+def summary_record(summary):
+    return {
+        name: None if np.isnan(value) else int(value)
+        for name, value in summary.items()
+    }
+
+
+# One projection, run in a worker process
+def project_one(params, monthly_params=None, rows=True):
+    if monthly_params is None:
+        columns = projection_columns(params)
+    else:
+        columns = yearly_rollup(params,
+                                monthly_columns(params, monthly_params))
+    result = {
+        "summary":
+        summary_record(
+            summary_columns(columns, params.start_year,
+                            params.target_corpus))
+    }
+    if rows:
+        result["rows"] = rounded_frame(columns).to_dict("records")
+    return result
+
+
+# Worker start-up: import the engine and run one projection so the first
+# real request doesn't pay for it
+def warm_worker(_):
+    projection_columns(DEFAULT_PARAMS)
+
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers, cache_entries, chunk_size):
+        super().__init__(address, RequestHandler)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        list(self.pool.map(warm_worker, range(workers)))
+        self.cache = ResultCache(cache_entries)
+        self.chunk_size = chunk_size
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+    def project(self, body):
+        params = parse_params(body.get("params"), DEFAULT_PARAMS)
+        monthly_values = body.get("monthly_params")
+        monthly_params = None if monthly_values is None else parse_params(
+            monthly_values, MonthlyParams())
+        rows = flag(body, "rows", True)
+
+        key = cache_key("project", params, monthly_params, rows=rows)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.pool.submit(project_one, params, monthly_params,
+                                      rows).result()
+            self.cache.put(key, result)
+        return result
+
+    # Cached households are answered directly; the rest are projected in
+    # chunks across the pool, one batched engine call per horizon
+    def batch(self, body):
+        households = body.get("households")
+        if not isinstance(households, list):
+            raise ValueError("households must be a JSON array")
+        rows = flag(body, "rows", False)
+
+        ids, keys, results, missing = [], [], [], []
+        for i, household in enumerate(households):
+            if not isinstance(household, dict):
+                raise ValueError(f"Household {i} must be a JSON object")
+            household = dict(household)
+            ids.append(household.pop(ID_COLUMN, i))
+            shared = [name for name in SHARED_PARAMS if name in household]
+            if shared:
+                raise ValueError(f"Batch households can't have {shared[0]}; "
+                                 f"use /project for plans with {shared[0]}")
+            params = parse_params(household, DEFAULT_PARAMS)
+            keys.append(cache_key("batch", params, rows=rows))
+            results.append(self.cache.get(keys[-1]))
+            if results[-1] is None:
+                missing.append({ID_COLUMN: i, **asdict(params)})
+
+        if missing:
+            frame = complete_households(pd.DataFrame(missing), ID_COLUMN)
+            chunks = [
+                frame.iloc[lo:lo + self.chunk_size]
+                for lo in range(0, len(frame), self.chunk_size)
+            ]
+            for summary, projections in self.pool.map(
+                    project_households, chunks, repeat(ID_COLUMN),
+                    repeat(rows)):
+                by_household = {} if projections is None else dict(
+                    list(projections.groupby(ID_COLUMN, sort=False)))
+                for record in summary.to_dict("records"):
+                    i = record.pop(ID_COLUMN)
+                    result = {"summary": summary_record(record)}
+                    if rows:
+                        result["rows"] = by_household[i].drop(
+                            columns=ID_COLUMN).to_dict("records")
+                    results[i] = result
+                    self.cache.put(keys[i], result)
+
+        return {
+            "results": [{
+                ID_COLUMN: household_id,
+                **result
+            } for household_id, result in zip(ids, results)],
+            "cached": len(households) - len(missing)
+        }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/params":
+            self.send_json(
+                200, {
+                    "params": asdict(DEFAULT_PARAMS),
+                    "monthly_params": asdict(MonthlyParams())
+                })
+        else:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        endpoints = {"/project": self.server.project, "/batch": self.server.batch}
+        if self.path not in endpoints:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self.send_json(413, {"error": "Request body too large"})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            result = endpoints[self.path](body)
+        except (ValueError, TypeError) as exc:
+            self.send_json(400, {"error": str(exc)})
+        except Exception as exc:
+            self.send_json(500, {"error": str(exc)})
+        else:
+            self.send_json(200, result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve FI projections as a local JSON HTTP API.")
+    parser.add_argument("--host",
+                        default="127.0.0.1",
+                        help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port",
+                        type=int,
+                        default=8765,
+                        help="port to listen on (default: 8765)")
+    parser.add_argument("--workers",
+                        type=int,
+                        default=os.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--cache-entries",
+                        type=int,
+                        default=4096,
+                        help="responses kept in the result cache "
+                        "(default: 4096)")
+    parser.add_argument("--chunk-size",
+                        type=int,
+                        default=1000,
+                        help="batch households per worker task "
+                        "(default: 1000)")
+    args = parser.parse_args(argv)
+
+    server = APIServer((args.host, args.port), args.workers,
+                       args.cache_entries, args.chunk_size)
+    print(f"Serving FI projections on http://{args.host}:{args.port} "
+          f"with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
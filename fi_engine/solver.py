@@ -0,0 +1,83 @@
+# Inverse goal solver: finds the value of one input at which the plan just
+# reaches its target by a chosen year. Each iteration evaluates a batch of
+# candidates in one engine call and narrows the bracket to the pair where
+# the goal flips from missed to met.
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from .monthly import monthly_arrays, yearly_rollup
+from .projection import projection_arrays
+
+# Inputs the solver can search over, with default search bounds and the
+# precision the answer is needed to
+SOLVER_BOUNDS = {
+    "household_monthly_future": (0, 1000000, 1),
+    "salary_me_monthly": (0, 10000000, 1),
+    "salary_wife_monthly": (0, 10000000, 1),
+    "income_growth": (0.0, 0.30, 1e-5),
+    "stocks_return": (0.0, 0.40, 1e-5),
+    "mf_return": (0.0, 0.40, 1e-5),
+    "pf_return": (0.0, 0.40, 1e-5),
+    "inflation_exp": (0.0, 0.30, 1e-5),
+    "house_cost": (0, 500000000, 1),
+    "vacation_annual": (0, 10000000, 1),
+    "kids_edu_annual": (0, 10000000, 1),
+    "target_corpus": (0, 5000000000, 1),
+}
+
+
+# Outcome of a solve. status is "solved" when the goal flips inside the
+# bounds, "always" when it's met across the whole range and "never" when it
+# can't be met anywhere in it; value is None unless solved.
+@dataclass(frozen=True, slots=True)
+class GoalSolution:
+    name: str
+    value: float | None
+    status: str
+
+
+# Best surplus of corpus over target up to fi_year, for every parameter set
+# in the batch. Non-negative means FI is reached by fi_year.
+def fi_margin(params, fi_year, monthly_params=None):
+    params = replace(params, end_year=fi_year)
+    if monthly_params is None:
+        columns = projection_arrays(params)
+    else:
+        columns = yearly_rollup(params, monthly_arrays(params,
+                                                       monthly_params))
+    target = np.asarray(params.target_corpus)[..., None]
+    return (columns["Total Corpus"] - target).max(axis=-1)
+
+
+def solve_for(params,
+              name,
+              fi_year,
+              monthly_params=None,
+              bounds=None,
+              candidates=33,
+              max_iter=20):
+    lo, hi, tol = bounds or SOLVER_BOUNDS[name]
+
+    for _ in range(max_iter):
+        grid = np.linspace(lo, hi, candidates)
+        met = fi_margin(replace(params, **{name: grid}), fi_year,
+                        monthly_params) >= 0
+        flips = np.flatnonzero(met[1:] != met[:-1])
+        if len(flips) == 0:
+            return GoalSolution(name, None, "always" if met.all() else "never")
+        i = flips[0]
+        lo, hi = grid[i], grid[i + 1]
+        if hi - lo <= tol:
+            break
+
+    # Report the side of the bracket that still meets the goal
+    return GoalSolution(name, hi if met[i + 1] else lo, "solved")
+
+
+# Solve for each named input independently, holding the others fixed
+def solve_all(params, fi_year, names=None, monthly_params=None):
+    return [
+        solve_for(params, name, fi_year, monthly_params)
+        for name in (names or SOLVER_BOUNDS)
+    ]
@@ -0,0 +1,138 @@
+# Indian income tax and capital-gains tax (FY 2025-26 rules). Every function
+# takes NumPy arrays of any shape (years, batches, Monte Carlo paths) and
+# works on whole arrays a slab at a time, so there are no Python loops over
+# years or paths.
+import numpy as np
+
+CESS = 0.04
+REGIMES = ("new", "old", "none")
+
+# Slab lower bounds and the rate charged above each one
+NEW_REGIME_SLABS = (np.array([0, 400000, 800000, 1200000, 1600000, 2000000,
+                              2400000]),
+                    np.array([0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30]))
+OLD_REGIME_SLABS = (np.array([0, 250000, 500000, 1000000]),
+                    np.array([0, 0.05, 0.20, 0.30]))
+# Higher basic exemption for residents aged 60-79 and 80+ (old regime only)
+OLD_REGIME_SENIOR_SLABS = (np.array([0, 300000, 500000, 1000000]),
+                           np.array([0, 0.05, 0.20, 0.30]))
+OLD_REGIME_SUPER_SENIOR_SLABS = (np.array([0, 500000, 1000000]),
+                                 np.array([0, 0.20, 0.30]))
+
+NEW_REGIME_STANDARD_DEDUCTION = 75000
+OLD_REGIME_STANDARD_DEDUCTION = 50000
+
+# Section 87A: no tax up to this taxable income
+NEW_REGIME_REBATE_LIMIT = 1200000
+OLD_REGIME_REBATE_LIMIT = 500000
+
+# Surcharge thresholds and rates on income tax; the new regime caps at 25%
+NEW_REGIME_SURCHARGE = (np.array([5000000, 10000000, 20000000]),
+                        np.array([0.10, 0.15, 0.25]))
+OLD_REGIME_SURCHARGE = (np.array([5000000, 10000000, 20000000, 50000000]),
+                        np.array([0.10, 0.15, 0.25, 0.37]))
+
+# Let-out house property: 30% of net annual value is deductible (sec 24a)
+RENTAL_DEDUCTION = 0.30
+
+# Listed equity and equity funds held over a year. FD interest and debt
+# fund gains bought after April 2023 are taxed at slab rates whatever the
+# holding period.
+EQUITY_LTCG_RATE = 0.125
+EQUITY_LTCG_EXEMPTION = 125000
+
+
+def slab_tax(taxable, slabs):
+    lower, rates = slabs
+    taxable = np.asarray(taxable, dtype=float)
+    # Each slab adds its rate step on the income above its lower bound
+    steps = np.diff(rates, prepend=0)
+    tax = np.zeros_like(taxable)
+    for bound, step in zip(lower, steps):
+        if step:
+            tax += step * np.maximum(taxable - bound, 0)
+    return tax
+
+
+# Rate in the highest bracket reached, as a fraction
+def bracket_rate(taxable, brackets):
+    lower, rates = brackets
+    index = np.searchsorted(lower, taxable, side="right")
+    return np.concatenate([[0.0], rates])[index]
+
+
+def new_regime_tax(taxable):
+    tax = slab_tax(taxable, NEW_REGIME_SLABS)
+    # Rebate up to the limit, with marginal relief just above it so tax
+    # never exceeds the income over the limit
+    tax = np.where(taxable <= NEW_REGIME_REBATE_LIMIT, 0,
+                   np.minimum(tax, taxable - NEW_REGIME_REBATE_LIMIT))
+    tax = tax * (1 + bracket_rate(taxable, NEW_REGIME_SURCHARGE))
+    return tax * (1 + CESS)
+
+
+def old_regime_tax(taxable, age):
+    tax = np.where(
+        age >= 80, slab_tax(taxable, OLD_REGIME_SUPER_SENIOR_SLABS),
+        np.where(age >= 60, slab_tax(taxable, OLD_REGIME_SENIOR_SLABS),
+                 slab_tax(taxable, OLD_REGIME_SLABS)))
+    tax = np.where(taxable <= OLD_REGIME_REBATE_LIMIT, 0, tax)
+    tax = tax * (1 + bracket_rate(taxable, OLD_REGIME_SURCHARGE))
+    return tax * (1 + CESS)
+
+
+# Tax for one person for a year. Salary gets the regime's standard
+# deduction, rent the 30% house-property deduction; other_income (such as FD
+# interest) is added at slab rates. deductions (80C, 80D, ...) only count
+# under the old regime. regime is "new", "old" or "none"; anything else
+# raises.
+def income_tax(salary,
+               age,
+               regime="new",
+               rental=0,
+               other_income=0,
+               deductions=0):
+    salary = np.asarray(salary, dtype=float)
+    income = (1 - RENTAL_DEDUCTION) * np.asarray(rental) + other_income
+    new_taxable = np.maximum(
+        salary - NEW_REGIME_STANDARD_DEDUCTION, 0) + income
+    old_taxable = np.maximum(
+        np.maximum(salary - OLD_REGIME_STANDARD_DEDUCTION, 0) + income -
+        deductions, 0)
+    regime = np.asarray(regime)
+    unknown = set(np.unique(regime)) - set(REGIMES)
+    if unknown:
+        raise ValueError(f"Unknown tax regime: {unknown.pop()} "
+                         f"(use one of {REGIMES})")
+    shape = np.broadcast_shapes(new_taxable.shape, np.shape(age),
+                                regime.shape)
+    if regime.size == 1:
+        # One regime for every value: only its slabs are evaluated
+        regime = regime.item()
+        if regime == "none":
+            return np.zeros(shape)
+        if regime == "old":
+            return np.broadcast_to(old_regime_tax(old_taxable, age), shape)
+        return np.broadcast_to(new_regime_tax(new_taxable), shape)
+    return np.where(
+        regime == "none", 0,
+        np.where(regime == "old", old_regime_tax(old_taxable, age),
+                 new_regime_tax(new_taxable)))
+
+
+# Tax on long-term listed equity gains realized in a year: 12.5% above the
+# annual exemption, plus cess. Only drawdown withdrawals are taxed, and they
+# sell holdings bought over a year before; sales during accumulation aren't.
+def equity_gains_tax(ltcg):
+    tax = EQUITY_LTCG_RATE * np.maximum(ltcg - EQUITY_LTCG_EXEMPTION, 0)
+    return tax * (1 + CESS)
+
+
+# Gain realized by withdrawing amount from a holding worth balance with the
+# given cost basis, at average cost
+def realized_gain(amount, balance, cost_basis):
+    balance = np.asarray(balance, dtype=float)
+    gain_share = np.where(balance > 0,
+                          1 - cost_basis / np.where(balance > 0, balance, 1),
+                          0)
+    return amount * np.maximum(gain_share, 0)
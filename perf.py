@@ -0,0 +1,220 @@
+# Opt-in timing of the phases of an app rerun. Each phase records its wall
+# time and, with memory tracking on, the memory it left allocated and its
+# peak, as seen by tracemalloc (which includes NumPy buffers). Reruns can be
+# exported as a Chrome trace for chrome://tracing or Perfetto, and phases
+# are summed into counters over many reruns.
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+# Most recent durations kept per phase for the percentiles in the counters
+COUNTER_SAMPLES = 1000
+# Whether memory tracing was started here, so it can be stopped when no
+# longer wanted
+_started_tracing = False
+
+
+# One finished phase. start is wall-clock seconds since the epoch; memory
+# and peak are bytes relative to the phase's start, or None when memory
+# isn't tracked. depth is how many phases it is nested in.
+@dataclass(frozen=True, slots=True)
+class Span:
+    name: str
+    start: float
+    duration: float
+    memory: int | None
+    peak: int | None
+    depth: int
+
+
+# Per-phase totals over many reruns, shared by the threads serving them
+class PhaseCounters:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        self.totals = defaultdict(float)
+        self.peaks = defaultdict(int)
+        self.samples = defaultdict(lambda: deque(maxlen=COUNTER_SAMPLES))
+
+    def add(self, span):
+        with self.lock:
+            self.counts[span.name] += 1
+            self.totals[span.name] += span.duration
+            self.samples[span.name].append(span.duration)
+            if span.peak is not None:
+                self.peaks[span.name] = max(self.peaks[span.name], span.peak)
+
+    def frame(self):
+        with self.lock:
+            names = list(self.counts)
+            samples = [np.array(self.samples[name]) * 1000 for name in names]
+            return pd.DataFrame({
+                "Phase": names,
+                "Count": [self.counts[name] for name in names],
+                "Total (s)": [self.totals[name] for name in names],
+                "Mean (ms)": [
+                    self.totals[name] / self.counts[name] * 1000
+                    for name in names
+                ],
+                "p50 (ms)": [np.percentile(s, 50) for s in samples],
+                "p95 (ms)": [np.percentile(s, 95) for s in samples],
+                "Max (ms)": [s.max() for s in samples],
+                "Max Peak (KiB)": [
+                    self.peaks[name] / 1024 if name in self.peaks else np.nan
+                    for name in names
+                ],
+            })
+
+
+# Phases of one rerun. Disabled profiles time nothing, so phases can be
+# marked unconditionally. Finished spans are also added to counters.
+class RerunProfile:
+
+    def __init__(self, enabled=True, track_memory=False, counters=None):
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.counters = counters
+        self.spans = []
+        self.open = []
+        self.origin = (time.time(), time.perf_counter())
+        global _started_tracing
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        elif not self.track_memory and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+    def begin(self, name):
+        if not self.enabled:
+            return
+        current = None
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak counter is shared, so fold it into the enclosing
+            # phase before restarting it for this one
+            if self.open:
+                self.open[-1][3] = max(self.open[-1][3], peak)
+            tracemalloc.reset_peak()
+        self.open.append([name, time.perf_counter(), current, current])
+
+    def end(self):
+        if not self.enabled:
+            return
+        name, start, start_memory, peak = self.open.pop()
+        duration = time.perf_counter() - start
+        memory = None
+        if self.track_memory:
+            current, phase_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, phase_peak)
+            memory, peak = current - start_memory, peak - start_memory
+            if self.open:
+                self.open[-1][3] = max(self.open[-1][3],
+                                       start_memory + peak)
+        else:
+            peak = None
+        span = Span(name, self.origin[0] + start - self.origin[1], duration,
+                    memory, peak, len(self.open))
+        self.spans.append(span)
+        if self.counters is not None:
+            self.counters.add(span)
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    # fn timed as a phase whenever it is called, such as a download payload
+    # built after the rerun has finished
+    def timed(self, fn, name):
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+# Table of a rerun's spans, times relative to its first phase
+def spans_frame(spans):
+    if not spans:
+        return pd.DataFrame(columns=[
+            "Phase", "Start (ms)", "Wall (ms)", "Memory (KiB)",
+            "Peak (KiB)", "Depth"
+        ])
+    origin = min(span.start for span in spans)
+    return pd.DataFrame({
+        "Phase": [span.name for span in spans],
+        "Start (ms)": [(span.start - origin) * 1000 for span in spans],
+        "Wall (ms)": [span.duration * 1000 for span in spans],
+        "Memory (KiB)": [
+            np.nan if span.memory is None else span.memory / 1024
+            for span in spans
+        ],
+        "Peak (KiB)": [
+            np.nan if span.peak is None else span.peak / 1024
+            for span in spans
+        ],
+        "Depth": [span.depth for span in spans],
+    }).sort_values("Start (ms)", kind="stable", ignore_index=True)
+
+
+# Chrome trace event JSON for any number of reruns (lists of spans). Each
+# rerun is its own track, placed at the time it ran; memory peaks are also
+# emitted as a counter track.
+def chrome_trace(reruns):
+    pid = os.getpid()
+    events = []
+    for i, spans in enumerate(reruns):
+        events.append({
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": i,
+            "args": {
+                "name": f"Rerun {i + 1}"
+            }
+        })
+        for span in spans:
+            events.append({
+                "name": span.name,
+                "cat": "rerun",
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": i,
+                "args": {
+                    name: value
+                    for name, value in asdict(span).items()
+                    if name in ("memory", "peak") and value is not None
+                }
+            })
+            if span.peak is not None:
+                events.append({
+                    "name": "Peak memory (KiB)",
+                    "ph": "C",
+                    "ts": span.start * 1e6,
+                    "pid": pid,
+                    "args": {
+                        span.name: span.peak / 1024
+                    }
+                })
+    return json.dumps({
+        "traceEvents": events,
+        "displayTimeUnit": "ms"
+    }).encode()
@@ -0,0 +1,41 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from fi_engine import DEFAULT_PARAMS, fi_summary, projection_columns
+from fi_engine.batch import complete_households, project_households
+
+HOUSEHOLDS = pd.DataFrame({
+    "household_id": ["a", "b", "c", "d"],
+    "end_year": [2037, 2045, 2037, 2050],
+    "salary_me_monthly": [100000, 250000, 400000, 50000],
+    "target_corpus": [5e7, 8e7, 1e8, 2e7],
+})
+
+
+def test_missing_inputs_take_defaults():
+    households = complete_households(HOUSEHOLDS.drop(columns="household_id"),
+                                     "household_id")
+    assert list(households["household_id"]) == [0, 1, 2, 3]
+    assert (households["stocks_val"] == DEFAULT_PARAMS.stocks_val).all()
+
+
+# Households run in horizon groups come back in input order with the same
+# results as projecting each one alone
+def test_households_match_single_runs():
+    households = complete_households(HOUSEHOLDS, "household_id")
+    summary, projections = project_households(households, "household_id")
+    assert list(summary["household_id"]) == ["a", "b", "c", "d"]
+    for i, row in HOUSEHOLDS.iterrows():
+        params = replace(DEFAULT_PARAMS,
+                         end_year=int(row["end_year"]),
+                         salary_me_monthly=float(row["salary_me_monthly"]),
+                         target_corpus=float(row["target_corpus"]))
+        columns = projection_columns(params)
+        fi_year, final = fi_summary(columns)
+        np.testing.assert_equal(summary["FI Year"][i], fi_year)
+        assert summary["Final Corpus"][i] == np.round(final, 0)
+        rows = projections[projections["household_id"] == row["household_id"]]
+        np.testing.assert_array_equal(rows["Total Corpus"],
+                                      np.round(columns["Total Corpus"], 0))
@@ -0,0 +1,73 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, MonthlyParams, SimulationParams,
+                       projection_frame)
+from fi_engine.columnar import (CORPUS_PATH_SCHEMA, compact_frame,
+                                corpus_path_batches, frame_bytes,
+                                params_from_metadata, read_results,
+                                results_metadata, write_batches)
+
+SIM = SimulationParams(n_paths=10,
+                       distribution="Normal",
+                       stocks_vol=0.18,
+                       mf_vol=0.15,
+                       fd_vol=0.01,
+                       pf_vol=0.005,
+                       seed=1)
+
+
+# Saved projections load back with the same values and the parameters that
+# produced them
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_projections_round_trip_with_params(fmt):
+    params = replace(DEFAULT_PARAMS, end_year=2060)
+    monthly_params = MonthlyParams(sip_step_up=np.float64(0.1))
+    frame = projection_frame(params)
+    metadata = results_metadata("projections",
+                                params=params,
+                                monthly_params=monthly_params,
+                                sim_params=SIM)
+    loaded, stored = read_results(frame_bytes(frame, fmt, metadata))
+    pd.testing.assert_frame_equal(loaded, frame, check_dtype=False,
+                                  check_categorical=False)
+    assert stored["kind"] == "projections"
+    assert params_from_metadata(stored) == {
+        "params": params,
+        "monthly_params": monthly_params,
+        "sim_params": SIM
+    }
+
+
+def test_compact_dtypes_are_lossless():
+    frame = pd.DataFrame({
+        "Year": np.arange(2025, 2028),
+        "Corpus": [1e6, 2.5e9, -3.0],
+        "Huge": [2.0**60, 0, 1],
+        "Share": [0.25, 0.5, 0.125],
+        "FI Achieved?": ["No", "No", "Yes"],
+    })
+    compact = compact_frame(frame)
+    assert compact["Year"].dtype == np.int16
+    assert compact["Corpus"].dtype == np.int64
+    assert compact["Huge"].dtype == np.float64
+    assert compact["Share"].dtype == np.float64
+    assert compact_frame(frame, float32=True)["Share"].dtype == np.float32
+    assert isinstance(compact["FI Achieved?"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(compact, frame, check_dtype=False,
+                                  check_categorical=False)
+
+
+def test_corpus_paths_stream_in_batches(tmp_path):
+    corpus = np.arange(12.0).reshape(4, 3)
+    path = tmp_path / "paths.arrow"
+    write_batches(corpus_path_batches(corpus, [2025, 2026, 2027], 3),
+                  CORPUS_PATH_SCHEMA, str(path), "arrow",
+                  results_metadata("corpus_paths", sim_params=SIM))
+    loaded, stored = read_results(str(path))
+    np.testing.assert_array_equal(loaded["Path"], np.repeat(np.arange(4), 3))
+    np.testing.assert_array_equal(loaded["Total Corpus"], corpus.ravel())
+    assert params_from_metadata(stored) == {"sim_params": SIM}
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from fi_engine import DEFAULT_PARAMS
+from fi_engine.diskcache import DiskCache, cache_key
+
+
+def test_round_trips_result_parts(tmp_path):
+    cache = DiskCache(tmp_path)
+    frame = pd.DataFrame({"Year": [2025, 2026], "Corpus": [1.5, 2.5]})
+    array = np.arange(6.0).reshape(2, 3)
+    key = cache_key("result", DEFAULT_PARAMS)
+    cache.put(key, (frame, array, b"xlsx", "csv"))
+    got_frame, got_array, got_bytes, got_text = cache.get(key)
+    pd.testing.assert_frame_equal(got_frame, frame)
+    np.testing.assert_array_equal(got_array, array)
+    assert (got_bytes, got_text) == (b"xlsx", "csv")
+    assert cache.get(cache_key("other")) is None
+
+
+def test_keys_depend_on_inputs_and_version():
+    assert cache_key("a", DEFAULT_PARAMS) == cache_key("a", DEFAULT_PARAMS)
+    assert cache_key("a", DEFAULT_PARAMS) != cache_key("b", DEFAULT_PARAMS)
+    assert cache_key("a", version="1") != cache_key("a", version="2")
+
+
+def test_stays_within_size_limit(tmp_path):
+    rng = np.random.default_rng(0)
+    cache = DiskCache(tmp_path, max_bytes=200000)
+    for i in range(100):
+        cache.put(cache_key("entry", i), rng.random(1000))
+    assert cache.size() <= cache.max_bytes
+    # Most recent entries are kept
+    assert cache.get(cache_key("entry", 99)) is not None
+    assert cache.get(cache_key("entry", 0)) is None
+    cache.clear()
+    assert cache.size() == 0
@@ -0,0 +1,131 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, DrawdownParams, SimulationParams,
+                       drawdown_paths, projection_columns, simulate_drawdown)
+from fi_engine.drawdown import (portfolio_weights, projected_cost_basis,
+                                withdrawal_tax)
+
+SIM = SimulationParams(n_paths=500,
+                       distribution="normal",
+                       stocks_vol=0.18,
+                       mf_vol=0.15,
+                       fd_vol=0.01,
+                       pf_vol=0.005,
+                       seed=7)
+
+
+def test_empty_or_negative_corpus_funds_no_years():
+    result = drawdown_paths(np.array([-5.0, 0.0, 100.0]),
+                            np.full((3, 5), 1.05),
+                            DrawdownParams(),
+                            0.05,
+                            initial_spending=4)
+    np.testing.assert_array_equal(result["Years Funded"], [0, 0, 5])
+    np.testing.assert_array_equal(result["Withdrawal"][:, 0], [0, 0, 4])
+
+
+@pytest.mark.parametrize("strategy", ["Fixed", "Guardrails"])
+def test_fixed_spending_is_the_same_on_every_path(strategy):
+    drawdown = DrawdownParams(strategy=strategy)
+    _, expected = simulate_drawdown(DEFAULT_PARAMS, drawdown)
+    _, result = simulate_drawdown(DEFAULT_PARAMS, drawdown, SIM)
+    first = result["Withdrawal"][:, 0]
+    # Every path plans the deterministic first-year spend (float32 storage)
+    np.testing.assert_allclose(first, expected["Withdrawal"][0, 0],
+                               rtol=1e-6)
+
+
+def test_fixed_spending_grows_with_inflation():
+    result = drawdown_paths(np.array([1e6, 2e6]), np.full((2, 3), 1.10),
+                            DrawdownParams(withdrawal_rate=0.04), 0.05)
+    # Defaults to the rate times the median starting balance
+    np.testing.assert_allclose(result["Withdrawal"],
+                               [[60000, 63000, 66150]] * 2)
+
+
+def test_percentage_spending_follows_each_balance():
+    result = drawdown_paths(np.array([1e6, 2e6]), np.full((2, 2), 1.0),
+                            DrawdownParams(strategy="Percentage"), 0.05)
+    np.testing.assert_allclose(result["Withdrawal"][:, 0], [40000, 80000])
+
+
+def test_negative_fd_is_debt_not_leverage():
+    # A single earner spends more than they save, so FD goes negative
+    params = replace(DEFAULT_PARAMS,
+                     salary_me_monthly=60000,
+                     salary_wife_monthly=0)
+    columns = projection_columns(params)
+    row = len(columns["Year"]) - 1
+    assert columns["FD Value"][row] < 0
+    weights = portfolio_weights(columns, row)
+    assert weights["fd"] == 0
+    assert min(weights.values()) >= 0
+    assert sum(weights.values()) == pytest.approx(1)
+    # The debt is repaid from the corpus before drawdown starts, and the
+    # first year's gains are within each earner's LTCG exemption
+    drawdown = DrawdownParams(retirement_year=params.end_year)
+    _, result = simulate_drawdown(params, drawdown)
+    spending = drawdown.withdrawal_rate * columns["Total Corpus"][row]
+    assert result["Withdrawal"][0, 0] == pytest.approx(spending, rel=1e-6)
+
+
+def test_empty_corpus_is_held_as_fd():
+    columns = {name: np.zeros(1) for name in
+               ("Stocks Value", "MF Value", "FD Value", "PF Value")}
+    assert portfolio_weights(columns, 0) == {
+        "stocks": 0,
+        "mf": 0,
+        "fd": 1,
+        "pf": 0
+    }
+
+
+def test_cost_basis_is_opening_balance_plus_contributions():
+    params = DEFAULT_PARAMS
+    columns = projection_columns(params)
+    # Every surplus up to 2027 is invested in FD
+    assert (columns["Annual Surplus"][:3] > 0).all()
+    opening = (params.stocks_val + params.mf_val + params.fd_val +
+               params.pf_val)
+    assert projected_cost_basis(params, columns, 2) == pytest.approx(
+        opening + columns["Annual Surplus"][:3].sum())
+
+
+def test_rebalancing_without_returns_realizes_no_gain():
+    params = replace(DEFAULT_PARAMS,
+                     allocation="Target Allocation",
+                     rebalancing="Calendar",
+                     stocks_return=0,
+                     mf_return=0,
+                     fd_return=0,
+                     pf_return=0)
+    columns = projection_columns(params)
+    assert projected_cost_basis(params, columns, 10) == pytest.approx(
+        columns["Total Corpus"][10])
+
+
+def test_withdrawal_tax_by_asset_class():
+    params = DEFAULT_PARAMS
+    weights = {"stocks": 0.5, "mf": 0, "fd": 0, "pf": 0.5}
+    # Equity LTCG above each earner's 1.25L exemption
+    tax = withdrawal_tax(params, weights, 2030)
+    assert tax(np.array(2 * 450000.0), 0) == pytest.approx(2 * 12500 * 1.04)
+    # FD gains at slab rates, 13L each under the new regime
+    tax = withdrawal_tax(params, {**weights, "stocks": 0, "fd": 0.5}, 2030)
+    assert tax(np.array(2 * 2600000.0), 0) == pytest.approx(2 * 75000 * 1.04)
+    assert withdrawal_tax(replace(params, tax_regime="none"), weights,
+                          2030) is None
+
+
+def test_withdrawals_are_taxed_on_gains_over_cost():
+    result = drawdown_paths(np.array([1e6]),
+                            np.full((1, 2), 1.0),
+                            DrawdownParams(withdrawal_rate=0.4),
+                            0,
+                            gains_tax=lambda gain, t: 0.1 * gain,
+                            cost_basis=np.array([5e5]))
+    # Half of each withdrawal is gain, and selling keeps that share
+    np.testing.assert_allclose(result["Withdrawal"], [[420000, 420000]])
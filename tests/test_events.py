@@ -0,0 +1,54 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, CashFlowEvent, events_from_records,
+                       projection_arrays)
+
+PARAMS = replace(DEFAULT_PARAMS, end_year=2045, tax_regime="none")
+
+
+# Planned events land in their category column in the years they occur,
+# grown by their own inflation, and flow through to the surplus
+def test_events_add_to_their_columns():
+    events = (CashFlowEvent("Sabbatical", "Other Expenses", 1e5, 2030, 2032,
+                            0.1),
+              CashFlowEvent("Pension", "Other Income", 1e4, 2040, 2045,
+                            monthly=True),
+              CashFlowEvent("Wedding", "Lump Sum", 2e6, 2035))
+    base = projection_arrays(PARAMS)
+    planned = projection_arrays(replace(PARAMS, events=events))
+    years = base["Year"]
+    t = years - PARAMS.start_year
+    np.testing.assert_allclose(
+        planned["Other Expenses"],
+        np.where((years >= 2030) & (years <= 2032), 1e5 * 1.1**t, 0))
+    np.testing.assert_allclose(planned["Other Income"],
+                               np.where(years >= 2040, 12e4, 0))
+    np.testing.assert_allclose(planned["Lump Sum"] - base["Lump Sum"],
+                               np.where(years == 2035, 2e6, 0))
+    np.testing.assert_allclose(
+        planned["Annual Surplus"] - base["Annual Surplus"],
+        planned["Other Income"] - planned["Other Expenses"] -
+        np.where(years == 2035, 2e6, 0),
+        atol=1e-6)
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"category": "Holiday"}, "Unknown event category"),
+    ({"end_year": 2029}, "ends before it starts"),
+    ({"monthly": True}, "no end year"),
+    ({"month": 0}, "months must be 1-12"),
+    ({"amount": "1e5"}, "must be numbers"),
+])
+def test_rejects_bad_events(record, message):
+    valid = {
+        "name": "Trip",
+        "category": "Other Expenses",
+        "amount": 1e5,
+        "start_year": 2030
+    }
+    assert events_from_records([valid])[0].end_year is None
+    with pytest.raises(ValueError, match=message):
+        events_from_records([{**valid, **record}])
@@ -0,0 +1,28 @@
+import numpy as np
+
+from fi_engine import HISTORICAL_SERIES, bootstrap_growth, historical_returns
+from fi_engine.historical import asset_return_table, block_bootstrap_indices
+
+
+def test_blocks_are_runs_of_consecutive_years():
+    index = block_bootstrap_indices(np.random.default_rng(0), 30, (100, 20),
+                                    5)
+    assert index.shape == (100, 20)
+    assert ((index >= 0) & (index < 30)).all()
+    steps = np.diff(index, axis=1)
+    # Within a block each year follows the one before, wrapping around the
+    # end of the history
+    within = np.arange(1, 20) % 5 != 0
+    assert np.isin(steps[:, within], [1, -29]).all()
+
+
+def test_growth_compounds_historical_returns():
+    returns = historical_returns()
+    table = asset_return_table()
+    assert table.shape == (len(returns), len(HISTORICAL_SERIES))
+    np.testing.assert_allclose(table[:, 1],
+                               (returns["Equity"] + returns["Debt"]) / 2)
+    growth = bootstrap_growth(np.random.default_rng(0), (50, 10), 1)
+    yearly = growth["fd"][:, 1:] / growth["fd"][:, :-1] - 1
+    # Every simulated year's return is one that happened
+    assert np.isin(np.round(yearly, 10), np.round(returns["FD"], 10)).all()
@@ -0,0 +1,93 @@
+# Patched projections against a full recompute. They must be identical, not
+# just close, because patched results are cached as if they were full runs.
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, CashFlowEvent, cached_projection,
+                       cached_update, first_affected_year, projection_arrays,
+                       projection_state, update_projection)
+
+BASE = replace(DEFAULT_PARAMS, end_year=2090)
+YEAR_EDITS = ("house_construction_year", "house_loan_closure_year",
+              "car_loan_closure_year", "bike_purchase_year",
+              "kids_edu_start_year", "kids_edu_end_year", "end_year")
+AMOUNT_EDITS = ("house_cost", "bike_cost", "kids_edu_annual",
+                "rental_monthly_future", "household_monthly_future",
+                "target_corpus", "salary_me_monthly", "fd_val")
+RATE_EDITS = ("kids_edu_inflation", "stocks_return", "fd_return",
+              "income_growth")
+
+
+def assert_same_as_full(state):
+    full = projection_arrays(state.params)
+    assert list(state.columns) == list(full)
+    for name, values in full.items():
+        np.testing.assert_array_equal(state.columns[name],
+                                      np.asarray(values),
+                                      err_msg=name)
+    np.testing.assert_array_equal(
+        state.discounted_fd,
+        projection_state(state.params).discounted_fd)
+
+
+def random_edit(rng, params):
+    changes = {}
+    for name in rng.choice(YEAR_EDITS + AMOUNT_EDITS + RATE_EDITS,
+                           size=int(rng.integers(1, 3)),
+                           replace=False):
+        if name in YEAR_EDITS:
+            changes[name] = int(
+                rng.integers(params.start_year + 1, params.start_year + 70))
+        elif name in RATE_EDITS:
+            changes[name] = float(rng.uniform(0, 0.2))
+        else:
+            changes[name] = float(rng.uniform(0, 2e7))
+    return replace(params, **changes)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_edit_sequences_match_full_recompute(seed):
+    rng = np.random.default_rng(seed)
+    state = projection_state(BASE)
+    for _ in range(30):
+        state = update_projection(state, random_edit(rng, state.params))
+        assert_same_as_full(state)
+
+
+def test_late_edit_only_recomputes_suffix():
+    late = replace(BASE, bike_purchase_year=2060)
+    assert first_affected_year(BASE, late) == 2028
+    assert first_affected_year(replace(BASE, bike_purchase_year=2050),
+                               late) == 2050
+    assert first_affected_year(BASE, replace(BASE, stocks_return=0.1)) == (
+        BASE.start_year)
+    assert first_affected_year(BASE, replace(BASE,
+                                             target_corpus=1)) == 2091
+
+
+def test_event_edits_match_full_recompute():
+    wedding = CashFlowEvent("Wedding", "Lump Sum", 2e6, 2040)
+    sabbatical = CashFlowEvent("Sabbatical", "Other Expenses", 1e6, 2050,
+                               2051)
+    state = projection_state(BASE)
+    for events in [(wedding, ), (wedding, sabbatical), (sabbatical, ), ()]:
+        params = replace(BASE, events=events)
+        if events:
+            assert first_affected_year(state.params, params) >= 2040
+        state = update_projection(state, params)
+        assert_same_as_full(state)
+
+
+def test_cached_update_reuses_shared_cache():
+    params = replace(BASE, house_cost=1.5e7)
+    state = cached_update(projection_state(BASE), params)
+    assert_same_as_full(state)
+    assert cached_projection(params) is state.columns
+    # Coming back to it from another plan is a cache hit
+    other = cached_update(None, replace(BASE, bike_cost=1e5))
+    again = cached_update(other, params)
+    np.testing.assert_array_equal(again.columns["Total Corpus"],
+                                  state.columns["Total Corpus"])
+    assert cached_projection(params) is state.columns
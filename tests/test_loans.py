@@ -0,0 +1,90 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import (LoanParams, full_schedule, loan_schedule, loan_totals,
+                       loans_from_records, prepay_vs_invest)
+
+LOAN = LoanParams(name="Home",
+                  category="House Loan EMI",
+                  principal=1000000,
+                  rate=0.12,
+                  tenure_months=120,
+                  start_year=2025)
+
+
+def test_emi_repays_loan_over_its_tenure():
+    schedule = loan_schedule(LOAN)
+    np.testing.assert_allclose(schedule["EMI"], 14347.09, atol=0.005)
+    assert schedule["Balance"][-1] == 0
+    assert schedule["Principal"].sum() == pytest.approx(LOAN.principal)
+    assert schedule["Interest"][0] == pytest.approx(10000)
+    assert (schedule["Year"][-1], schedule["Month"][-1]) == (2034, 12)
+
+
+def test_prepayment_closes_loan_early():
+    schedule = full_schedule(replace(LOAN,
+                                     prepayments=((2026, 1, 300000), )))
+    assert len(schedule["Balance"]) < LOAN.tenure_months
+    assert schedule["Balance"][-1] == 0
+    assert schedule["Prepayment"].sum() == pytest.approx(300000)
+
+
+# A rate rise either stretches the loan (EMI kept) or raises the EMI so it
+# still closes on time
+def test_rate_reset():
+    loan = replace(LOAN, rate_resets=((2027, 1, 0.15), ))
+    kept = full_schedule(loan)
+    assert len(kept["Balance"]) > LOAN.tenure_months
+    np.testing.assert_allclose(kept["EMI"][:-1], 14347.09, atol=0.005)
+    raised = full_schedule(replace(loan, keep_emi=False))
+    assert len(raised["Balance"]) == LOAN.tenure_months
+    assert raised["EMI"][24] > raised["EMI"][23]
+
+
+def test_batched_schedules_match_single():
+    amounts = np.array([0, 50000, 200000])
+    batch = loan_schedule(replace(LOAN, annual_prepayment=amounts))
+    for i, amount in enumerate(amounts):
+        single = loan_schedule(replace(LOAN, annual_prepayment=amount))
+        np.testing.assert_allclose(batch["Balance"][i], single["Balance"])
+
+
+def test_yearly_totals_carry_earlier_balance():
+    payments, balance = loan_totals((LOAN, ), 2027, 2040)
+    schedule = loan_schedule(LOAN)
+    assert payments["House Loan EMI"][0] == pytest.approx(12 * 14347.09,
+                                                          abs=0.1)
+    assert payments["Car Loan EMI"].sum() == 0
+    assert balance[0] == pytest.approx(schedule["Balance"][35])
+    assert balance[-1] == 0
+
+
+def test_prepaying_saves_interest():
+    table = prepay_vs_invest(LOAN, [0, 100000], 0.0)
+    assert table["Interest Saved"][0] == 0
+    assert table["Interest Saved"][1] > 0
+    assert table["Months Saved"][1] > 0
+    # With nothing earned on investments, prepaying always comes out ahead
+    assert table["Prepay Advantage"][1] > 0
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"category": "Gold Loan EMI"}, "Unknown loan category"),
+    ({"tenure_months": 0}, "tenure"),
+    ({"start_month": 13}, "months must be 1-12"),
+    ({"rate": "9%"}, "must be numbers"),
+])
+def test_rejects_bad_loans(record, message):
+    valid = {
+        "name": "Car",
+        "category": "Car Loan EMI",
+        "principal": 500000,
+        "rate": 0.09,
+        "tenure_months": 60,
+        "start_year": 2025
+    }
+    assert loans_from_records([valid])[0].principal == 500000
+    with pytest.raises(ValueError, match=message):
+        loans_from_records([{**valid, **record}])
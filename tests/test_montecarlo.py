@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, SimulationParams, corpus_path_summary,
+                       projection_columns, simulate_corpus_paths,
+                       simulated_growth)
+
+
+def simulation(n_paths, distribution, vol, seed=0):
+    return SimulationParams(n_paths=n_paths,
+                            distribution=distribution,
+                            stocks_vol=vol,
+                            mf_vol=vol,
+                            fd_vol=vol,
+                            pf_vol=vol,
+                            seed=seed)
+
+
+# Without volatility every path is the deterministic projection
+@pytest.mark.parametrize("distribution", ["Normal", "Log-normal"])
+def test_zero_volatility_paths_match_projection(distribution):
+    corpus = simulate_corpus_paths(DEFAULT_PARAMS,
+                                   simulation(3, distribution, 0.0))
+    expected = projection_columns(DEFAULT_PARAMS)["Total Corpus"]
+    # Paths are stored as float32
+    np.testing.assert_allclose(corpus, np.broadcast_to(expected, (3, 13)),
+                               rtol=1e-6)
+
+
+@pytest.mark.parametrize("distribution", ["Normal", "Log-normal"])
+def test_growth_has_the_requested_mean(distribution):
+    growth = simulated_growth(np.random.default_rng(0), 0.08, 0.2,
+                              (200000, 2), distribution)
+    assert growth[:, 0].mean() == pytest.approx(1.08, abs=2e-3)
+    assert (growth[:, 1] / growth[:, 0]).std() == pytest.approx(0.2,
+                                                               abs=2e-3)
+
+
+def test_seed_reproduces_paths():
+    sim = simulation(50, "Log-normal", 0.15, seed=3)
+    first = simulate_corpus_paths(DEFAULT_PARAMS, sim, chunk_elements=130)
+    assert first.shape == (50, 13)
+    np.testing.assert_array_equal(
+        simulate_corpus_paths(DEFAULT_PARAMS, sim, chunk_elements=130), first)
+    assert (first != simulate_corpus_paths(
+        DEFAULT_PARAMS, simulation(50, "Log-normal", 0.15, seed=4))).any()
+
+
+def test_summary_probabilities():
+    corpus = np.array([[1, 5, 2], [1, 2, 3], [6, 1, 1], [0, 0, 0]])
+    summary = corpus_path_summary(corpus, [2025, 2026, 2027], 5)
+    np.testing.assert_allclose(summary["P(Corpus >= Target)"],
+                               [0.25, 0.25, 0])
+    np.testing.assert_allclose(summary["P(FI by Year)"], [0.25, 0.5, 0.5])
+    np.testing.assert_allclose(summary["Median"], [1, 1.5, 1.5])
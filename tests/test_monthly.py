@@ -0,0 +1,49 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, MonthlyParams, monthly_arrays,
+                       projection_arrays, yearly_rollup)
+
+FLOWS = ("Total Income", "Income Tax", "Total Expenses", "Household Exp",
+         "Kids Education", "House Loan EMI", "Lump Sum")
+
+
+def rollup(params, monthly_params):
+    return yearly_rollup(params, monthly_arrays(params, monthly_params))
+
+
+# With every date in January the months of a year add up to the yearly
+# engine's flows; only the FD, which takes the surplus month by month,
+# differs
+@pytest.mark.parametrize("end_year", [2037, 2060])
+def test_january_dates_match_yearly_flows(end_year):
+    params = replace(DEFAULT_PARAMS, end_year=end_year)
+    yearly = projection_arrays(params)
+    monthly = rollup(params, MonthlyParams())
+    for name in FLOWS + ("Stocks Value", "MF Value", "PF Value"):
+        np.testing.assert_allclose(monthly[name], yearly[name], err_msg=name)
+    np.testing.assert_array_equal(monthly["Year"], yearly["Year"])
+
+
+def test_later_construction_month_moves_rent_not_cost():
+    january = rollup(DEFAULT_PARAMS, MonthlyParams())
+    july = rollup(DEFAULT_PARAMS, MonthlyParams(house_construction_month=7))
+    year = DEFAULT_PARAMS.house_construction_year - DEFAULT_PARAMS.start_year
+    assert july["Lump Sum"][year] == january["Lump Sum"][year]
+    # Six more months of the old rent
+    rent = 6 * (DEFAULT_PARAMS.rental_monthly_future -
+                DEFAULT_PARAMS.rental_monthly_now)
+    assert january["Total Income"][year] - july["Total Income"][
+        year] == pytest.approx(rent)
+
+
+def test_sips_move_surplus_from_fd_to_equity():
+    sip = MonthlyParams(sip_stocks_monthly=10000, sip_mf_monthly=5000)
+    base = rollup(DEFAULT_PARAMS, MonthlyParams())
+    with_sip = rollup(DEFAULT_PARAMS, sip)
+    np.testing.assert_allclose(with_sip["Annual Surplus"],
+                               base["Annual Surplus"])
+    assert (with_sip["Stocks Value"] > base["Stocks Value"]).all()
+    assert (with_sip["FD Value"] < base["FD Value"]).all()
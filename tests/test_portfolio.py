@@ -0,0 +1,70 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import DEFAULT_PARAMS, projection_arrays, target_weights
+from fi_engine.portfolio import target_balances
+from fi_engine.projection import batched_inputs
+
+TARGETED = replace(DEFAULT_PARAMS,
+                   allocation="Target Allocation",
+                   end_year=2060)
+
+
+def test_equity_glides_between_ages():
+    x = batched_inputs(TARGETED)
+    weights = target_weights(x, np.array([30, 35, 47.5, 60, 70]))
+    np.testing.assert_allclose(weights["stocks"] + weights["mf"],
+                               [0.6, 0.6, 0.45, 0.3, 0.3])
+    np.testing.assert_allclose(weights["fd"], [0.4, 0.4, 0.55, 0.7, 0.7])
+
+
+# Yearly calendar rebalancing puts the traded assets back on target at the
+# end of every year the plan isn't drawing down
+def test_calendar_rebalancing_holds_targets():
+    columns = projection_arrays(TARGETED)
+    traded = (columns["Stocks Value"] + columns["MF Value"] +
+              columns["FD Value"])
+    weights = target_weights(batched_inputs(TARGETED),
+                             columns["Age Me"].astype(float))
+    positive = columns["Annual Surplus"] > 0
+    np.testing.assert_allclose(
+        (columns["Stocks Value"] / traded)[positive],
+        weights["stocks"][positive])
+
+
+# Where every asset earns the same, how the surplus is split can't change
+# the corpus
+def test_allocation_only_moves_money_between_assets():
+    same = {
+        f"{asset}_return": 0.07
+        for asset in ("stocks", "mf", "fd", "pf")
+    }
+    to_fd = projection_arrays(
+        replace(TARGETED, allocation="Surplus to FD", **same))
+    targeted = projection_arrays(replace(TARGETED, **same))
+    np.testing.assert_allclose(targeted["Total Corpus"],
+                               to_fd["Total Corpus"])
+
+
+def test_deficits_sell_fd_then_mf_then_stocks_then_pf():
+    x = batched_inputs(replace(TARGETED, rebalancing="None"))
+    initial = {
+        asset: np.array([10.0])
+        for asset in ("stocks", "mf", "fd", "pf")
+    }
+    steps = {asset: 1.0 for asset in initial}
+    balances = target_balances(x, initial, steps,
+                               np.array([-15.0, -20.0, -10.0]),
+                               np.arange(3))
+    np.testing.assert_allclose(balances["FD Value"], [0, 0, 0])
+    np.testing.assert_allclose(balances["MF Value"], [5, 0, 0])
+    np.testing.assert_allclose(balances["Stocks Value"], [10, 0, 0])
+    np.testing.assert_allclose(balances["PF Value"], [10, 5, 0])
+    np.testing.assert_allclose(balances["Unfunded Deficit"], [0, 0, 5])
+
+
+def test_rejects_unknown_allocation():
+    with pytest.raises(ValueError, match="Unknown allocation"):
+        projection_arrays(replace(DEFAULT_PARAMS, allocation="All stocks"))
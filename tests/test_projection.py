@@ -0,0 +1,161 @@
+# The vectorized engine against the original year-by-year loop, which had
+# no income tax, planned events or target allocation
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fi_engine import DEFAULT_PARAMS, projection_arrays, projection_frame
+
+YEAR_FIELDS = ("house_loan_closure_year", "car_loan_closure_year",
+               "kids_edu_start_year", "house_construction_year",
+               "bike_purchase_year")
+RATE_FIELDS = ("income_growth", "stocks_return", "mf_return", "fd_return",
+               "pf_return", "inflation_exp", "inflation_fuel",
+               "vacation_inflation", "kids_edu_inflation")
+AMOUNT_FIELDS = ("salary_me_monthly", "salary_wife_monthly", "house_cost",
+                 "household_monthly_now", "fd_val", "stocks_val",
+                 "house_loan_emi", "kids_edu_annual")
+
+
+# The app's original calculate_projections, reading a parameter object
+def loop_projection(p):
+    rows = []
+    curr_stocks_val = p.stocks_val
+    curr_mf_val = p.mf_val
+    curr_fd_val = p.fd_val
+    curr_pf_val = p.pf_val
+
+    for year in range(p.start_year, p.end_year + 1):
+        t = year - p.start_year
+        salary_me = p.salary_me_monthly * 12 * ((1 + p.income_growth)**t)
+        salary_wife = p.salary_wife_monthly * 12 * ((1 + p.income_growth)**t)
+        rental_income = (p.rental_monthly_now
+                         if year < p.house_construction_year else
+                         p.rental_monthly_future) * 12
+        total_income = salary_me + salary_wife + rental_income
+
+        household_exp = ((p.household_monthly_now
+                          if year < p.house_construction_year else
+                          p.household_monthly_future) *
+                         ((1 + p.inflation_exp)**t) * 12)
+        personal_exp = p.personal_monthly * ((1 + p.inflation_exp)**t) * 12
+        fuel_exp = p.fuel_monthly * ((1 + p.inflation_fuel)**t) * 12
+        house_loan = (p.house_loan_emi *
+                      12 if year < p.house_loan_closure_year else 0)
+        car_loan = p.car_loan_emi * 12 if year < p.car_loan_closure_year else 0
+        vacation_exp = p.vacation_annual * ((1 + p.vacation_inflation)**t)
+        kids_edu = (p.kids_edu_annual * ((1 + p.kids_edu_inflation)**t)
+                    if p.kids_edu_start_year <= year <= p.kids_edu_end_year
+                    else 0)
+        total_exp = (household_exp + personal_exp + fuel_exp + house_loan +
+                     car_loan + vacation_exp + kids_edu)
+
+        lump_sum = 0
+        if year == p.house_construction_year:
+            lump_sum += p.house_cost
+        if year == p.bike_purchase_year:
+            lump_sum += p.bike_cost
+
+        curr_stocks_val *= (1 + p.stocks_return)
+        curr_mf_val *= (1 + p.mf_return)
+        curr_fd_val *= (1 + p.fd_return)
+        curr_pf_val *= (1 + p.pf_return)
+        surplus = total_income - total_exp - lump_sum
+        curr_fd_val += surplus
+        total_corpus = (curr_stocks_val + curr_mf_val + curr_fd_val +
+                        curr_pf_val)
+
+        rows.append({
+            "Year": year,
+            "Age Me": p.age_me + t,
+            "Age Wife": p.age_wife + t,
+            "Total Income": round(total_income, 0),
+            "Total Expenses": round(total_exp + lump_sum, 0),
+            "Annual Surplus": round(surplus, 0),
+            "Household Exp": round(household_exp, 0),
+            "Personal Exp": round(personal_exp, 0),
+            "Fuel Exp": round(fuel_exp, 0),
+            "Vacation Exp": round(vacation_exp, 0),
+            "Kids Education": round(kids_edu, 0),
+            "House Loan EMI": round(house_loan, 0),
+            "Car Loan EMI": round(car_loan, 0),
+            "Lump Sum": round(lump_sum, 0),
+            "Stocks Value": round(curr_stocks_val, 0),
+            "MF Value": round(curr_mf_val, 0),
+            "FD Value": round(curr_fd_val, 0),
+            "PF Value": round(curr_pf_val, 0),
+            "Total Corpus": round(total_corpus, 0),
+            "FI Achieved?": "Yes" if total_corpus >= p.target_corpus else "No"
+        })
+    return pd.DataFrame(rows)
+
+
+# Random untaxed plan over a horizon of 1-100 years
+def random_params(rng):
+    start = int(rng.integers(2020, 2031))
+    end = start + int(rng.integers(1, 101))
+    values = {
+        name: int(rng.integers(start, end + 1))
+        for name in YEAR_FIELDS
+    }
+    values["kids_edu_end_year"] = int(
+        rng.integers(values["kids_edu_start_year"], end + 1))
+    values.update(
+        {name: float(rng.integers(0, 41)) * 0.005
+         for name in RATE_FIELDS})
+    values.update({
+        name: float(rng.integers(1, 51)) * 10000
+        for name in AMOUNT_FIELDS
+    })
+    return replace(DEFAULT_PARAMS,
+                   start_year=start,
+                   end_year=end,
+                   target_corpus=float(rng.integers(1, 501)) * 1e6,
+                   tax_regime="none",
+                   **values)
+
+
+def assert_matches_loop(params):
+    expected = loop_projection(params)
+    actual = projection_frame(params)[expected.columns]
+    # Whole-rupee rounding may land either side of .5 when the engine sums
+    # in a different order
+    pd.testing.assert_frame_equal(actual,
+                                  expected,
+                                  check_dtype=False,
+                                  rtol=1e-9,
+                                  atol=1.0)
+
+
+def test_default_plan_matches_loop():
+    assert_matches_loop(replace(DEFAULT_PARAMS, tax_regime="none"))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_plans_match_loop(seed):
+    assert_matches_loop(random_params(np.random.default_rng(seed)))
+
+
+# Every row of a batched run is exactly the same parameter set run alone
+def test_batch_rows_match_single_runs():
+    rng = np.random.default_rng(0)
+    n = 20
+    values = {
+        "house_construction_year": rng.integers(2025, 2038, n),
+        "kids_edu_start_year": rng.integers(2025, 2035, n),
+        "stocks_return": rng.uniform(0, 0.2, n),
+        "salary_me_monthly": rng.uniform(0, 5e5, n),
+        "house_cost": rng.uniform(0, 2e7, n),
+    }
+    batch = projection_arrays(replace(DEFAULT_PARAMS, **values))
+    for i in range(n):
+        single = projection_arrays(
+            replace(DEFAULT_PARAMS,
+                    **{name: array[i].item()
+                       for name, array in values.items()}))
+        for name, column in single.items():
+            expected = np.broadcast_to(column, batch[name].shape[-1:])
+            actual = batch[name] if batch[name].ndim == 1 else batch[name][i]
+            np.testing.assert_array_equal(actual, expected, err_msg=name)
@@ -0,0 +1,61 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, CashFlowEvent, MonthlyParams,
+                       ScenarioStore, compare_scenarios,
+                       monthly_projection_frame, projection_frame)
+
+WEDDING = CashFlowEvent("Wedding", "Lump Sum", 2e6, 2030)
+
+
+def test_saved_scenarios_load_back(tmp_path):
+    store = ScenarioStore(str(tmp_path / "scenarios.db"))
+    params = replace(DEFAULT_PARAMS,
+                     salary_me_monthly=np.float64(210000),
+                     events=(WEDDING, ))
+    monthly_params = MonthlyParams(house_construction_month=6)
+    store.save("asha", "Base", DEFAULT_PARAMS)
+    store.save("asha", "Wedding", params, monthly_params)
+    store.save("ravi", "Base", params)
+
+    assert list(store.list("asha")["name"]) == ["Wedding", "Base"]
+    assert store.find("asha", params, monthly_params) == ["Wedding"]
+    assert store.find("asha", params) == []
+    loaded, loaded_monthly, projections = store.load("asha", "Wedding")
+    assert (loaded, loaded_monthly) == (params, monthly_params)
+    pd.testing.assert_frame_equal(projections,
+                                  monthly_projection_frame(
+                                      params, monthly_params),
+                                  check_dtype=False,
+                                  check_categorical=False)
+
+    # Saving under the same name replaces the scenario
+    store.save("asha", "Base", params)
+    assert store.find("asha", params) == ["Base"]
+    store.delete("asha", "Base")
+    with pytest.raises(KeyError):
+        store.load("asha", "Base")
+    with pytest.raises(ValueError):
+        store.save("asha", " ", params)
+
+
+# Plans batched together for comparison give the same projections as each
+# one run alone, in the order they were given
+def test_comparison_matches_single_runs():
+    scenarios = {
+        "Base": (DEFAULT_PARAMS, None),
+        "Later": (replace(DEFAULT_PARAMS, end_year=2045), None),
+        "Frugal": (replace(DEFAULT_PARAMS, household_monthly_future=40000),
+                   None),
+        "Wedding": (replace(DEFAULT_PARAMS, events=(WEDDING, )), None),
+    }
+    combined = compare_scenarios(scenarios)
+    assert list(combined["Scenario"].unique()) == list(scenarios)
+    for name, (params, _) in scenarios.items():
+        frame = combined[combined["Scenario"] == name].drop(
+            columns="Scenario").reset_index(drop=True)
+        pd.testing.assert_frame_equal(frame, projection_frame(params),
+                                      check_dtype=False)
@@ -0,0 +1,81 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from fi_engine import (DEFAULT_PARAMS, fi_summary, halton, nudged_values,
+                       projection_arrays, sobol_indices, tornado)
+from fi_engine.sensitivity import _indices
+
+PARAMS = replace(DEFAULT_PARAMS, end_year=2050)
+
+
+def test_nudges_stay_in_range():
+    params = replace(PARAMS, equity_start=0.995, rebalance_every=1)
+    nudged = nudged_values(
+        params, ["house_cost", "stocks_return", "age_me", "equity_start",
+                 "rebalance_every"])
+    assert nudged["house_cost"] == pytest.approx((0.9 * params.house_cost,
+                                                  1.1 * params.house_cost))
+    assert nudged["stocks_return"] == pytest.approx(
+        (params.stocks_return - 0.01, params.stocks_return + 0.01))
+    assert nudged["age_me"] == (params.age_me - 1, params.age_me + 1)
+    assert nudged["equity_start"] == pytest.approx((0.985, 1))
+    assert nudged["rebalance_every"] == (1, 2)
+
+
+# Each row of the batched table is the plan run alone with that one input
+# nudged
+def test_tornado_rows_match_single_runs():
+    table = tornado(PARAMS, ["house_cost", "stocks_return", "fd_val"])
+    assert list(table["Corpus Swing"]) == sorted(table["Corpus Swing"],
+                                                 reverse=True)
+    for _, row in table.iterrows():
+        for side in ("Low", "High"):
+            fi_year, final = fi_summary(
+                projection_arrays(replace(PARAMS, **{row["Input"]:
+                                                     row[side]})))
+            assert row[f"Final Corpus ({side})"] == pytest.approx(final)
+            np.testing.assert_equal(row[f"FI Year ({side})"], fi_year)
+
+
+def test_halton_points_fill_unit_cube():
+    points = halton(4096, 3)
+    assert ((points > 0) & (points < 1)).all()
+    # Each dimension is close to uniform: every tenth holds a tenth
+    counts = np.stack([
+        np.histogram(points[:, j], bins=10, range=(0, 1))[0]
+        for j in range(3)
+    ])
+    np.testing.assert_allclose(counts, 409.6, atol=10)
+
+
+# For f = x1 + 2 x2 with uniform inputs the variance splits 1:4 and there
+# are no interactions, so first-order and total effects agree
+def test_indices_of_additive_function():
+    n = 8192
+    points = halton(n, 4).reshape(n, 2, 2)
+    a, b = points[:, 0], points[:, 1]
+    mixed = np.repeat(a[None], 2, axis=0)
+    mixed[np.arange(2), :, np.arange(2)] = b.T
+
+    def f(x):
+        return x[..., 0] + 2 * x[..., 1]
+
+    first, total = _indices(f(a), f(b), f(mixed), n)
+    np.testing.assert_allclose(first, [0.2, 0.8], atol=0.02)
+    np.testing.assert_allclose(total, [0.2, 0.8], atol=0.02)
+
+
+def test_sobol_ranks_inputs_by_effect():
+    indices, convergence = sobol_indices(
+        PARAMS, {
+            "stocks_return": (0.05, 0.15),
+            "age_wife": (25, 40),
+            "fd_return": (0.06, 0.07),
+        },
+        n_samples=512)
+    corpus = indices[indices["Output"] == "Final Corpus"].set_index("Input")
+    assert corpus.loc["stocks_return", "Total Effect"] > 0.9
+    assert corpus.loc["age_wife", "Total Effect"] == pytest.approx(0)
+    assert set(convergence["Samples"]) == {64, 128, 256, 512}
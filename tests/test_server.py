@@ -0,0 +1,36 @@
+import pytest
+
+from fi_engine import DEFAULT_PARAMS, MonthlyParams
+from fi_engine.server import flag, parse_params
+
+
+def test_overrides_defaults():
+    params = parse_params({"end_year": 2060, "tax_regime": "old"},
+                          DEFAULT_PARAMS)
+    assert (params.end_year, params.tax_regime) == (2060, "old")
+
+
+@pytest.mark.parametrize("values, message", [
+    ({"end_year": 2000}, "end_year"),
+    ({"tax_regime": "Old"}, "Unknown tax_regime"),
+    ({"allocation": "All stocks"}, "Unknown allocation"),
+    ({"rebalancing": "Daily"}, "Unknown rebalancing"),
+    ({"stocks_return": "0.1"}, "must be a number"),
+    ({"salary": 1}, "Unknown inputs"),
+])
+def test_rejects_bad_params(values, message):
+    with pytest.raises(ValueError, match=message):
+        parse_params(values, DEFAULT_PARAMS)
+
+
+def test_rejects_bad_months():
+    with pytest.raises(ValueError, match="between 1 and 12"):
+        parse_params({"bike_purchase_month": 13}, MonthlyParams())
+
+
+@pytest.mark.parametrize("value", ["false", 0, 1, None])
+def test_rows_must_be_boolean(value):
+    with pytest.raises(ValueError, match="true or false"):
+        flag({"rows": value}, "rows", True)
+    assert flag({}, "rows", True) is True
+    assert flag({"rows": False}, "rows", True) is False
@@ -0,0 +1,32 @@
+from dataclasses import replace
+
+import pytest
+
+from fi_engine import DEFAULT_PARAMS, MonthlyParams, fi_margin, solve_for
+
+PARAMS = replace(DEFAULT_PARAMS, end_year=2060)
+
+
+# The answer is the edge of the bracket where the goal flips: it meets the
+# goal and a step past it (the search precision) doesn't
+@pytest.mark.parametrize("name, fi_year, step, monthly_params", [
+    ("salary_me_monthly", 2040, -1, None),
+    ("stocks_return", 2035, -1e-5, None),
+    ("household_monthly_future", 2040, 1, None),
+    ("salary_me_monthly", 2040, -1, MonthlyParams(house_construction_month=7)),
+])
+def test_goal_flips_at_solution(name, fi_year, step, monthly_params):
+    solution = solve_for(PARAMS, name, fi_year, monthly_params)
+    assert solution.status == "solved"
+    assert fi_margin(replace(PARAMS, **{name: solution.value}), fi_year,
+                     monthly_params) >= 0
+    assert fi_margin(replace(PARAMS, **{name: solution.value + step}),
+                     fi_year, monthly_params) < 0
+
+
+def test_reports_goals_outside_bounds():
+    assert solve_for(PARAMS, "target_corpus", 2040,
+                     bounds=(0, 1e6, 1)).status == "always"
+    solution = solve_for(PARAMS, "target_corpus", 2026,
+                         bounds=(1e12, 2e12, 1))
+    assert (solution.status, solution.value) == ("never", None)
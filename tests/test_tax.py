@@ -0,0 +1,97 @@
+# Slab edges of the income-tax engine, worked out by hand from the FY
+# 2025-26 rules. Amounts include the 4% cess.
+import numpy as np
+import pytest
+
+from fi_engine.tax import (NEW_REGIME_STANDARD_DEDUCTION,
+                           OLD_REGIME_STANDARD_DEDUCTION, equity_gains_tax,
+                           income_tax, new_regime_tax, old_regime_tax)
+
+
+# New regime: no tax up to 12L under section 87A, then marginal relief
+# caps the tax at the income above 12L until the slab tax is lower
+@pytest.mark.parametrize("taxable, expected", [
+    (0, 0),
+    (400000, 0),
+    (1200000, 0),
+    (1200001, 1.04),
+    (1210000, 10000 * 1.04),
+    (1270000, 70000 * 1.04),
+    (1300000, 75000 * 1.04),
+    (1600000, 120000 * 1.04),
+    (2400000, 300000 * 1.04),
+])
+def test_new_regime_rebate_and_marginal_relief(taxable, expected):
+    assert new_regime_tax(np.array(taxable, dtype=float)) == pytest.approx(
+        expected)
+
+
+def test_new_regime_relief_ends_where_slab_tax_is_lower():
+    # 60000 + 15% of the excess equals the excess at about 12,70,588
+    taxable = np.array([1270000, 1270588, 1270589, 1280000], dtype=float)
+    slab = 60000 + 0.15 * (taxable - 1200000)
+    expected = np.minimum(slab, taxable - 1200000) * 1.04
+    np.testing.assert_allclose(new_regime_tax(taxable), expected)
+    assert (np.diff(new_regime_tax(taxable)) > 0).all()
+
+
+def test_new_regime_surcharge():
+    # 60L: 3L up to 24L plus 30% of 36L, then 10% surcharge
+    assert new_regime_tax(np.array(6000000.0)) == pytest.approx(
+        1380000 * 1.10 * 1.04)
+
+
+# Old regime: full rebate up to 5L and none above it
+@pytest.mark.parametrize("taxable, age, expected", [
+    (250000, 40, 0),
+    (500000, 40, 0),
+    (500100, 40, (12500 + 20) * 1.04),
+    (1000000, 40, 112500 * 1.04),
+    (1000000, 60, 110000 * 1.04),
+    (1000000, 80, 100000 * 1.04),
+])
+def test_old_regime_rebate_and_age_slabs(taxable, age, expected):
+    assert old_regime_tax(np.array(taxable, dtype=float),
+                          age) == pytest.approx(expected)
+
+
+def test_salary_gets_standard_deduction():
+    at_limit = 1200000 + NEW_REGIME_STANDARD_DEDUCTION
+    assert income_tax(at_limit, 40) == 0
+    assert income_tax(at_limit + 10000, 40) == pytest.approx(10000 * 1.04)
+    assert income_tax(500000 + OLD_REGIME_STANDARD_DEDUCTION, 40,
+                      "old") == 0
+
+
+def test_rent_deduction_and_old_regime_deductions():
+    # 30% of rent is deductible; 80C-style deductions only count under
+    # the old regime
+    assert income_tax(0, 40, "new", rental=1e6 / 0.7) == pytest.approx(0)
+    assert income_tax(1e6, 40, "old", deductions=1e6) == 0
+    assert income_tax(1e6, 40, "new", deductions=1e6) == income_tax(1e6, 40)
+
+
+def test_batched_regimes_match_single_regimes():
+    salary = np.array([8e5, 1.5e6, 3e6, 6e6])
+    age = np.array([30, 45, 62, 81])
+    regimes = np.array(["new", "old", "none", "old"])
+    batched = income_tax(salary, age, regimes, 2e5, 1e5, 150000)
+    single = [
+        income_tax(s, a, r, 2e5, 1e5, 150000)
+        for s, a, r in zip(salary, age, regimes)
+    ]
+    np.testing.assert_allclose(batched, single)
+    assert batched[2] == 0
+
+
+@pytest.mark.parametrize("regime", ["Old", "old_regime", "", "NEW"])
+def test_unknown_regime_raises(regime):
+    with pytest.raises(ValueError, match="Unknown tax regime"):
+        income_tax(1e6, 40, regime)
+    with pytest.raises(ValueError, match="Unknown tax regime"):
+        income_tax(np.array([1e6, 1e6]), 40, np.array(["new", regime]))
+
+
+def test_equity_gains_exemption():
+    assert equity_gains_tax(125000) == 0
+    assert equity_gains_tax(225000) == pytest.approx(12500 * 1.04)
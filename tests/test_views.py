@@ -0,0 +1,19 @@
+import numpy as np
+
+from views import lttb_indices
+
+
+def test_short_series_are_kept_whole():
+    np.testing.assert_array_equal(lttb_indices(range(5), range(5), 10),
+                                  np.arange(5))
+
+
+def test_keeps_ends_and_extremes():
+    x = np.arange(10000)
+    y = np.sin(x / 500.0)
+    y[1234], y[8765] = 50, -50
+    selected = lttb_indices(x, y, 200)
+    assert len(selected) == 200
+    assert selected[0] == 0 and selected[-1] == len(x) - 1
+    assert (np.diff(selected) > 0).all()
+    assert {1234, 8765} <= set(selected)
@@ -0,0 +1,654 @@
+# Builders for the tables, figures and downloads shown in the app's tabs.
+# They only depend on pandas, Plotly and the engine, so they can be timed
+# and reused outside a Streamlit run.
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from io import BytesIO
+
+from fi_engine.events import builtin_events, event_milestones
+from fi_engine.loans import loan_milestones
+
+# Currency columns of the projections table
+CURRENCY_COLS = [
+    'Total Income', 'Income Tax', 'Total Expenses', 'Annual Surplus',
+    'Household Exp', 'Personal Exp', 'Fuel Exp', 'Vacation Exp',
+    'Kids Education', 'House Loan EMI', 'Car Loan EMI', 'Other Expenses',
+    'Lump Sum', 'Other Income', 'Unfunded Deficit', 'Stocks Value', 'MF Value', 'FD Value',
+    'PF Value', 'Total Corpus', 'Loan Balance', 'Net Worth', 'SIP Stocks',
+    'SIP MF'
+]
+CURRENCY_FORMAT = '₹{:,.0f}'
+FI_ROW_STYLE = 'background-color: #d4edda'
+
+
+# First FI row of the projections, or None if the target is never reached
+def first_fi_row(df):
+    fi_years = df[df['FI Achieved?'] == 'Yes']
+    if fi_years.empty:
+        return None
+    return fi_years.iloc[0]
+
+
+# Charts never send more than MAX_CHART_POINTS points per series to the
+# browser, and series longer than WEBGL_POINTS are drawn with WebGL
+MAX_CHART_POINTS = 1000
+WEBGL_POINTS = 500
+
+
+# Largest-Triangle-Three-Buckets downsampling: indices of n_out points that
+# keep the visual shape of the series (peaks, dips, first and last point)
+def lttb_indices(x, y, n_out=MAX_CHART_POINTS):
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    edges = np.append(edges, n)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, next_hi = edges[i], edges[i + 1], edges[i + 2]
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        # Twice the area of the triangle each candidate makes with the last
+        # selected point and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) -
+                      (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + area.argmax()
+        selected[i + 1] = a
+    return selected
+
+
+# Line trace that switches to WebGL for long series
+def line_trace(x, y, **kwargs):
+    trace = go.Scattergl if len(x) > WEBGL_POINTS else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+# Year axis for a projections frame; monthly frames place each month at its
+# fraction of the year
+def time_axis(df):
+    x = df['Year'].to_numpy()
+    if 'Month' in df:
+        x = x + (df['Month'].to_numpy() - 1) / 12
+    return x
+
+
+# Projections table with currency formatting and FI rows highlighted. Values
+# stay numeric: formatting and colours are set a whole column or frame at a
+# time, and only applied to the cells that are rendered.
+def style_projections(df):
+    currency_cols = [col for col in CURRENCY_COLS if col in df]
+
+    # Color code FI achievement
+    def highlight_fi(frame):
+        fi_rows = (frame['FI Achieved?'] == 'Yes').to_numpy()[:, None]
+        styles = np.where(fi_rows, FI_ROW_STYLE, '')
+        return pd.DataFrame(np.broadcast_to(styles, frame.shape),
+                            index=frame.index,
+                            columns=frame.columns)
+
+    return df.style.format(CURRENCY_FORMAT,
+                           subset=currency_cols).apply(highlight_fi, axis=None)
+
+
+def corpus_growth_figure(df, target_corpus):
+    # Create subplot with secondary y-axis
+    fig = make_subplots(rows=2,
+                        cols=1,
+                        subplot_titles=('Total Corpus Growth',
+                                        'Asset Breakdown Over Time'),
+                        vertical_spacing=0.1,
+                        specs=[[{
+                            "secondary_y": True
+                        }], [{
+                            "secondary_y": False
+                        }]])
+
+    # All series share the points picked from the total corpus, so the
+    # stacked areas stay aligned
+    keep = lttb_indices(time_axis(df), df['Total Corpus'].to_numpy())
+    df = df.iloc[keep]
+    x = time_axis(df)
+
+    # Total corpus line chart
+    fig.add_trace(line_trace(x,
+                             df['Total Corpus'],
+                             mode='lines+markers',
+                             name='Total Corpus',
+                             line=dict(width=3, color='#1f77b4'),
+                             marker=dict(size=8 if len(df) <= 100 else 3)),
+                  row=1,
+                  col=1)
+
+    # Target line
+    fig.add_hline(y=target_corpus,
+                  line_dash="dash",
+                  line_color="red",
+                  annotation_text=f"Target: ₹{target_corpus:,.0f}",
+                  row=1,
+                  col=1)
+
+    # Asset breakdown area chart
+    fig.add_trace(line_trace(x,
+                             df['Stocks Value'],
+                             fill='tonexty',
+                             mode='none',
+                             name='Stocks',
+                             fillcolor='rgba(255, 127, 14, 0.6)'),
+                  row=2,
+                  col=1)
+
+    fig.add_trace(line_trace(x,
+                             df['Stocks Value'] + df['MF Value'],
+                             fill='tonexty',
+                             mode='none',
+                             name='Mutual Funds',
+                             fillcolor='rgba(44, 160, 44, 0.6)'),
+                  row=2,
+                  col=1)
+
+    fig.add_trace(line_trace(x,
+                             df['Stocks Value'] + df['MF Value'] +
+                             df['FD Value'],
+                             fill='tonexty',
+                             mode='none',
+                             name='Fixed Deposits',
+                             fillcolor='rgba(214, 39, 40, 0.6)'),
+                  row=2,
+                  col=1)
+
+    fig.add_trace(line_trace(x,
+                             df['Total Corpus'],
+                             fill='tonexty',
+                             mode='none',
+                             name='Provident Fund',
+                             fillcolor='rgba(148, 103, 189, 0.6)'),
+                  row=2,
+                  col=1)
+
+    fig.update_layout(height=800,
+                      showlegend=True,
+                      title_text="Financial Portfolio Analysis")
+
+    fig.update_yaxes(title_text="Amount (₹)", row=1, col=1)
+    fig.update_yaxes(title_text="Amount (₹)", row=2, col=1)
+    fig.update_xaxes(title_text="Year", row=2, col=1)
+    return fig
+
+
+# Percentile fan chart of simulated corpus against the fixed-return path.
+# Bands come from the per-year percentile summary rather than raw paths, so
+# the figure is the same size whatever the number of paths.
+def fan_chart_figure(mc_summary,
+                     df,
+                     target_corpus,
+                     title="Simulated Corpus Percentiles"):
+    keep = lttb_indices(mc_summary['Year'].to_numpy(),
+                        mc_summary['Median'].to_numpy())
+    mc_summary = mc_summary.iloc[keep]
+    fig_fan = go.Figure()
+    for lower, upper, fillcolor in [('P5', 'P95', 'rgba(31, 119, 180, 0.15)'),
+                                    ('P25', 'P75', 'rgba(31, 119, 180, 0.3)')
+                                    ]:
+        fig_fan.add_trace(line_trace(mc_summary['Year'],
+                                     mc_summary[lower],
+                                     mode='lines',
+                                     line=dict(width=0),
+                                     showlegend=False,
+                                     hoverinfo='skip'))
+        fig_fan.add_trace(line_trace(mc_summary['Year'],
+                                     mc_summary[upper],
+                                     mode='lines',
+                                     line=dict(width=0),
+                                     fill='tonexty',
+                                     fillcolor=fillcolor,
+                                     name=f'{lower}–{upper}'))
+
+    fig_fan.add_trace(line_trace(mc_summary['Year'],
+                                 mc_summary['Median'],
+                                 mode='lines',
+                                 name='Median',
+                                 line=dict(width=3, color='#1f77b4')))
+    if df is not None:
+        keep = lttb_indices(time_axis(df), df['Total Corpus'].to_numpy())
+        fig_fan.add_trace(line_trace(time_axis(df.iloc[keep]),
+                                     df['Total Corpus'].iloc[keep],
+                                     mode='lines',
+                                     name='Fixed Returns',
+                                     line=dict(dash='dot', color='#ff7f0e')))
+    if target_corpus is not None:
+        fig_fan.add_hline(y=target_corpus,
+                          line_dash="dash",
+                          line_color="red",
+                          annotation_text=f"Target: ₹{target_corpus:,.0f}")
+    fig_fan.update_layout(title=title,
+                          xaxis_title="Year",
+                          yaxis_title="Amount (₹)",
+                          height=500)
+    return fig_fan
+
+
+# Probability of reaching the target in and by each year
+def probability_figure(mc_summary):
+    keep = lttb_indices(mc_summary['Year'].to_numpy(),
+                        mc_summary['P(FI by Year)'].to_numpy())
+    mc_summary = mc_summary.iloc[keep]
+    fig_prob = go.Figure()
+    fig_prob.add_trace(line_trace(mc_summary['Year'],
+                                  mc_summary['P(FI by Year)'] * 100,
+                                  mode='lines+markers',
+                                  name='FI reached by year'))
+    fig_prob.add_trace(line_trace(mc_summary['Year'],
+                                  mc_summary['P(Corpus >= Target)'] * 100,
+                                  mode='lines+markers',
+                                  name='Corpus above target in year'))
+    fig_prob.update_layout(title="Probability of Reaching Target Corpus",
+                           xaxis_title="Year",
+                           yaxis_title="Probability (%)",
+                           yaxis_range=[0, 100],
+                           height=400)
+    return fig_prob
+
+
+# Share of drawdown paths still funding their spending, with the median
+# withdrawal on a second axis
+def solvency_figure(drawdown_summary):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(line_trace(drawdown_summary['Year'],
+                             drawdown_summary['P(Solvent)'] * 100,
+                             mode='lines+markers',
+                             name='Corpus still funding spending'),
+                  secondary_y=False)
+    fig.add_trace(line_trace(drawdown_summary['Year'],
+                             drawdown_summary['Median Withdrawal'],
+                             mode='lines',
+                             name='Median withdrawal',
+                             line=dict(dash='dot', color='#ff7f0e')),
+                  secondary_y=True)
+    fig.update_layout(title="Probability the Corpus Lasts",
+                      xaxis_title="Year",
+                      height=400)
+    fig.update_yaxes(title_text="Probability (%)",
+                     range=[0, 100],
+                     secondary_y=False)
+    fig.update_yaxes(title_text="Withdrawal (₹)", secondary_y=True)
+    return fig
+
+
+# Histogram of how many years the corpus funded on the paths that ran out
+def depletion_figure(depletion):
+    fig = go.Figure(
+        go.Bar(x=depletion['Years Funded'],
+               y=depletion['Share'] * 100,
+               marker_color='#d62728'))
+    fig.update_layout(title="Years Until Depletion",
+                      xaxis_title="Years funded before running out",
+                      yaxis_title="Share of paths (%)",
+                      height=400)
+    return fig
+
+
+# Yearly interest, principal and prepayments on a loan, stacked, with the
+# balance left at each year end on a second axis
+def loan_schedule_figure(yearly):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    for name, values, color in [
+        ('Interest', yearly['Interest'], '#d62728'),
+        ('Principal', yearly['Principal'] - yearly['Prepayment'], '#1f77b4'),
+        ('Prepayment', yearly['Prepayment'], '#2ca02c')
+    ]:
+        fig.add_trace(go.Bar(x=yearly['Year'],
+                             y=values,
+                             name=name,
+                             marker_color=color),
+                      secondary_y=False)
+    fig.add_trace(line_trace(yearly['Year'],
+                             yearly['Balance'],
+                             mode='lines+markers',
+                             name='Outstanding Balance',
+                             line=dict(color='#ff7f0e')),
+                  secondary_y=True)
+    fig.update_layout(title="Loan Payments and Balance",
+                      barmode='stack',
+                      xaxis_title="Year",
+                      height=500)
+    fig.update_yaxes(title_text="Paid in Year (₹)", secondary_y=False)
+    fig.update_yaxes(title_text="Balance (₹)", secondary_y=True)
+    return fig
+
+
+# Net worth from prepaying versus investing each annual amount
+def prepay_invest_figure(comparison):
+    fig = go.Figure()
+    fig.add_trace(line_trace(comparison['Annual Prepayment'],
+                             comparison['Net Worth (Prepay)'],
+                             mode='lines+markers',
+                             name='Prepay the loan'))
+    fig.add_trace(line_trace(comparison['Annual Prepayment'],
+                             comparison['Net Worth (Invest)'],
+                             mode='lines+markers',
+                             name='Invest instead'))
+    fig.update_layout(title="Prepay or Invest",
+                      xaxis_title="Extra Paid Every Year (₹)",
+                      yaxis_title="Net Worth When the Loan Would Close (₹)",
+                      height=450)
+    return fig
+
+
+# Total corpus of each compared scenario overlaid, with a dashed line for
+# each distinct target ({scenario: target corpus})
+def scenario_comparison_figure(comparison, targets):
+    fig = go.Figure()
+    for name, group in comparison.groupby('Scenario', sort=False):
+        fig.add_trace(line_trace(group['Year'],
+                                 group['Total Corpus'],
+                                 mode='lines+markers',
+                                 name=name))
+    for target in sorted(set(targets.values())):
+        fig.add_hline(y=target,
+                      line_dash="dash",
+                      line_color="red",
+                      annotation_text=f"Target: ₹{target:,.0f}")
+    fig.update_layout(title="Total Corpus by Scenario",
+                      xaxis_title="Year",
+                      yaxis_title="Amount (₹)",
+                      height=500)
+    return fig
+
+
+# Tornado chart of how each input's low and high value moves metric ('Final
+# Corpus' or 'FI Year') from the plan's own base value, largest swing on
+# top. An FI year that isn't reached is drawn as the year after end_year.
+def tornado_figure(table, labels, metric, base, end_year):
+    unit = '₹' if metric == 'Final Corpus' else 'years'
+    if metric == 'FI Year':
+        base = end_year + 1 if np.isnan(base) else base
+    fig = go.Figure()
+    for side, color in [('Low', '#d62728'), ('High', '#1f77b4')]:
+        values = table[f'{metric} ({side})'].to_numpy(dtype=float)
+        if metric == 'FI Year':
+            values = np.where(np.isnan(values), end_year + 1, values)
+        fig.add_trace(
+            go.Bar(y=labels,
+                   x=values - base,
+                   orientation='h',
+                   name=f'Input {side.lower()}',
+                   marker_color=color))
+    fig.update_layout(title=f"{metric} Sensitivity",
+                      barmode='overlay',
+                      xaxis_title=f"Change in {metric} ({unit})",
+                      yaxis=dict(autorange='reversed'),
+                      height=max(400, 28 * len(table) + 150))
+    return fig
+
+
+# First-order and total-effect Sobol indices of one output, side by side
+def sobol_figure(indices, labels, output):
+    fig = go.Figure()
+    for name, color in [('First Order', '#1f77b4'),
+                        ('Total Effect', '#ff7f0e')]:
+        fig.add_trace(
+            go.Bar(x=labels, y=indices[name], name=name, marker_color=color))
+    fig.update_layout(title=f"Share of {output} Variance",
+                      barmode='group',
+                      yaxis_title="Sobol index",
+                      height=450)
+    return fig
+
+
+# Each input's indices as the sample grows, to judge whether they've settled
+def sobol_convergence_figure(convergence, labels):
+    fig = go.Figure()
+    for (name, group), label in zip(convergence.groupby('Input', sort=False),
+                                    labels):
+        for index, dash in [('Total Effect', 'solid'),
+                            ('First Order', 'dot')]:
+            fig.add_trace(
+                go.Scatter(x=group['Samples'],
+                           y=group[index],
+                           mode='lines+markers',
+                           name=f'{label} ({index.lower()})',
+                           legendgroup=name,
+                           line=dict(dash=dash)))
+    fig.update_layout(title="Convergence",
+                      xaxis=dict(title="Base samples", type='log'),
+                      yaxis_title="Sobol index",
+                      height=450)
+    return fig
+
+
+def current_allocation_figure(df):
+    current_data = df.iloc[0]
+    current_allocation = [
+        current_data['Stocks Value'] - current_data['Annual Surplus'],
+        current_data['MF Value'],
+        current_data['FD Value'] - current_data['Annual Surplus'],
+        current_data['PF Value']
+    ]
+
+    return px.pie(values=[max(0, x) for x in current_allocation],
+                  names=[
+                      'Stocks', 'Mutual Funds', 'Fixed Deposits',
+                      'Provident Fund'
+                  ],
+                  title="Current Asset Allocation")
+
+
+def final_allocation_figure(df, end_year):
+    final_data = df.iloc[-1]
+    final_allocation = [
+        final_data['Stocks Value'], final_data['MF Value'],
+        final_data['FD Value'], final_data['PF Value']
+    ]
+
+    return px.pie(values=final_allocation,
+                  names=[
+                      'Stocks', 'Mutual Funds', 'Fixed Deposits',
+                      'Provident Fund'
+                  ],
+                  title=f"Final Asset Allocation ({end_year})")
+
+
+# Initial vs final value of each asset class
+def asset_growth_table(df, params):
+    final_data = df.iloc[-1]
+    asset_growth_df = pd.DataFrame({
+        'Asset Type':
+        ['Stocks', 'Mutual Funds', 'Fixed Deposits', 'Provident Fund'],
+        'Initial Value':
+        [params.stocks_val, params.mf_val, params.fd_val, params.pf_val],
+        'Final Value': [
+            final_data['Stocks Value'], final_data['MF Value'],
+            final_data['FD Value'], final_data['PF Value']
+        ]
+    })
+
+    asset_growth_df['Growth'] = asset_growth_df[
+        'Final Value'] - asset_growth_df['Initial Value']
+    asset_growth_df['Growth %'] = (asset_growth_df['Growth'] /
+                                   asset_growth_df['Initial Value'] *
+                                   100).round(1)
+    return asset_growth_df
+
+
+def asset_growth_figure(asset_growth_df):
+    return px.bar(asset_growth_df,
+                  x='Asset Type',
+                  y=['Initial Value', 'Final Value'],
+                  barmode='group',
+                  title="Asset Growth Comparison",
+                  labels={
+                      'value': 'Amount (₹)',
+                      'variable': 'Value Type'
+                  })
+
+
+# Major expenses, loan closures and the FI milestone, sorted by year
+def timeline_events(df, params):
+    p = params
+
+    # Planned events, built-in and user-defined, and amortized loans
+    timeline_events = event_milestones(builtin_events(p) + list(p.events),
+                                       p.start_year) + loan_milestones(p.loans)
+    for event in timeline_events:
+        event['Your Age'] = p.age_me + (event['Year'] - p.start_year)
+        event['Partner Age'] = p.age_wife + (event['Year'] - p.start_year)
+
+    # Add FI achievement
+    fi_row = first_fi_row(df)
+    if fi_row is not None:
+        fi_year = fi_row['Year']
+        timeline_events.append({
+            'Year': fi_year,
+            'Event': '🎉 Financial Independence Achieved!',
+            'Amount': fi_row['Total Corpus'],
+            'Type': 'Milestone',
+            'Your Age': p.age_me + (fi_year - p.start_year),
+            'Partner Age': p.age_wife + (fi_year - p.start_year)
+        })
+
+    # Sort by year
+    return sorted(timeline_events, key=lambda x: x['Year'])
+
+
+def timeline_figure(timeline_df):
+    fig_timeline = go.Figure()
+
+    # Color mapping for different event types
+    color_map = {
+        'Major Expense': '#ff6b6b',
+        'Annual Expense': '#ffa500',
+        'Loan End': '#4ecdc4',
+        'Expense End': '#2ecc71',
+        'Income': '#9b59b6',
+        'Income End': '#8e44ad',
+        'Milestone': '#45b7d1'
+    }
+
+    for event_type in timeline_df['Type'].unique():
+        type_data = timeline_df[timeline_df['Type'] == event_type]
+        fig_timeline.add_trace(
+            go.Scatter(
+                x=type_data['Year'],
+                y=[event_type] * len(type_data),
+                mode='markers+text',
+                marker=dict(size=15,
+                            color=color_map.get(event_type, '#95a5a6')),
+                text=type_data['Event'],
+                textposition='top center',
+                name=event_type,
+                hovertemplate='<b>%{text}</b><br>' + 'Year: %{x}<br>' +
+                'Amount: ₹%{customdata[0]:,.0f}<br>' +
+                'Your Age: %{customdata[1]}<br>' +
+                'Partner Age: %{customdata[2]}' + '<extra></extra>',
+                customdata=list(
+                    zip(type_data['Amount'], type_data['Your Age'],
+                        type_data['Partner Age']))))
+
+    fig_timeline.update_layout(title="Financial Timeline & Key Milestones",
+                               xaxis_title="Year",
+                               yaxis_title="Event Type",
+                               height=500,
+                               showlegend=True)
+    return fig_timeline
+
+
+def age_figure(df, params):
+    age_df = df[['Year', 'Age Me', 'Age Wife']].copy()
+
+    fig_age = px.line(age_df.melt(id_vars=['Year'],
+                                  value_vars=['Age Me', 'Age Wife'],
+                                  var_name='Person',
+                                  value_name='Age'),
+                      x='Year',
+                      y='Age',
+                      color='Person',
+                      title="Age Progression Timeline",
+                      labels={
+                          'Age': 'Age (Years)',
+                          'Person': 'Family Member'
+                      })
+    fig_age.update_traces(mode='lines+markers')
+
+    # Mark FI achievement on age chart
+    fi_row = first_fi_row(df)
+    if fi_row is not None:
+        fi_year = fi_row['Year']
+        fi_age_me = params.age_me + (fi_year - params.start_year)
+        fi_age_wife = params.age_wife + (fi_year - params.start_year)
+
+        fig_age.add_vline(
+            x=fi_year,
+            line_dash="dash",
+            line_color="green",
+            annotation_text=
+            f"FI Achieved<br>You: {fi_age_me}y, Partner: {fi_age_wife}y")
+    return fig_age
+
+
+# Excel workbook with the projections and a summary sheet
+def excel_report(df, params):
+    p = params
+    final_corpus = df.iloc[-1]['Total Corpus']
+    fi_row = first_fi_row(df)
+
+    # Create Excel file in memory
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Financial Projections', index=False)
+
+        # Add summary sheet
+        summary_data = {
+            'Parameter': [
+                'Target Corpus', 'Final Corpus', 'Years to FI',
+                'Current Age (You)', 'Current Age (Partner)',
+                'Monthly Salary (You)', 'Monthly Salary (Partner)',
+                'Current Rental Income', 'Annual Income Growth',
+                'Stocks Return', 'MF Return', 'FD Return', 'PF Return'
+            ],
+            'Value': [
+                f"₹{p.target_corpus:,.0f}", f"₹{final_corpus:,.0f}",
+                f"{fi_row['Year'] - p.start_year} years"
+                if fi_row is not None else "Not achieved", p.age_me,
+                p.age_wife, f"₹{p.salary_me_monthly:,.0f}",
+                f"₹{p.salary_wife_monthly:,.0f}",
+                f"₹{p.rental_monthly_now:,.0f}",
+                f"{p.income_growth*100:.1f}%", f"{p.stocks_return*100:.1f}%",
+                f"{p.mf_return*100:.1f}%", f"{p.fd_return*100:.1f}%",
+                f"{p.pf_return*100:.1f}%"
+            ]
+        }
+        summary_df = pd.DataFrame(summary_data)
+        summary_df.to_excel(writer, sheet_name='Summary', index=False)
+
+    return output.getvalue()
+
+
+def csv_report(df):
+    return df.to_csv(index=False)
+
+
+# Phases of a rerun on a timeline, nested phases below their parents
+def phase_timeline_figure(spans):
+    fig = go.Figure(
+        go.Bar(y=spans['Phase'],
+               x=spans['Wall (ms)'],
+               base=spans['Start (ms)'],
+               orientation='h',
+               marker_color=[
+                   px.colors.qualitative.Plotly[depth % 10]
+                   for depth in spans['Depth']
+               ],
+               hovertemplate="%{y}: %{x:.1f} ms<extra></extra>"))
+    fig.update_layout(title="Rerun Phases",
+                      xaxis_title="Time Since Rerun Start (ms)",
+                      yaxis=dict(autorange='reversed'),
+                      height=max(300, 26 * len(spans) + 120))
+    return fig